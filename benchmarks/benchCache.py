@@ -0,0 +1,91 @@
+"""COMPRESSION TEST PARSED DATA CACHE BENCHMARK
+Logan Halstrom
+CREATED: 17 OCT 2026
+
+DESCRIPTION:  Compare loading data by parsing it every time against loading
+it from the parsed data cache (compCache) once the cache is warm, for the
+sample data files, a large data file and the sample Excel workbook.  A
+cache only pays off where a hit is faster than parsing.
+
+USAGE:
+python benchmarks/benchCache.py [number of repeated strokes for large file]
+"""
+
+import os
+import sys
+import glob
+import timeit
+import shutil
+import tempfile
+from functools import partial
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from compParse import ParseCompText
+from compCache import LoadCached
+
+
+def Time(func, number):
+    """Best average time per call [ms] of func over 3 repeats"""
+    return min(timeit.repeat(func, number=number, repeat=3)) / number * 1e3
+
+
+def Report(label, parse, hit):
+    print('{:<38} {:>10.3f} {:>10.3f} {:>8.1f}x'.format(
+                                        label, parse, hit, parse / hit))
+
+
+def Compare(label, filename, parse, ncol, cachedir, number, layout=None):
+    """Time parsing against a cache hit of the same file and check both give
+    the same data
+    parse --> parser of file contents (bytes) to [stroke, column]
+    """
+    def Parse():
+        with open(filename, 'rb') as f:
+            return parse(f.read(), ncol)
+    load = partial(LoadCached, filename, ncol, cachedir, parse=parse,
+                    layout=layout)
+    load() #warm cache
+    assert np.array_equal(Parse(), load(), equal_nan=True), filename
+    Report(label, Time(Parse, number), Time(load, number))
+
+
+if __name__ == "__main__":
+
+    nrepeat = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    datadir = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                            '..', 'Data')
+    files = sorted(glob.glob(os.path.join(datadir, 'CompTest_*.dat')))
+    workbooks = sorted(glob.glob(os.path.join(datadir, '*.xlsx')))
+    cachedir = tempfile.mkdtemp()
+
+    print('{:<38} {:>10} {:>10} {:>9}'.format(
+                                'case', 'parse [ms]', 'hit [ms]', 'speedup'))
+    try:
+        #SMALL FILES (SAMPLE DATA)
+        for filename in files:
+            Compare(os.path.basename(filename)[9:], filename, ParseCompText,
+                    9, cachedir, 2000)
+
+        #LARGE FILE
+        with open(files[-1]) as f:
+            lines = [line for line in f.read().splitlines() if line.strip()]
+        bigfile = os.path.join(cachedir, 'CompTest_large.dat')
+        with open(bigfile, 'w') as f:
+            f.write('\n'.join(lines * (nrepeat // len(lines) + 1)) + '\n')
+        Compare('large file ({} strokes)'.format(nrepeat), bigfile,
+                ParseCompText, 9, cachedir, 10)
+
+        #EXCEL WORKBOOKS
+        try:
+            from compExcel import ParseWorkbook
+        except ImportError:
+            workbooks = []
+        for filename in workbooks:
+            tests = ('dry', 'wet')
+            Compare(os.path.basename(filename), filename,
+                    partial(ParseWorkbook, tests=tests), None, cachedir, 20,
+                    layout=list(tests))
+    finally:
+        shutil.rmtree(cachedir)
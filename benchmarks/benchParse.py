@@ -0,0 +1,92 @@
+"""COMPRESSION TEST PARSER BENCHMARK
+Logan Halstrom
+CREATED: 17 OCT 2026
+
+DESCRIPTION:  Compare parsing speed of the single-pass tokenizer
+(compParse) against the previous ReadCompTestData implementation
+(read_csv + regex whitespace replace + apply(to_numeric)).
+
+USAGE:
+python benchmarks/benchParse.py [number of repeated strokes for large file]
+"""
+
+import os
+import sys
+import glob
+import timeit
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from compParse import ParseCompTest, ParseCompTests
+
+columnnames = ['Stroke', '1dry', '2dry', '3dry', '4dry',
+                         '1wet', '2wet', '3wet', '4wet']
+
+
+def ReadCompTestDataPandas(filename):
+    """Previous ReadCompTestData: three full passes over the data"""
+    df = pd.read_csv(filename, sep=',', names=columnnames)
+    df = df.replace(r'\s+', np.nan, regex=True)
+    df = df.apply(pd.to_numeric)
+    return df
+
+
+def ReadCompTestDataFast(filename):
+    """Current ReadCompTestData: single-pass tokenizer"""
+    return pd.DataFrame(ParseCompTest(filename, len(columnnames)),
+                        columns=columnnames)
+
+
+def Time(func, number):
+    """Best average time per call [ms] of func over 3 repeats"""
+    return min(timeit.repeat(func, number=number, repeat=3)) / number * 1e3
+
+
+def Report(label, old, new):
+    print('{:<34} {:>10.3f} {:>10.3f} {:>8.1f}x'.format(
+                                        label, old, new, old / new))
+
+
+if __name__ == "__main__":
+
+    nrepeat = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    datadir = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                            '..', 'Data')
+    files = sorted(glob.glob(os.path.join(datadir, 'CompTest_*.dat')))
+
+    #Check both parsers give the same numbers
+    for filename in files:
+        old = ReadCompTestDataPandas(filename).to_numpy(dtype=float)
+        new = ReadCompTestDataFast(filename).to_numpy(dtype=float)
+        assert np.array_equal(old, new, equal_nan=True), filename
+
+    print('{:<34} {:>10} {:>10} {:>9}'.format(
+                                'case', 'old [ms]', 'new [ms]', 'speedup'))
+
+    #SMALL FILES (SAMPLE DATA)
+    for filename in files:
+        Report(os.path.basename(filename)[9:],
+                Time(lambda: ReadCompTestDataPandas(filename), 200),
+                Time(lambda: ReadCompTestDataFast(filename), 200))
+
+    #BULK PARSE OF ALL SAMPLE FILES (x100) INTO ONE BUFFER
+    many = files * 100
+    Report('bulk {} files'.format(len(many)),
+            Time(lambda: [ReadCompTestDataPandas(f) for f in many], 1),
+            Time(lambda: ParseCompTests(many), 1))
+
+    #LARGE FILE
+    with open(files[-1]) as f:
+        lines = [line for line in f.read().splitlines() if line.strip()]
+    with tempfile.NamedTemporaryFile('w', suffix='.dat', delete=False) as f:
+        f.write('\n'.join(lines * (nrepeat // len(lines) + 1)) + '\n')
+        bigfile = f.name
+    try:
+        Report('large file ({} strokes)'.format(nrepeat),
+                Time(lambda: ReadCompTestDataPandas(bigfile), 1),
+                Time(lambda: ReadCompTestDataFast(bigfile), 1))
+    finally:
+        os.remove(bigfile)
@@ -0,0 +1,130 @@
+"""COMPRESSION TEST PIPELINE BENCHMARK
+Logan Halstrom
+CREATED: 17 OCT 2026
+
+DESCRIPTION:  Time each stage of plotCompression.main separately on
+synthetic data (compSynth): parsing (ReadCompTestData), maxima analysis
+(AnalyzeMaxima), wet-dry fill and delta (CalcWetDryDelta), and each plot
+function and its save.  Results are written as JSON so regressions can be
+tracked between runs.
+
+USAGE:
+python benchmarks/benchPipeline.py -n 2000 --nplot 50 -o bench_pipeline.json
+"""
+
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import plotCompression as pc
+from compSynth import WriteSynthData
+
+
+def Timer(times, stage, func, *args, **kwargs):
+    """Call func and record its wall time [s] under stage"""
+    start = time.perf_counter()
+    out = func(*args, **kwargs)
+    times.setdefault(stage, []).append(time.perf_counter() - start)
+    return out
+
+
+def Summary(times):
+    """Summary statistics of recorded times of each stage"""
+    stats = {}
+    for stage, t in times.items():
+        t = np.array(t)
+        stats[stage] = {'n' : len(t), 'total_s' : t.sum(),
+                        'mean_ms' : t.mean() * 1e3,
+                        'median_ms' : np.median(t) * 1e3,
+                        'min_ms' : t.min() * 1e3, 'max_ms' : t.max() * 1e3}
+    return stats
+
+
+def RunBenchmark(paths, nplot, outdir, ncyl=4):
+    """Time every stage of main for each test.
+    paths  --> data files to run
+    nplot  --> number of tests to also plot (plotting is much slower)
+    outdir --> directory to save plots in
+    """
+    tests = ['dry', 'wet']
+    cyls = np.arange(1, ncyl+1, 1)
+    times = {}
+    for i, path in enumerate(paths):
+        df = Timer(times, 'parse', pc.ReadCompTestData, path)
+        df, maxima = Timer(times, 'maxima', pc.AnalyzeMaxima,
+                            df, 15, tests, ncyl)
+        if i < nplot:
+            names = [os.path.join(outdir, '{}{}.png'.format(i, s))
+                        for s in ['', '_norm', '_delta_norm']]
+            Timer(times, 'plot_presshist', pc.PlotPressHist,
+                    df, [50, 275], tests=tests, cyls=cyls)
+            Timer(times, 'save_presshist', pc.lplot.SavePlot,
+                    names[0], close=True)
+            Timer(times, 'plot_presshist_norm', pc.PlotPressHist,
+                    df, None, norm=True, tests=tests, cyls=cyls)
+            Timer(times, 'save_presshist_norm', pc.lplot.SavePlot,
+                    names[1], close=True)
+        df = Timer(times, 'delta', pc.CalcWetDryDelta, df, tests, cyls)
+        if i < nplot:
+            Timer(times, 'plot_delta', pc.PlotDryVsWetDelta,
+                    df, None, norm=maxima['drymax'])
+            Timer(times, 'save_delta', pc.lplot.SavePlot,
+                    names[2], close=True)
+    return times
+
+
+def ParseArgs(args=None):
+    """Parse command line arguments for benchmark"""
+    parser = argparse.ArgumentParser(
+                description='Benchmark each stage of compression test main')
+    parser.add_argument('-n', '--nfile', type=int, default=1000,
+                help='number of synthetic tests to run')
+    parser.add_argument('--nplot', type=int, default=20,
+                help='number of tests to also plot')
+    parser.add_argument('--seed', type=int, default=0,
+                help='random seed of synthetic data')
+    parser.add_argument('-o', '--output', default='bench_pipeline.json',
+                help='JSON file to write results to')
+    return parser.parse_args(args)
+
+
+if __name__ == "__main__":
+
+    args = ParseArgs()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = WriteSynthData(os.path.join(tmp, 'Data'), args.nfile,
+                                seed=args.seed)
+        if args.nplot > 0:
+            os.environ.setdefault('MPLBACKEND', 'Agg')
+            pc.InitPlotting()
+        times = RunBenchmark(paths, args.nplot, os.path.join(tmp, 'Results'))
+
+    import matplotlib
+    results = {
+        'config' : {'nfile' : args.nfile, 'nplot' : args.nplot,
+                    'seed' : args.seed},
+        'env' : {'python' : platform.python_version(),
+                    'platform' : platform.platform(),
+                    'numpy' : np.__version__, 'pandas' : pd.__version__,
+                    'matplotlib' : matplotlib.__version__},
+        'time' : time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'stages' : Summary(times),
+        }
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=1)
+
+    print('{:<22} {:>7} {:>10} {:>10}'.format('stage', 'n', 'mean [ms]',
+                                                'total [s]'))
+    for stage, s in results['stages'].items():
+        print('{:<22} {:>7} {:>10.3f} {:>10.3f}'.format(
+                                stage, s['n'], s['mean_ms'], s['total_s']))
+    print('Results written to {}'.format(args.output))
@@ -0,0 +1,133 @@
+"""PLOT SAVE BENCHMARK
+Logan Halstrom
+CREATED: 17 OCT 2026
+
+DESCRIPTION:  Compare per-figure save time of lplot.SavePlot with a tight
+bbox (draws figure twice), SavePlot with a fixed layout from TightBbox
+(draws once), and multi-format/multi-resolution export with ExportPlot
+against a separate tight save of each output.  Pressure history plots of
+synthetic tests (compSynth) are saved.  Results are written as JSON.
+
+USAGE:
+python benchmarks/benchSave.py -n 20 --formats png pdf svg --dpis 100 200
+"""
+
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import tempfile
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+os.environ.setdefault('MPLBACKEND', 'Agg')
+import plotCompression as pc
+from compSynth import WriteSynthData
+from benchPipeline import Summary
+
+
+def MakeFigure(path, ylim=[50, 275]):
+    """Pressure history plot of a test (on Agg figure)"""
+    df = pc.ReadCompTestData(path)
+    df, _ = pc.AnalyzeMaxima(df)
+    return pc.PlotPressHist(df, ylim, agg=True).figure
+
+
+def RunBenchmark(paths, outdir, formats, dpis):
+    """Time each save mode for the figure of each test"""
+    lplot = pc.lplot
+    times = {}
+    bbox = None
+    for i, path in enumerate(paths):
+        fig = MakeFigure(path)
+        base = os.path.join(outdir, str(i))
+
+        start = time.perf_counter()
+        lplot.SavePlot(base + '_tight.png', fig=fig)
+        times.setdefault('saveplot_tight', []).append(
+                                                time.perf_counter() - start)
+
+        if bbox is None:
+            #Layout found once (e.g. for first test of a batch)
+            start = time.perf_counter()
+            bbox = lplot.TightBbox(fig)
+            times['tightbbox_once'] = [time.perf_counter() - start]
+        start = time.perf_counter()
+        lplot.SavePlot(base + '_fixed.png', fig=fig, bbox=bbox)
+        times.setdefault('saveplot_fixed', []).append(
+                                                time.perf_counter() - start)
+
+        #Every format and resolution, separate tight save of each
+        start = time.perf_counter()
+        for fmt in formats:
+            for dpi in (dpis if fmt == 'png' else [None]):
+                name = '{}_sep_{}.{}'.format(base, dpi, fmt)
+                fig.savefig(name, dpi=dpi or 'figure', bbox_inches='tight')
+        times.setdefault('separate_exports', []).append(
+                                                time.perf_counter() - start)
+
+        start = time.perf_counter()
+        lplot.ExportPlot(base + '_exp.png', formats, dpis, fig=fig)
+        times.setdefault('exportplot', []).append(
+                                                time.perf_counter() - start)
+
+        start = time.perf_counter()
+        lplot.ExportPlot(base + '_expfix.png', formats, dpis, fig=fig,
+                            bbox=bbox)
+        times.setdefault('exportplot_fixed', []).append(
+                                                time.perf_counter() - start)
+    return times
+
+
+def ParseArgs(args=None):
+    """Parse command line arguments for benchmark"""
+    parser = argparse.ArgumentParser(
+                description='Benchmark plot save modes')
+    parser.add_argument('-n', '--nfile', type=int, default=20,
+                help='number of synthetic tests to plot')
+    parser.add_argument('--formats', nargs='+', default=['png', 'pdf', 'svg'],
+                help='export formats')
+    parser.add_argument('--dpis', type=float, nargs='+', default=[100, 200],
+                help='PNG export resolutions')
+    parser.add_argument('--seed', type=int, default=0,
+                help='random seed of synthetic data')
+    parser.add_argument('-o', '--output', default='bench_save.json',
+                help='JSON file to write results to')
+    return parser.parse_args(args)
+
+
+if __name__ == "__main__":
+
+    args = ParseArgs()
+    pc.InitPlotting()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = WriteSynthData(os.path.join(tmp, 'Data'), args.nfile,
+                                seed=args.seed)
+        outdir = os.path.join(tmp, 'Results')
+        os.makedirs(outdir)
+        times = RunBenchmark(paths, outdir, args.formats, args.dpis)
+
+    import matplotlib
+    results = {
+        'config' : {'nfile' : args.nfile, 'formats' : args.formats,
+                    'dpis' : args.dpis, 'seed' : args.seed},
+        'env' : {'python' : platform.python_version(),
+                    'platform' : platform.platform(),
+                    'numpy' : np.__version__,
+                    'matplotlib' : matplotlib.__version__},
+        'time' : time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'modes' : Summary(times),
+        }
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=1)
+
+    print('{:<22} {:>7} {:>10} {:>10}'.format('mode', 'n', 'mean [ms]',
+                                                'total [s]'))
+    for mode, s in results['modes'].items():
+        print('{:<22} {:>7} {:>10.3f} {:>10.3f}'.format(
+                                mode, s['n'], s['mean_ms'], s['total_s']))
+    print('Results written to {}'.format(args.output))
@@ -0,0 +1,61 @@
+"""STARTUP TIME BENCHMARK
+Logan Halstrom
+CREATED: 17 OCT 2026
+
+DESCRIPTION:  Compare process startup cost of analysis-only mode
+(main(..., plot=False), matplotlib/seaborn never imported) against full
+plotting mode.  Each case runs in a fresh interpreter, as a batch worker
+would.
+
+USAGE:
+python benchmarks/benchStartup.py [number of repeats]
+"""
+
+import os
+import sys
+import time
+import tempfile
+import subprocess
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+DATA = os.path.join(ROOT, 'Data', 'CompTest_2017-02-11_1st_1999Camry.dat')
+
+CASES = [
+    ('import only',
+        'import plotCompression'),
+    ('analysis only (plot=False)',
+        'import plotCompression as pc; pc.main({!r}, "b", plot=False)'
+        ''.format(DATA)),
+    ('analysis + plots (plot=True)',
+        'import plotCompression as pc; pc.main({!r}, "b")'.format(DATA)),
+]
+
+#Report which plotting packages ended up imported
+CHECK = ('; import sys; print(",".join(m for m in ("matplotlib", "seaborn")'
+            ' if m in sys.modules) or "none")')
+
+
+def TimeCase(code, nrepeat, cwd):
+    """Best wall time [s] of running code in a fresh interpreter"""
+    env = dict(os.environ, MPLBACKEND='Agg', PYTHONPATH=ROOT)
+    best = None
+    for _ in range(nrepeat):
+        start = time.perf_counter()
+        out = subprocess.run([sys.executable, '-c', code + CHECK], cwd=cwd,
+                                env=env, check=True, capture_output=True,
+                                text=True).stdout
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, out.strip().splitlines()[-1]
+
+
+if __name__ == "__main__":
+
+    nrepeat = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+
+    print('{:<30} {:>10} {:>22}'.format('case', 'time [s]',
+                                        'plotting imports'))
+    with tempfile.TemporaryDirectory() as cwd:
+        for label, code in CASES:
+            t, mods = TimeCase(code, nrepeat, cwd)
+            print('{:<30} {:>10.3f} {:>22}'.format(label, t, mods))
@@ -0,0 +1,167 @@
+"""COMPRESSION TEST ARRAY ANALYSIS
+Logan Halstrom
+CREATED: 17 OCT 2026
+
+DESCRIPTION:  Vectorized maxima, normalization and wet-dry delta engine for
+compression tests.  Each test is loaded into a single NumPy array indexed as
+[test type, cylinder, stroke] so that maxima, normalized pressure histories,
+fractional/percent differences and threshold failures for every cylinder are
+found with a few NaN-aware array operations instead of per-column loops.
+
+Any number of leading dimensions is supported, so a stack of many tests
+(e.g. [vehicle test, test type, cylinder, stroke]) can be scored for a whole
+fleet in a single call.
+
+NOTE:
+NaN-padded stroke tails are ignored by using np.fmax, which gives the same
+maxima as the built-in max() used on each dataframe column in main.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+def TestArray(df, tests=['dry', 'wet'], ncyl=4):
+    """Load a single compression test dataframe into a pressure array.
+    df    --> pandas dataframe from ReadCompTestData
+                (or compTest.CompressionTest)
+    tests --> test types to load (e.g. ['dry', 'wet'])
+    ncyl  --> number of cylinders in engine
+    Returns:
+    array of shape [test type, cylinder, stroke]
+    """
+    if hasattr(df, 'pres'):
+        #Already an array-backed test, select test types and cylinders
+        return df.pres[[df.tests.index(test) for test in tests], :ncyl]
+    cyls = np.arange(1, ncyl+1, 1)
+    keys = ['{}{}'.format(cyl, test) for test in tests for cyl in cyls]
+    data = df[keys].to_numpy(dtype=float).T
+    return data.reshape(len(tests), ncyl, -1)
+
+
+def StackTests(arrays):
+    """Stack many test arrays into a single fleet array.
+    Tests with fewer strokes are padded with NaN at the end of the stroke
+    axis (just like the blank tails in the data files).
+    arrays --> list of arrays of shape [test type, cylinder, stroke]
+    Returns:
+    array of shape [test, test type, cylinder, stroke]
+    """
+    nstroke = max(a.shape[-1] for a in arrays)
+    fleet = np.full((len(arrays),) + arrays[0].shape[:-1] + (nstroke,),
+                    np.nan)
+    for i, a in enumerate(arrays):
+        fleet[i, ..., :a.shape[-1]] = a
+    return fleet
+
+
+def CalcMaxima(data, thresh=15, ref=0):
+    """Calculate maxima, normalized pressure and percent difference of each
+    cylinder from the best cylinder, and flag cylinders outside threshold.
+    data   --> pressure array of shape [..., test type, cylinder, stroke]
+    thresh --> percentage threshold for poor cylinder performance
+                (assessed as negative in code)
+    ref    --> index of test type used for cylinder comparison (dry test)
+    Returns:
+    dictionary of arrays:
+        'max'      --> maximum pressure [..., test type, cylinder]
+        'norm'     --> pressure normalized by its maximum (shape of data)
+        'diff'     --> fractional difference from max cylinder [..., cyl]
+        'percdiff' --> percent difference from max cylinder [..., cyl]
+        'fail'     --> True if cylinder is below threshold [..., cyl]
+    """
+    data = np.asarray(data, dtype=float)
+
+    #Local maximum of each cylinder in each test (NaN tails ignored)
+    maxs = np.fmax.reduce(data, axis=-1)
+    #Normalize each pressure history by its maximum
+    norm = data / maxs[..., None]
+
+    #Fractional difference from max cylinder (reference test only)
+    refmax = maxs[..., ref, :]
+    maxcyl = np.fmax.reduce(refmax, axis=-1)[..., None]
+    diff = (refmax - maxcyl) / maxcyl
+    percdiff = diff * 100
+
+    return {'max' : maxs, 'norm' : norm, 'diff' : diff,
+            'percdiff' : percdiff, 'fail' : percdiff < -thresh}
+
+
+def FillLast(data):
+    """Fill missing (NaN) pressures with the last recorded value of each
+    cylinder in each test (same as fillna with last non-NaN value).
+    data --> pressure array of shape [..., stroke]
+    Returns:
+    filled copy of data (all-NaN histories stay NaN)
+    """
+    data = np.asarray(data, dtype=float)
+    valid = ~np.isnan(data)
+    #Index of last recorded stroke of each history
+    nstroke = data.shape[-1]
+    last = nstroke - 1 - np.argmax(valid[..., ::-1], axis=-1)
+    lastval = np.take_along_axis(data, last[..., None], axis=-1)
+    return np.where(valid, data, lastval)
+
+
+def CalcDelta(data, ref=0):
+    """Pressure difference of every test type from the reference test type
+    (e.g. each wet run minus dry), for all cylinders at once.  Any number of
+    wet repeats (e.g. oil added twice) can be stacked on the test type axis.
+    data --> (filled) pressure array of shape [..., test type, cyl, stroke]
+    ref  --> index of reference test type (dry test)
+    Returns:
+    array of shape of data (reference test type is all zero)
+    """
+    return data - data[..., ref:ref+1, :, :]
+
+
+def DeltaName(cyl, test):
+    """Data key of wet - dry delta of cylinder ('{cyl}del' for the 'wet'
+    test, '{cyl}{test}del' for other wet repeats, e.g. '1wet2del')
+    """
+    if test == 'wet':
+        return '{}del'.format(cyl)
+    return '{}{}del'.format(cyl, test)
+
+
+def MaximaTable(result, tests=['dry', 'wet']):
+    """Build the `maxima` dataframe returned by main for a single test.
+    result --> dictionary from CalcMaxima for a single test
+    tests  --> test types in order of the test type axis
+    """
+    ncyl = result['max'].shape[-1]
+    maxima = pd.DataFrame( {'cyl' : np.arange(1, ncyl+1, 1)} )
+    for i, test in enumerate(tests):
+        maxima['{}max'.format(test)] = result['max'][i]
+    maxima['diff'] = result['diff']
+    maxima['percdiff'] = result['percdiff']
+    return maxima
+
+
+def NormColumns(result, tests=['dry', 'wet']):
+    """Build the `{cyl}{test}norm` columns added to the test dataframe by main.
+    result --> dictionary from CalcMaxima for a single test
+    tests  --> test types in order of the test type axis
+    """
+    norm = result['norm']
+    ncyl = norm.shape[-2]
+    cols = {}
+    for i, test in enumerate(tests):
+        for j in range(ncyl):
+            cols['{}{}norm'.format(j+1, test)] = norm[i, j]
+    return pd.DataFrame(cols)
+
+
+def ScoreFleet(dfs, thresh=15, tests=['dry', 'wet'], ncyl=4):
+    """Score many compression tests in a single vectorized call.
+    dfs    --> dictionary of test dataframes (or compTest.CompressionTest)
+                    keyed by test name
+    thresh --> percentage threshold for poor cylinder performance
+    tests  --> types of tests performed ('dry' only or both 'dry' and 'wet')
+    ncyl   --> number of cylinders in engine
+    Returns:
+    list of test names (order of leading axis), CalcMaxima result dictionary
+    """
+    names = list(dfs.keys())
+    fleet = StackTests([TestArray(dfs[name], tests, ncyl) for name in names])
+    return names, CalcMaxima(fleet, thresh, ref=tests.index('dry'))
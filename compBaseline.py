@@ -0,0 +1,484 @@
+"""COMPRESSION TEST FLEET BASELINES
+Logan Halstrom
+CREATED: 17 OCT 2026
+
+DESCRIPTION:  Per-engine-model baseline distributions of compression test
+results, so a test can be judged against its engine family as well as
+against its own best cylinder (percdiff/thresh in main).  For each engine
+model, distributions are kept of:
+    drymax  --> max dry pressure of each cylinder [psi]
+    delta   --> wet - dry max pressure of each cylinder [psi]
+    buildup --> normalized dry pressure of each cylinder on a common grid of
+                NGRID points from first to last recorded stroke (linearly
+                interpolated, so tests with any number of strokes compare)
+
+Distributions are stored in mergeable streaming quantile sketches
+(QuantileSketch, log-bucketed with bounded relative error like DDSketch),
+so baselines are updated incrementally from any number of tests in fixed
+memory, and baselines built separately (e.g. on different machines or
+batches) are merged by adding them.  Content hashes of the most recently
+added data files (up to MAXADDED) are saved with the baselines, so repeated
+updates over a growing data archive only add the new files.
+
+USAGE:
+python compBaseline.py update Data -b Results/baseline.npz
+python compBaseline.py check Data/CompTest_2017-02-12_1st_1996Corolla.dat
+"""
+
+import os
+import re
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from compAnalysis import CalcMaxima, FillLast
+
+BASELINE = 'Results/baseline.npz' #default baseline path
+NGRID = 16                        #points of common build-up grid
+MAXADDED = 100000                 #most content hashes of added files kept
+FIELDS = ['drymax', 'delta', 'buildup']
+
+
+class QuantileSketch(object):
+    """Array of mergeable streaming quantile sketches.  Values are counted
+    in logarithmic buckets (separately for positive and negative values),
+    so any quantile is found with relative error below alpha using memory
+    that does not depend on the number of values.
+    """
+
+    def __init__(self, shape=(), alpha=0.01, vmin=1e-2, vmax=1e5):
+        """shape --> shape of sketch array (one sketch per element)
+        alpha --> relative accuracy of quantiles
+        vmin  --> smallest magnitude kept apart from zero
+        vmax  --> largest magnitude (larger values are counted as vmax)
+        """
+        self.shape = tuple(shape)
+        self.alpha = alpha
+        self.vmin = vmin
+        self.vmax = vmax
+        self.gamma = (1 + alpha) / (1 - alpha)
+        self.kmin = int(np.floor(np.log(vmin) / np.log(self.gamma)))
+        kmax = int(np.ceil(np.log(vmax) / np.log(self.gamma)))
+        nkey = kmax - self.kmin + 1
+        #Bucket counts of negative values, zero and positive values
+        self.neg = np.zeros(self.shape + (nkey,), dtype=np.int64)
+        self.zero = np.zeros(self.shape, dtype=np.int64)
+        self.pos = np.zeros(self.shape + (nkey,), dtype=np.int64)
+
+    @property
+    def nkey(self):
+        """Number of buckets of each sign"""
+        return self.pos.shape[-1]
+
+    @property
+    def count(self):
+        """Number of values in each sketch"""
+        return self.neg.sum(-1) + self.zero + self.pos.sum(-1)
+
+    def _Keys(self, values):
+        """Bucket of magnitude of each value"""
+        with np.errstate(divide='ignore'):
+            keys = np.ceil(np.log(np.abs(values)) / np.log(self.gamma))
+        return np.clip(keys - self.kmin, 0, self.nkey - 1).astype(np.int64)
+
+    def Add(self, values):
+        """Add values to sketches.
+        values --> array of shape [n, *shape] (n values for every sketch),
+                    NaN values are ignored
+        """
+        nsketch = int(np.prod(self.shape))
+        values = np.asarray(values, dtype=float).reshape(-1, nsketch)
+        sketch = np.broadcast_to(np.arange(nsketch), values.shape)
+        keys = self._Keys(values)
+        size = nsketch * self.nkey
+        for store, mask in [(self.pos, values >= self.vmin),
+                            (self.neg, values <= -self.vmin)]:
+            flat = sketch[mask] * self.nkey + keys[mask]
+            store += np.bincount(flat, minlength=size).reshape(store.shape)
+        zero = np.abs(values) < self.vmin
+        self.zero += np.bincount(sketch[zero],
+                                    minlength=nsketch).reshape(self.shape)
+
+    def Added(self, key):
+        """True if data file with content hash key was added recently"""
+        return key in self.added
+
+    def MarkAdded(self, key, maxadded=MAXADDED):
+        """Record content hash of added data file, forgetting the oldest
+        hashes past maxadded so memory stays bounded
+        """
+        self.added.pop(key, None)
+        self.added[key] = None
+        while len(self.added) > maxadded:
+            del self.added[next(iter(self.added))]
+
+    def Merge(self, other):
+        """Add counts of another sketch array of same shape and accuracy"""
+        self.neg += other.neg
+        self.zero += other.zero
+        self.pos += other.pos
+        return self
+
+    def _Ordered(self):
+        """Bucket counts in order of value, and value of each bucket"""
+        counts = np.concatenate([self.neg[..., ::-1], self.zero[..., None],
+                                    self.pos], axis=-1)
+        k = np.arange(self.kmin, self.kmin + self.nkey)
+        rep = 2 * self.gamma**k / (self.gamma + 1)
+        return counts, np.concatenate([-rep[::-1], [0], rep])
+
+    def Quantile(self, q):
+        """Quantile of each sketch.
+        q --> quantile in [0, 1] (scalar or array of shape [nq])
+        Returns:
+        array of shape [*shape] (or [nq, *shape]), NaN for empty sketches
+        """
+        counts, rep = self._Ordered()
+        cum = np.cumsum(counts, axis=-1)
+        total = cum[..., -1]
+        q = np.asarray(q, dtype=float)
+        rank = q.reshape(q.shape + (1,) * len(self.shape)) * (total - 1)
+        idx = np.sum(cum <= np.floor(rank)[..., None], axis=-1)
+        out = rep[np.minimum(idx, len(rep) - 1)]
+        return np.where(total > 0, out, np.nan)
+
+    def Percentile(self, values):
+        """Fleet percentile of values (fraction of sketch values below
+        each value, counting half of its own bucket) [%].
+        values --> array of shape [n, *shape] (or [*shape])
+        Returns:
+        array of shape of values, NaN for NaN values or empty sketches
+        """
+        counts, _ = self._Ordered()
+        cum = np.cumsum(counts, axis=-1)
+        total = cum[..., -1]
+        values = np.asarray(values, dtype=float)
+        keys = self._Keys(values)
+        idx = np.where(values >= self.vmin, self.nkey + 1 + keys,
+                np.where(values <= -self.vmin, self.nkey - 1 - keys,
+                            self.nkey))
+        below = np.take_along_axis(np.broadcast_to(cum, values.shape
+                                                    + (cum.shape[-1],)),
+                                    idx[..., None], axis=-1)[..., 0]
+        own = np.take_along_axis(np.broadcast_to(counts, values.shape
+                                                    + (cum.shape[-1],)),
+                                    idx[..., None], axis=-1)[..., 0]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            pct = 100 * (below - own / 2) / total
+        return np.where(np.isnan(values) | (total == 0), np.nan, pct)
+
+    def State(self):
+        """Arrays of sketch (for saving)"""
+        return {'neg' : self.neg, 'zero' : self.zero, 'pos' : self.pos,
+                'params' : np.array([self.alpha, self.vmin, self.vmax])}
+
+    @classmethod
+    def FromState(cls, state):
+        """Sketch from arrays of State"""
+        alpha, vmin, vmax = state['params']
+        sketch = cls(state['zero'].shape, alpha, vmin, vmax)
+        sketch.neg[...] = state['neg']
+        sketch.zero[...] = state['zero']
+        sketch.pos[...] = state['pos']
+        return sketch
+
+
+def ModelName(vehicle):
+    """Engine model of vehicle (vehicle name without leading model year,
+    e.g. '1999Camry' --> 'Camry')
+    """
+    if vehicle is None:
+        return None
+    return re.sub(r'^(19|20)\d\d', '', vehicle) or vehicle
+
+
+def BuildUp(data, ngrid=NGRID, ref=0):
+    """Normalized dry pressure of each cylinder on common grid of ngrid
+    points from first to last recorded stroke, linearly interpolated.
+    Missing strokes are filled with last recorded value.
+    data --> pressure array [..., test type, cylinder, stroke]
+    Returns:
+    array of shape [..., cylinder, ngrid]
+    """
+    raw = np.asarray(data, dtype=float)[..., ref, :, :]
+    dry = FillLast(raw)
+    valid = ~np.isnan(raw)
+    nstroke = raw.shape[-1]
+    nrec = np.where(valid.any(axis=-1),
+                    nstroke - np.argmax(valid[..., ::-1], axis=-1), 1)
+    #Fractional stroke index of each grid point of each history
+    x = (nrec[..., None] - 1) * np.linspace(0, 1, ngrid)
+    lo = np.floor(x).astype(int)
+    hi = np.minimum(lo + 1, nstroke - 1)
+    vlo = np.take_along_axis(dry, lo, axis=-1)
+    vhi = np.take_along_axis(dry, hi, axis=-1)
+    grid = vlo + (x - lo) * (vhi - vlo)
+    with np.errstate(invalid='ignore'):
+        return grid / np.fmax.reduce(dry, axis=-1)[..., None]
+
+
+def TestFields(data, tests=['dry', 'wet']):
+    """Baseline quantities of tests.
+    data  --> pressure array [test, test type, cylinder, stroke]
+    tests --> test types in order of the test type axis
+    Returns:
+    dictionary of arrays: 'drymax' and 'delta' [test, cylinder],
+                            'buildup' [test, cylinder, ngrid]
+    """
+    dry = tests.index('dry')
+    maxs = np.fmax.reduce(data, axis=-1)
+    if 'wet' in tests:
+        delta = maxs[:, tests.index('wet')] - maxs[:, dry]
+    else:
+        delta = np.full(maxs[:, dry].shape, np.nan)
+    return {'drymax' : maxs[:, dry], 'delta' : delta,
+            'buildup' : BuildUp(data, ref=dry)}
+
+
+class FleetBaseline(object):
+    """Baseline distributions of each engine model (see module docstring)"""
+
+    def __init__(self, ngrid=NGRID, alpha=0.01):
+        self.ngrid = ngrid
+        self.alpha = alpha
+        self.models = {} #sketches of each field keyed by model
+        #Content hashes of most recently added data files, oldest first
+        #(dictionary used as ordered set)
+        self.added = {}
+
+    def Sketches(self, model):
+        """Sketches of model, made if model is new"""
+        if model not in self.models:
+            self.models[model] = {
+                'drymax' : QuantileSketch((), self.alpha),
+                'delta' : QuantileSketch((), self.alpha),
+                'buildup' : QuantileSketch((self.ngrid,), self.alpha,
+                                            vmin=1e-4, vmax=10),
+                }
+        return self.models[model]
+
+    def Update(self, models, data, tests=['dry', 'wet']):
+        """Add tests to baselines of their engine models.
+        models --> engine model of each test
+        data   --> pressure array [test, test type, cylinder, stroke]
+        """
+        fields = TestFields(data, tests)
+        models = np.asarray(models)
+        for model in np.unique(models):
+            sel = models == model
+            sketches = self.Sketches(str(model))
+            sketches['drymax'].Add(fields['drymax'][sel].ravel())
+            sketches['delta'].Add(fields['delta'][sel].ravel())
+            sketches['buildup'].Add(
+                    fields['buildup'][sel].reshape(-1, self.ngrid))
+
+    def Added(self, key):
+        """True if data file with content hash key was added recently"""
+        return key in self.added
+
+    def MarkAdded(self, key, maxadded=MAXADDED):
+        """Record content hash of added data file, forgetting the oldest
+        hashes past maxadded so memory stays bounded
+        """
+        self.added.pop(key, None)
+        self.added[key] = None
+        while len(self.added) > maxadded:
+            del self.added[next(iter(self.added))]
+
+    def Merge(self, other):
+        """Add baselines of another FleetBaseline (built from other files)"""
+        for model, sketches in other.models.items():
+            mine = self.Sketches(model)
+            for field in FIELDS:
+                mine[field].Merge(sketches[field])
+        for key in other.added:
+            self.MarkAdded(key)
+        return self
+
+    def Count(self, model):
+        """Number of cylinder results in baseline of model"""
+        if model not in self.models:
+            return 0
+        return int(self.models[model]['drymax'].count)
+
+    def Check(self, model, data, tests=['dry', 'wet'], thresh=15, low=5,
+                high=95):
+        """Compare a test with the baseline of its engine model.
+        model  --> engine model of test
+        data   --> pressure array [test type, cylinder, stroke]
+        thresh --> percentage threshold of poor cylinder performance vs
+                    best cylinder (same as main)
+        low    --> percentile below which drymax and build-up are low
+        high   --> percentile above which wet - dry delta is high (oil
+                    sealing rings raises pressure of worn cylinders)
+        Returns:
+        dataframe of cylinder results, fleet percentiles and flags
+        """
+        result = CalcMaxima(data, thresh, ref=tests.index('dry'))
+        fields = TestFields(data[None], tests)
+        table = pd.DataFrame({'cyl' : np.arange(1, data.shape[-2]+1, 1),
+                                'drymax' : fields['drymax'][0],
+                                'delta' : fields['delta'][0],
+                                'percdiff' : result['percdiff'],
+                                'fail' : result['fail']})
+        if model not in self.models:
+            for field in FIELDS:
+                table['{}_pct'.format(field)] = np.nan
+            table['fleetlow'] = False
+            return table
+        sketches = self.models[model]
+        table['drymax_pct'] = sketches['drymax'].Percentile(
+                                                    fields['drymax'][0])
+        table['delta_pct'] = sketches['delta'].Percentile(fields['delta'][0])
+        #Build-up percentile of each stroke, median over stroke grid
+        table['buildup_pct'] = np.nanmedian(
+            sketches['buildup'].Percentile(fields['buildup'][0]), axis=-1)
+        table['fleetlow'] = ((table['drymax_pct'] < low)
+                                | (table['buildup_pct'] < low)
+                                | (table['delta_pct'] > high))
+        return table
+
+    def Summary(self, q=[0.05, 0.5, 0.95]):
+        """Quantiles of drymax and delta of each model"""
+        rows = []
+        for model, sketches in self.models.items():
+            row = {'model' : model, 'n' : self.Count(model)}
+            for field in ['drymax', 'delta']:
+                for qi, v in zip(q, sketches[field].Quantile(q)):
+                    row['{}_p{:g}'.format(field, qi*100)] = v
+            rows.append(row)
+        return pd.DataFrame(rows)
+
+    def Save(self, path=BASELINE):
+        """Save baselines to .npz file"""
+        arrays = {'ngrid' : np.array(self.ngrid),
+                    'alpha' : np.array(self.alpha),
+                    'added' : np.array(list(self.added), dtype=str)}
+        for model, sketches in self.models.items():
+            for field in FIELDS:
+                for key, arr in sketches[field].State().items():
+                    arrays['{}/{}/{}'.format(model, field, key)] = arr
+        parent = os.path.dirname(path)
+        if parent != '':
+            os.makedirs(parent, exist_ok=True)
+        tmp = '{}.{}.tmp.npz'.format(path, os.getpid())
+        np.savez_compressed(tmp, **arrays)
+        os.replace(tmp, path)
+
+    @classmethod
+    def Load(cls, path=BASELINE):
+        """Load baselines from .npz file (empty baseline if missing)"""
+        if not os.path.isfile(path):
+            return cls()
+        with np.load(path) as f:
+            baseline = cls(int(f['ngrid']), float(f['alpha']))
+            if 'added' in f.files:
+                baseline.added = dict.fromkeys(f['added'].tolist())
+            states = {}
+            for name in f.files:
+                if '/' in name:
+                    model, field, key = name.rsplit('/', 2)
+                    states.setdefault((model, field), {})[key] = f[name]
+        for (model, field), state in states.items():
+            baseline.models.setdefault(model, {})[field] = \
+                                    QuantileSketch.FromState(state)
+        return baseline
+
+
+def TestModels(paths, model=None):
+    """Engine model of each data file (from vehicle in file name, see
+    compStore.ParseTestName), or model for every file if given
+    """
+    from compStore import ParseTestName
+    if model is not None:
+        return [model] * len(paths)
+    return [ModelName(ParseTestName(path)['vehicle']) for path in paths]
+
+
+def UpdateFromFiles(baseline, paths, ncyl=4, tests=['dry', 'wet'],
+                    model=None, chunk=10000):
+    """Add many data files to baseline, a chunk of files at a time.
+    Files already added (same content hash, e.g. on an earlier update run)
+    are skipped, so updating with the same files again changes nothing.
+    paths --> data file paths
+    ncyl  --> number of cylinders in engine
+    model --> engine model of every file (None to get from file names)
+    chunk --> number of files parsed into memory at a time
+    """
+    from compParse import ParseCompTexts, FleetArray
+    from compCache import ContentHash
+    models = TestModels(paths, model)
+    ncol = 1 + len(tests) * ncyl
+    for start in range(0, len(paths), chunk):
+        #Read each file once, to hash and parse it
+        texts = []
+        new = []
+        for k in range(start, min(start + chunk, len(paths))):
+            with open(paths[k], 'rb') as f:
+                text = f.read()
+            key = ContentHash(text)
+            if not baseline.Added(key):
+                baseline.MarkAdded(key)
+                texts.append(text)
+                new.append(models[k])
+        if texts:
+            buf, _ = ParseCompTexts(texts, len(texts), ncol)
+            baseline.Update(new, FleetArray(buf, ncyl, len(tests)), tests)
+    return baseline
+
+
+def ParseArgs(args=None):
+    """Parse command line arguments for fleet baselines"""
+    parser = argparse.ArgumentParser(
+                description='Fleet baselines of compression test results')
+    parser.add_argument('action', choices=['update', 'check', 'summary'],
+                help='add tests to baselines, check tests against them, '
+                        'or print baseline quantiles')
+    parser.add_argument('source', nargs='?', default='Data',
+                help='directory or glob of CompTest_*.dat files')
+    parser.add_argument('-b', '--baseline', default=BASELINE,
+                help='baseline file')
+    parser.add_argument('--model', default=None,
+                help='engine model of all tests (default: from file names)')
+    parser.add_argument('--ncyl', type=int, default=4,
+                help='number of cylinders in engine')
+    parser.add_argument('--thresh', type=float, default=15,
+                help='percentage threshold for poor cylinder performance')
+    parser.add_argument('--low', type=float, default=5,
+                help='fleet percentile below which a cylinder is low')
+    parser.add_argument('--high', type=float, default=95,
+                help='fleet percentile above which wet-dry delta is high')
+    return parser.parse_args(args)
+
+
+if __name__ == "__main__":
+
+    args = ParseArgs()
+    baseline = FleetBaseline.Load(args.baseline)
+
+    if args.action == 'summary':
+        print(baseline.Summary())
+    else:
+        from compBatch import FindTestFiles
+        files = FindTestFiles(args.source)
+        paths = list(files.values())
+        if args.action == 'update':
+            nbefore = len(baseline.added)
+            UpdateFromFiles(baseline, paths, args.ncyl, model=args.model)
+            baseline.Save(args.baseline)
+            nadd = len(baseline.added) - nbefore
+            print('Added {} of {} files ({} added before)'.format(nadd,
+                    len(paths), len(paths) - nadd))
+            print(baseline.Summary())
+        else:
+            from compTest import CompressionTest
+            for (name, path), model in zip(files.items(),
+                                            TestModels(paths, args.model)):
+                test = CompressionTest.FromFile(path, args.ncyl)
+                table = baseline.Check(model, test.pres, thresh=args.thresh,
+                                        low=args.low, high=args.high)
+                print('\n**********************************')
+                print('Compression Test {} vs {} fleet ({} cylinders):'.format(
+                            name, model, baseline.Count(model)))
+                print(table)
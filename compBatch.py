@@ -0,0 +1,398 @@
+"""COMPRESSION TEST BATCH RUNNER
+Logan Halstrom
+CREATED: 17 OCT 2026
+
+DESCRIPTION:  Run compression test analysis and plotting (plotCompression.main)
+for a whole fleet of data files on a process pool.  Maxima and pass/fail
+results of every test are merged into a single table keyed by test.
+
+USAGE:
+python compBatch.py Data -j 8 --ylim 50 275
+python compBatch.py 'Data/CompTest_2017-*.dat' -o Results/maxima.csv
+python compBatch.py Data --noplot   (pass/fail analysis only, no plots)
+python compBatch.py Data --store Results/results.db   (keep results history)
+python compBatch.py Data --noplot --uncertainty   (percdiff confidence intervals)
+python compBatch.py Data --formats png pdf --dpi 100 300   (report figures)
+"""
+
+import os
+import glob
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+
+def TestName(path):
+    """Get test name from data file path
+    (e.g. 'Data/CompTest_2017-02-11_1st_1999Camry.dat' -->
+    '2017-02-11_1st_1999Camry')
+    """
+    name = os.path.splitext(os.path.basename(path))[0]
+    if name.startswith('CompTest_'):
+        name = name[len('CompTest_'):]
+    return name
+
+
+def FindTestFiles(source, pattern='CompTest_*.dat'):
+    """Find compression test data files to run.
+    source  --> directory, glob pattern, list of paths, or dictionary of
+                    paths keyed by test name
+    pattern --> file pattern to match if source is a directory
+    Returns:
+    dictionary of data file paths keyed by test name
+    """
+    if isinstance(source, dict):
+        return dict(source)
+    if isinstance(source, str):
+        if os.path.isdir(source):
+            source = os.path.join(source, pattern)
+        paths = sorted(glob.glob(source))
+    else:
+        paths = list(source)
+    return {TestName(path) : path for path in paths}
+
+
+def _InitWorker(plot=True, instrument=None, memory=False, export=None):
+    """Use non-interactive backend in worker processes.
+    Nothing to do (matplotlib never imported) for analysis only.
+    Record stages of main to instrument file if given.
+    Save plots in export (formats, dpis) if given (see
+    plotCompression.SetExport).
+    """
+    if instrument is not None:
+        import compInstrument
+        compInstrument.RegisterCallback(
+                compInstrument.JsonLinesCallback(instrument), memory)
+    if plot:
+        import matplotlib.pyplot as plt
+        plt.switch_backend('Agg')
+        #(also reset, batches run in current process share its settings)
+        from plotCompression import SetExport
+        SetExport(*(export or (None, None)))
+
+
+_templates = None #plot templates reused by all tests run in this process
+
+
+def _RunOne(job):
+    """Run analysis and plotting for a single test in a worker process.
+    job --> (test name, data file path, keyword arguments for main,
+                return dataframe, reuse plot templates, return pressure
+                array of data file)
+    Returns:
+    test name, dataframe (None if not kept), maxima, unfilled pressure
+    array [test type, cylinder, stroke] (None if not kept), error message
+    (None if test ran, otherwise everything else is None)
+    """
+    global _templates
+    from plotCompression import main
+    name, path, kwargs, keepdata, reuse, keeparray = job
+    try:
+        if reuse and kwargs['plot'] and _templates is None:
+            from compRender import PlotTemplates
+            _templates = PlotTemplates(fixed=(reuse == 'fixed'))
+        df, maxima = main(path, name,
+                            templates=_templates if reuse else None, **kwargs)
+        data = None
+        if keeparray:
+            #Unfilled pressure histories (main fills tails)
+            from plotCompression import ReadCompTestData
+            from compAnalysis import TestArray
+            ncyl, tests = kwargs['ncyl'], kwargs['tests']
+            data = TestArray(ReadCompTestData(path, kwargs['cache'], ncyl,
+                                                tests), tests, ncyl)
+    except Exception as e:
+        #Report failed test instead of aborting whole batch
+        return name, None, None, None, '{}: {}'.format(type(e).__name__, e)
+    if not keepdata:
+        df = None
+    return name, df, maxima, data, None
+
+
+def MergeMaxima(maxima, thresh=15):
+    """Merge maxima tables of many tests into one pass/fail table.
+    maxima --> dictionary of maxima dataframes keyed by test name
+    thresh --> percentage threshold for poor cylinder performance
+    Returns:
+    dataframe indexed by (test, cyl) with 'fail' column for each cylinder
+    """
+    if not maxima:
+        return pd.DataFrame(columns=['fail'], index=pd.MultiIndex.from_tuples(
+                                            [], names=['test', 'cyl']))
+    table = pd.concat(maxima, names=['test', None])
+    table = table.reset_index(level=1, drop=True)
+    table = table.set_index('cyl', append=True)
+    table['fail'] = table['percdiff'] < -thresh
+    return table
+
+
+def RunBatch(source, ylim=None, thresh=15, tests=['dry', 'wet'], ncyl=4,
+                workers=None, keepdata=False, cache=None, plot=True,
+                reuse=False, concurrent=False, manifest=None,
+                instrument=None, memory=False, store=None, overview=None,
+                uncertainty=None, exclude=False, export=None):
+    """Run main for every compression test in source on a process pool.
+    source   --> directory, glob pattern, list of paths, or dictionary of
+                    paths keyed by test name (see FindTestFiles)
+    ylim     --> y-axis plotting range (e.g. [ymin, ymax] or None)
+    thresh   --> percentage threshold for poor cylinder performance
+    tests    --> types of tests performed ('dry' only or both 'dry' and 'wet')
+    ncyl     --> number of cylinders in engine
+    workers  --> number of worker processes (None for all cores,
+                    1 to run in current process)
+    keepdata --> return processed dataframe of each test as well
+    cache    --> directory of parsed data cache (None to always parse files)
+    plot     --> make plots (False for analysis only)
+    reuse    --> reuse plot figures in each worker, only updating their data
+                    (see compRender.PlotTemplates), 'fixed' to also reuse
+                    the layout of the first test to save figures faster
+    concurrent --> render the plots of each test at the same time
+                    (see compRender.RenderTest)
+    manifest --> path of output manifest for incremental build, tests with
+                    unchanged inputs are skipped (None to run every test)
+    instrument --> JSON lines file to record time of each stage of main in
+                    (see compInstrument, None for no instrumentation)
+    memory   --> also record peak memory of each stage
+    store    --> results database to add each test to (see compStore,
+                    None for no database)
+    overview --> fleet overview plots of all tests to render after batch
+                    (e.g. ['presshist', 'percdiff'], see
+                    compRender.FleetOverview, None for no overview)
+    uncertainty --> number of Monte Carlo draws of reading error of each
+                    test, adds percent difference interval and probability
+                    of failure to table (see compUncertainty, None for none)
+    exclude  --> remove readings flagged by data quality checks before
+                    maxima analysis (see compQuality)
+    export   --> (formats, dpis) to save every plot in from one render
+                    (see plotCompression.SetExport, None for PNG only)
+    Returns:
+    merged maxima/pass-fail table (see MergeMaxima) of tests that were run,
+                    with error messages of tests that could not be run
+                    keyed by test name in table.attrs['errors'],
+    dictionary of processed dataframes keyed by test (empty if not keepdata,
+                    only tests that were run for incremental build)
+    """
+    files = FindTestFiles(source)
+    kwargs = {'ylim' : ylim, 'thresh' : thresh, 'tests' : tests,
+                'ncyl' : ncyl, 'cache' : cache, 'plot' : plot,
+                'concurrent' : concurrent, 'exclude' : exclude,
+                'verbose' : False} #merged table is printed instead
+
+    maxima = {}
+    if manifest is not None:
+        #INCREMENTAL BUILD: SKIP TESTS WHOSE INPUTS HAVE NOT CHANGED
+        import compManifest
+        from plotCompression import PALETTE
+        entries = compManifest.LoadManifest(manifest)
+        inputs = compManifest.TestInputs(kwargs, PALETTE, reuse, export)
+        datahash = {}
+        for name, path in files.items():
+            entry = entries.get(str(name))
+            datahash[name] = compManifest.DataHash(path, entry)
+            if compManifest.UpToDate(entry, datahash[name], inputs):
+                maxima[name] = compManifest.EntryMaxima(entry)
+
+    #Pressure arrays are returned by workers if they are used after batch
+    keeparray = store is not None or bool(overview) or bool(uncertainty)
+    jobs = [(name, path, kwargs, keepdata, reuse, keeparray)
+                for name, path in files.items() if name not in maxima]
+
+    if workers == 1:
+        _InitWorker(plot, export=export)
+        if instrument is not None:
+            import compInstrument
+            callback = compInstrument.RegisterCallback(
+                    compInstrument.JsonLinesCallback(instrument), memory)
+        results = map(_RunOne, jobs)
+    else:
+        nproc = workers or os.cpu_count() or 1
+        #Send several tests to each worker at a time for large fleets
+        chunksize = max(1, len(jobs) // (4 * nproc))
+        pool = ProcessPoolExecutor(max_workers=nproc, initializer=_InitWorker,
+                                    initargs=(plot, instrument, memory,
+                                                export))
+        results = pool.map(_RunOne, jobs, chunksize=chunksize)
+
+    if store is not None:
+        import compStore
+        from plotCompression import ReadCompTestData
+        from compAnalysis import TestArray
+        conn = compStore.OpenStore(store)
+        #Add tests skipped by incremental build if not stored yet
+        for name in list(maxima):
+            if not compStore.HasTest(conn, name):
+                compStore.StoreTest(conn, name, files[name],
+                    TestArray(ReadCompTestData(files[name], cache, ncyl,
+                                                tests), tests, ncyl),
+                    maxima[name], thresh, tests)
+
+    dfs = {}
+    arrays = {} #unfilled pressure arrays of tests run, if kept
+    errors = {}
+    try:
+        for name, df, maxs, data, error in results:
+            if error is not None:
+                errors[name] = error
+                continue
+            maxima[name] = maxs
+            if keepdata:
+                dfs[name] = df
+            if keeparray:
+                arrays[name] = data
+            if manifest is not None:
+                from plotCompression import OutputNames
+                outputs = OutputNames(name) if plot else []
+                entries[str(name)] = compManifest.MakeEntry(datahash[name],
+                                                inputs, outputs, maxs)
+            if store is not None:
+                #Unfilled pressure histories read by worker
+                compStore.StoreTest(conn, name, files[name], data, maxs,
+                                    thresh, tests)
+    finally:
+        if workers != 1:
+            pool.shutdown()
+        elif instrument is not None:
+            compInstrument.UnregisterCallback(callback)
+        if manifest is not None:
+            #Save progress even if batch was interrupted
+            compManifest.SaveManifest(entries, manifest)
+        if store is not None:
+            #Single transaction for whole batch
+            conn.commit()
+            conn.close()
+
+    if manifest is not None:
+        print('\nINCREMENTAL BUILD: {} up to date (hit), {} run (miss)'.format(
+                len(files) - len(jobs), len(jobs)))
+
+    if errors:
+        print('\nFAILED TO RUN {} TESTS:'.format(len(errors)))
+        for name, error in errors.items():
+            print('    {}: {}'.format(name, error))
+
+    if overview or uncertainty:
+        from compTest import CompressionTest, LoadTests
+        #Arrays of tests run by workers, only tests skipped by incremental
+        #build are read here
+        skipped = LoadTests({name : files[name] for name in maxima
+                                if name not in arrays}, ncyl, tests, cache)
+        fleet = {name : skipped[name] if name in skipped
+                    else CompressionTest(arrays[name], tests=tests, name=name)
+                    for name in files if name in maxima}
+
+    if overview:
+        #ALL TESTS ON A FEW SMALL-MULTIPLE PAGES
+        from compRender import FleetOverview
+        _InitWorker(True, export=export)
+        if workers == 1:
+            FleetOverview(fleet, overview, ylim, thresh, tests, ncyl)
+        else:
+            #Render pages in parallel
+            with ProcessPoolExecutor(max_workers=workers or os.cpu_count(),
+                    initializer=_InitWorker,
+                    initargs=(True, None, False, export)) as pool:
+                FleetOverview(fleet, overview, ylim, thresh, tests, ncyl,
+                                pool=pool)
+
+    #Keep order of source files
+    maxima = {name : maxima[name] for name in files if name in maxima}
+    table = MergeMaxima(maxima, thresh)
+    if uncertainty:
+        #PERCENT DIFFERENCE UNCERTAINTY OF WHOLE FLEET AT ONCE
+        from compUncertainty import UncertaintyTable
+        table = table.join(UncertaintyTable(fleet, thresh, tests, ncyl,
+                                            ndraw=uncertainty))
+    #Kept apart from maxima, so pass/fail counts are only of tests run
+    table.attrs['errors'] = errors
+    return table, dfs
+
+
+def ParseArgs(args=None):
+    """Parse command line arguments for batch run"""
+    parser = argparse.ArgumentParser(
+                description='Run compression test analysis for many tests')
+    parser.add_argument('source', nargs='?', default='Data',
+                help='directory or glob of CompTest_*.dat files')
+    parser.add_argument('-j', '--workers', type=int, default=None,
+                help='number of worker processes (default: all cores)')
+    parser.add_argument('--ylim', type=float, nargs=2, default=None,
+                help='y-axis plotting range')
+    parser.add_argument('--thresh', type=float, default=15,
+                help='percentage threshold for poor cylinder performance')
+    parser.add_argument('--tests', nargs='+', default=['dry', 'wet'],
+                help='types of tests performed')
+    parser.add_argument('--ncyl', type=int, default=4,
+                help='number of cylinders in engine')
+    parser.add_argument('--cache', default=None,
+                help='directory of parsed data cache (e.g. .compcache)')
+    parser.add_argument('--noplot', action='store_true',
+                help='analysis only, do not import matplotlib or make plots')
+    parser.add_argument('--reuse', action='store_true',
+                help='reuse plot figures, only updating their data')
+    parser.add_argument('--fixedlayout', action='store_true',
+                help='with --reuse, save with layout of first plot (faster)')
+    parser.add_argument('--concurrent', action='store_true',
+                help='render the plots of each test at the same time')
+    parser.add_argument('--formats', nargs='+', default=None,
+                help='save plots in these formats from one render '
+                '(e.g. png pdf svg; default: png)')
+    parser.add_argument('--dpi', type=float, nargs='+', default=None,
+                help='PNG resolutions of plots (several are saved as '
+                '<name>_<dpi>dpi.png)')
+    parser.add_argument('-i', '--incremental', nargs='?', default=None,
+                const='Results/manifest.json', metavar='MANIFEST',
+                help='skip tests whose inputs are unchanged since last run')
+    parser.add_argument('--instrument', default=None, metavar='JSONL',
+                help='record time of each stage of each test to this file')
+    parser.add_argument('--memory', action='store_true',
+                help='also record peak memory of each stage (slower)')
+    parser.add_argument('--store', default=None, metavar='DB',
+                help='add results of each test to this database')
+    parser.add_argument('--overview', nargs='*', default=None,
+                metavar='KIND', help='also render fleet overview pages '
+                '(presshist, delta, percdiff, overlay; default: all but overlay)')
+    parser.add_argument('--uncertainty', type=int, nargs='?', default=None,
+                const=10000, metavar='NDRAW', help='Monte Carlo percdiff '
+                'interval and probability of failure (default: 10000 draws)')
+    parser.add_argument('--exclude', action='store_true',
+                help='remove readings flagged by data quality checks '
+                '(see compQuality) before maxima analysis')
+    parser.add_argument('-o', '--output', default=None,
+                help='save merged maxima table to this csv file')
+    return parser.parse_args(args)
+
+
+if __name__ == "__main__":
+
+    args = ParseArgs()
+    if args.overview == []:
+        from compRender import OVERVIEWS
+        args.overview = OVERVIEWS
+    table, _ = RunBatch(args.source, args.ylim, args.thresh, args.tests,
+                        args.ncyl, args.workers, cache=args.cache,
+                        plot=not args.noplot,
+                        reuse='fixed' if args.fixedlayout else args.reuse,
+                        concurrent=args.concurrent,
+                        manifest=args.incremental,
+                        instrument=args.instrument, memory=args.memory,
+                        store=args.store, overview=args.overview,
+                        uncertainty=args.uncertainty, exclude=args.exclude,
+                        export=None if args.formats is None and args.dpi is None
+                                else (args.formats, args.dpi))
+
+    print('\n**********************************')
+    print('Batch of {} tests, failing cylinders:'.format(
+                    len(table.index.get_level_values('test').unique())))
+    if args.uncertainty:
+        print(table[table['fail']][['percdiff', 'percdiff_lo', 'percdiff_hi',
+                                    'pfail']])
+        #Verdict could change within reading error
+        marginal = table[(table['pfail'] > 0.05) & (table['pfail'] < 0.95)]
+        if not marginal.empty:
+            print('\nUncertain verdict (5-95% probability of failure):')
+            print(marginal[['percdiff', 'pfail']])
+    else:
+        print(table[table['fail']][['percdiff']])
+    if args.output is not None:
+        table.to_csv(args.output)
@@ -0,0 +1,209 @@
+"""COMPRESSION TEST PARSED DATA CACHE
+Logan Halstrom
+CREATED: 17 OCT 2026
+
+DESCRIPTION:  Cache of parsed compression test data so unchanged data files
+are never re-parsed.  Each parsed test is stored as a single entry file: a
+one-line JSON header, then the raw float64 data in columnar layout (one
+contiguous row per data column).  A hit is one read of the entry (large
+entries are memory-mapped instead), with no .npy header parsing.
+
+Entries are keyed by absolute data file path, requested number of columns
+and column layout (e.g. test types in column order), so loads that parse a
+file differently never share an entry.  An entry is valid if the data file
+modification time and size match, or if its content hash still matches
+(e.g. file was touched but not changed).  Otherwise it is re-parsed and
+overwritten.  Least recently used entries are evicted when the cache grows
+past its size limit.
+
+Whether a hit beats parsing depends on the parser (benchmarks/benchCache.py):
+a hit takes ~0.015 ms, about the same as parsing a typical 32 stroke .dat
+file (0.012-0.024 ms), so caching those does not pay off, while a 20000
+stroke data file (~21 ms to parse, ~800x) and Excel workbooks (compExcel,
+~6 ms with openpyxl, ~300x) load far faster from cache.  So there is no
+default cache directory, and data is only cached where a cache directory is
+given (e.g. --cache).
+"""
+
+import os
+import json
+import hashlib
+
+import numpy as np
+
+from compParse import ParseCompText
+
+MAXBYTES = 256 * 1024 * 1024   #default cache size limit [bytes]
+EVICTEVERY = 64                #check cache size every this many writes
+MMAPBYTES = 1024 * 1024        #entries larger than this are memory-mapped
+SUFFIX = '.entry'              #file extension of cache entries
+
+_nwrite = 0 #number of cache writes by this process
+
+
+def CacheKey(filename, ncol=None, layout=None):
+    """Cache entry name for data file parsed into ncol columns with column
+    layout (hash of absolute path, ncol and layout)
+    """
+    path = os.path.abspath(filename)
+    key = json.dumps([path, ncol, layout])
+    return hashlib.sha1(key.encode()).hexdigest()
+
+
+def ContentHash(text):
+    """Hash of data file contents"""
+    return hashlib.sha1(text).hexdigest()
+
+
+def _EntryPath(filename, cachedir, ncol=None, layout=None):
+    """Path of cache entry of data file"""
+    return os.path.join(cachedir, CacheKey(filename, ncol, layout) + SUFFIX)
+
+
+def _ReadEntry(entrypath):
+    """Read cache entry.
+    Returns:
+    header dictionary, columnar data array [column, stroke] (read-only),
+    None, None if missing or corrupt
+    """
+    try:
+        size = os.stat(entrypath).st_size
+        with open(entrypath, 'rb') as f:
+            if size <= MMAPBYTES:
+                raw = f.read()
+                end = raw.index(b'\n') + 1
+                meta = json.loads(raw[:end])
+                data = np.frombuffer(raw, dtype=np.float64, offset=end)
+            else:
+                line = f.readline()
+                end = len(line)
+                meta = json.loads(line)
+                data = np.memmap(entrypath, dtype=np.float64, mode='r',
+                                    offset=end)
+        return meta, data.reshape(meta['ncol'], -1)
+    except (OSError, ValueError, KeyError):
+        return None, None
+
+
+def _WriteAtomic(path, write):
+    """Write file through temporary file so concurrent readers never see
+    partial entries.
+    write --> function that writes to given open binary file
+    """
+    tmp = '{}.{}.tmp'.format(path, os.getpid())
+    with open(tmp, 'wb') as f:
+        write(f)
+    os.replace(tmp, path)
+
+
+def _WriteEntry(entrypath, meta, columns):
+    """Write cache entry of header and columnar data [column, stroke]"""
+    header = json.dumps(meta).encode() + b'\n'
+    def Write(f):
+        f.write(header)
+        f.write(np.ascontiguousarray(columns, dtype=np.float64).tobytes())
+    _WriteAtomic(entrypath, Write)
+
+
+def LoadCached(filename, ncol, cachedir, maxbytes=MAXBYTES,
+                parse=ParseCompText, layout=None):
+    """Load parsed compression test data, from cache if it is up to date.
+    filename --> path to data file to read
+    ncol     --> number of columns (stroke + dry and wet for each cylinder),
+                    None for any number of columns
+    cachedir --> cache directory
+    maxbytes --> cache size limit [bytes]
+    parse    --> parser of data file contents (bytes) to [stroke, column]
+    layout   --> column layout of parser output (e.g. test types in column
+                    order), part of cache key
+    Returns:
+    read-only array of shape [stroke, column]
+    """
+    entrypath = _EntryPath(filename, cachedir, ncol, layout)
+    stat = os.stat(filename)
+    meta, columns = _ReadEntry(entrypath)
+
+    text = None
+    if meta is not None:
+        hit = (meta['mtime'] == stat.st_mtime_ns
+                and meta['size'] == stat.st_size)
+        if not hit and meta['size'] == stat.st_size:
+            #Modified time changed, check if content did too
+            with open(filename, 'rb') as f:
+                text = f.read()
+            hit = ContentHash(text) == meta['hash']
+            if hit:
+                meta['mtime'] = stat.st_mtime_ns
+                _WriteEntry(entrypath, meta, columns)
+        if hit:
+            #Mark as recently used
+            os.utime(entrypath)
+            return columns.T
+
+    #CACHE MISS: PARSE AND STORE
+    if text is None:
+        with open(filename, 'rb') as f:
+            text = f.read()
+    data = parse(text, ncol)
+    StoreCached(filename, data, text, stat, cachedir, maxbytes, layout, ncol)
+    return data
+
+
+def StoreCached(filename, data, text, stat, cachedir, maxbytes=MAXBYTES,
+                    layout=None, ncol=None):
+    """Store parsed data of file in cache, evict old entries if needed.
+    filename --> path to data file
+    data     --> parsed data array of shape [stroke, column]
+    text     --> contents of data file (bytes)
+    stat     --> os.stat result of data file when text was read
+    layout   --> column layout of data (see LoadCached)
+    ncol     --> number of columns requested when parsing (see LoadCached)
+    """
+    global _nwrite
+    os.makedirs(cachedir, exist_ok=True)
+    meta = {'path' : os.path.abspath(filename), 'mtime' : stat.st_mtime_ns,
+            'size' : stat.st_size, 'hash' : ContentHash(text),
+            'ncol' : data.shape[1], 'layout' : layout}
+    #Columnar layout: each data column is contiguous on disk
+    _WriteEntry(_EntryPath(filename, cachedir, ncol, layout), meta, data.T)
+
+    if _nwrite % EVICTEVERY == 0:
+        EvictCache(cachedir, maxbytes)
+    _nwrite += 1
+
+
+def EvictCache(cachedir, maxbytes=MAXBYTES):
+    """Delete least recently used cache entries until cache fits in limit.
+    Returns:
+    number of entries evicted
+    """
+    if not os.path.isdir(cachedir):
+        return 0
+    entries = []
+    total = 0
+    for entry in os.scandir(cachedir):
+        if not entry.name.endswith(SUFFIX):
+            continue
+        try:
+            stat = entry.stat()
+        except OSError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, entry.path))
+        total += stat.st_size
+
+    nevict = 0
+    for _, size, path in sorted(entries):
+        if total <= maxbytes:
+            break
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        total -= size
+        nevict += 1
+    return nevict
+
+
+def ClearCache(cachedir):
+    """Delete all cache entries"""
+    return EvictCache(cachedir, maxbytes=-1)
@@ -0,0 +1,277 @@
+"""COMPRESSION TEST EXCEL WORKBOOK INGESTION
+Logan Halstrom
+CREATED: 17 OCT 2026
+
+DESCRIPTION:  Read compression tests straight from Excel workbooks (e.g.
+Data/CompressionTest_1999Camry(Mk3).xlsx) instead of pasting columns into
+.dat files by hand.  Each sheet with a 'Stroke' header row is one test:
+    row above header --> test blocks ('Dry Test', 'Wet Test', 'Extras')
+    header row       --> 'Stroke', then 'Cylinder #N' columns of each block
+    rows below       --> stroke number, then pressures (blank cells are NaN)
+Data ends at the first row without a stroke number (e.g. '"Visual" Maximum'
+or notes rows).  Only the first column of each cylinder in each dry/wet
+block is used (repeat runs like 'Cylinder #2 1st' and 'Extras' are ignored).
+
+Workbooks are read with openpyxl in read-only mode, which streams rows from
+the file instead of loading the whole workbook.  All sheets of a workbook
+are parsed into one array that goes through the parsed data cache
+(compCache), so a workbook is only read again when it changes.
+
+USAGE:
+python compExcel.py 'Data/CompressionTest_1999Camry(Mk3).xlsx'
+python compExcel.py Data/*.xlsx --write Data   (write CompTest_<name>.dat)
+"""
+
+import io
+import os
+import re
+import argparse
+from functools import partial
+
+import numpy as np
+
+NAN = float('nan')
+CYLPATTERN = re.compile(r'#\s*(\d+)') #cylinder number in column header
+
+
+def _Number(val):
+    """Cell value as float (NaN if blank or text)"""
+    if isinstance(val, (int, float)) and not isinstance(val, bool):
+        return float(val)
+    return NAN
+
+
+def SheetColumns(blockrow, header, tests=('dry', 'wet')):
+    """Map columns of sheet to test types and cylinders.
+    blockrow --> cell values of row naming test blocks (e.g. 'Dry Test')
+    header   --> cell values of header row ('Stroke', 'Cylinder #1', ...)
+    tests    --> test types to find
+    Returns:
+    dictionary of column index keyed by (test type index, cylinder number)
+    """
+    blockrow = list(blockrow or [])
+    #Start column and test type of each block
+    starts = []
+    for col, val in enumerate(blockrow):
+        if isinstance(val, str) and val.strip():
+            name = val.lower()
+            match = [i for i, test in enumerate(tests) if test in name]
+            starts.append((col, match[0] if match else None))
+    if not starts:
+        #No block names, only one test type
+        starts = [(0, 0)]
+
+    columns = {}
+    for k, (start, i) in enumerate(starts):
+        if i is None:
+            continue
+        stop = starts[k+1][0] if k+1 < len(starts) else len(header)
+        for col in range(max(start, 1), stop):
+            val = header[col]
+            match = CYLPATTERN.search(val) if isinstance(val, str) else None
+            if match is None:
+                continue
+            #First column of each cylinder (later ones are repeat runs)
+            columns.setdefault((i, int(match.group(1))), col)
+    return columns
+
+
+def ParseSheet(rows, tests=('dry', 'wet')):
+    """Parse test data of a single sheet.
+    rows  --> iterable of row cell values (e.g. ws.iter_rows(values_only=True))
+    tests --> test types in column order of output
+    Returns:
+    array of shape [stroke, column] (stroke, then cylinders of each test
+    type, missing cylinders are NaN), None if sheet has no test data
+    """
+    rows = iter(rows)
+    prev = None
+    header = None
+    for row in rows:
+        first = row[0] if row else None
+        if isinstance(first, str) and first.strip().lower() == 'stroke':
+            header = row
+            break
+        prev = row
+    if header is None:
+        return None
+    columns = SheetColumns(prev, header, tests)
+    if not columns:
+        return None
+    ncyl = max(cyl for _, cyl in columns)
+
+    #Column of sheet for each output column (-1 for missing cylinders)
+    src = [columns.get((i, cyl), -1) for i in range(len(tests))
+                for cyl in range(1, ncyl+1)]
+    data = []
+    for row in rows:
+        #Data ends at first row without stroke number
+        if not row or np.isnan(_Number(row[0])):
+            break
+        data.append([_Number(row[0])] + [_Number(row[c])
+                        if 0 <= c < len(row) else NAN for c in src])
+    data = np.array(data, dtype=float).reshape(-1, 1 + len(src))
+    #Drop trailing strokes with no pressures recorded
+    recorded = ~np.isnan(data[:, 1:]).all(axis=1)
+    nstroke = len(recorded) - np.argmax(recorded[::-1]) if recorded.any() else 0
+    return data[:nstroke]
+
+
+def ParseWorkbook(text, ncol=None, tests=('dry', 'wet')):
+    """Parse every test sheet of workbook into one array (stream rows in
+    read-only mode).
+    text  --> contents of workbook file (bytes)
+    ncol  --> number of columns of output (sheet, stroke + cylinders of
+                each test type), None for most cylinders of any sheet
+    tests --> test types in column order of output
+    Returns:
+    array of shape [row, column], first column is index of sheet in
+    workbook, then same columns as compParse.ParseCompTest
+    """
+    import openpyxl
+    wb = openpyxl.load_workbook(io.BytesIO(text), read_only=True,
+                                data_only=True)
+    try:
+        sheets = []
+        for k, ws in enumerate(wb.worksheets):
+            data = ParseSheet(ws.iter_rows(values_only=True), tests)
+            if data is not None and len(data):
+                sheets.append((k, data))
+    finally:
+        wb.close()
+
+    if ncol is None:
+        ncyl = max([(d.shape[1] - 1) // len(tests) for _, d in sheets] + [0])
+        ncol = 2 + len(tests) * ncyl
+    ncyl = (ncol - 2) // len(tests)
+    out = []
+    for k, data in sheets:
+        #Pad or cut cylinders of each test type to ncyl
+        nsheet = (data.shape[1] - 1) // len(tests)
+        block = np.full((len(data), ncol), np.nan)
+        block[:, 0] = k
+        block[:, 1] = data[:, 0]
+        for i in range(len(tests)):
+            n = min(ncyl, nsheet)
+            block[:, 2+i*ncyl:2+i*ncyl+n] = data[:, 1+i*nsheet:1+i*nsheet+n]
+        out.append(block)
+    if not out:
+        return np.empty((0, ncol))
+    return np.concatenate(out)
+
+
+def SheetNames(filename):
+    """Names of sheets of workbook (path or file object), in workbook order"""
+    import openpyxl
+    wb = openpyxl.load_workbook(filename, read_only=True)
+    try:
+        return wb.sheetnames
+    finally:
+        wb.close()
+
+
+def SheetTestName(filename, sheet):
+    """Test name of workbook sheet (e.g.
+    'Data/CompressionTest_1999Camry(Mk3).xlsx', '21117 (Test3)' -->
+    '1999Camry(Mk3)_21117(Test3)')
+    """
+    stem = os.path.splitext(os.path.basename(filename))[0]
+    for prefix in ['CompressionTest_', 'CompTest_']:
+        if stem.startswith(prefix):
+            stem = stem[len(prefix):]
+    sheet = re.sub(r'[^\w()\-]+', '', sheet)
+    return '{}_{}'.format(stem, sheet)
+
+
+def ReadWorkbook(filename, ncyl=None, tests=('dry', 'wet'), cache=None):
+    """Read every test of workbook.
+    filename --> path to workbook
+    ncyl     --> number of cylinders in engine (None for most cylinders of
+                    any sheet)
+    tests    --> test types to read, in column order of output
+    cache    --> directory of parsed data cache (None to always parse)
+    Returns:
+    dictionary of arrays of shape [stroke, column] (same as
+    compParse.ParseCompTest) keyed by test name
+    """
+    ncol = None if ncyl is None else 2 + len(tests) * ncyl
+    parse = partial(ParseWorkbook, tests=tuple(tests))
+    if cache is None:
+        with open(filename, 'rb') as f:
+            data = parse(f.read(), ncol)
+    else:
+        from compCache import LoadCached
+        #Column order depends on test types, so they are part of cache key
+        data = LoadCached(filename, ncol, cache, parse=parse,
+                            layout=list(tests))
+    return SplitSheets(data, SheetNames(filename), filename)
+
+
+def SplitSheets(data, names, filename):
+    """Split parsed workbook into tests.
+    data     --> parsed workbook from ParseWorkbook
+    names    --> sheet names of workbook
+    filename --> workbook path (or upload name) tests are named after
+    Returns:
+    dictionary of arrays of shape [stroke, column] keyed by test name
+    """
+    sheet = data[:, 0].astype(int)
+    #Sheets are contiguous rows in workbook order
+    keys, starts = np.unique(sheet, return_index=True)
+    bounds = list(starts) + [len(sheet)]
+    return {SheetTestName(filename, names[k]) : data[bounds[j]:bounds[j+1], 1:]
+                for j, k in enumerate(keys)}
+
+
+def LoadWorkbook(filename, ncyl=None, tests=('dry', 'wet'), cache=None,
+                    dtype=np.float64):
+    """Read every test of workbook as compTest.CompressionTest.
+    (see ReadWorkbook for inputs)
+    Returns:
+    dictionary of CompressionTest keyed by test name
+    """
+    from compTest import CompressionTest
+    return {name : CompressionTest.FromData(data, tests, dtype, name)
+                for name, data in ReadWorkbook(filename, ncyl, tests,
+                                                cache).items()}
+
+
+def ParseArgs(args=None):
+    """Parse command line arguments for workbook ingestion"""
+    parser = argparse.ArgumentParser(
+                description='Read compression tests from Excel workbooks')
+    parser.add_argument('workbook', nargs='+',
+                help='workbook (.xlsx) files to read')
+    parser.add_argument('--tests', nargs='+', default=['dry', 'wet'],
+                help='types of tests performed')
+    parser.add_argument('--ncyl', type=int, default=None,
+                help='number of cylinders in engine (default: from sheets)')
+    parser.add_argument('--thresh', type=float, default=15,
+                help='percentage threshold for poor cylinder performance')
+    parser.add_argument('--cache', default=None, metavar='DIR',
+                help='parsed data cache directory (e.g. .compcache)')
+    parser.add_argument('--write', default=None, metavar='DIR',
+                help='also write each test as CompTest_<name>.dat to DIR')
+    return parser.parse_args(args)
+
+
+if __name__ == "__main__":
+
+    args = ParseArgs()
+    from compSynth import FormatCompTest
+    for path in args.workbook:
+        fleet = LoadWorkbook(path, args.ncyl, args.tests, args.cache)
+        for name, test in fleet.items():
+            result = test.Maxima(args.thresh)
+            fail = list(test.cyls[result['fail']])
+            print('{}: {} cyl, {} strokes, {}'.format(name, test.ncyl,
+                    test.nstroke, 'FAIL cyl {}'.format(fail) if fail
+                                    else 'PASS'))
+            if args.write is not None:
+                os.makedirs(args.write, exist_ok=True)
+                out = os.path.join(args.write, 'CompTest_{}.dat'.format(name))
+                with open(out, 'w') as f:
+                    f.write(FormatCompTest(np.column_stack(
+                                [test.stroke] + list(test.pres.reshape(
+                                    -1, test.nstroke)))))
+                print('    --> {}'.format(out))
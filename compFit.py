@@ -0,0 +1,236 @@
+"""COMPRESSION TEST BUILD-UP CURVE FITTING
+Logan Halstrom
+CREATED: 17 OCT 2026
+
+DESCRIPTION:  Predict the plateau pressure of each cylinder from its first
+strokes, so a test can be stopped once its pass/fail verdict is settled
+instead of cranking until the pressure stops rising.  Cylinder pressure
+builds up towards a plateau with each engine stroke n:
+    p(n) = P * (1 - exp(-n / tau))
+P (plateau) and tau (build-up rate) of every cylinder of every test are
+fit at once by least squares without any figures.  For a fixed tau the
+model is linear in P, so the error of every history is found for a grid
+of tau with two matrix products, the best tau is refined by parabolic
+interpolation, and the confidence bounds of P come from the linearized
+covariance of (P, tau).
+
+Fitting every prefix of the strokes (first 3, 4, ... strokes) at once
+gives the earliest stroke from which the verdict of the percdiff/thresh
+check (same as main) no longer depends on the uncertainty of the plateaus.
+
+USAGE:
+python compFit.py Data --thresh 15 --conf 0.95
+"""
+
+import argparse
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+
+TAUS = np.geomspace(0.2, 20, 121) #build-up rate grid [strokes]
+
+
+def Saturation(stroke, plateau, tau):
+    """Pressure of build-up model at each stroke"""
+    return plateau * (1 - np.exp(-stroke / tau))
+
+
+def TQuantile(q, dof):
+    """Student-t quantile (Cornish-Fisher expansion of normal quantile,
+    accurate to ~1% for 3 or more degrees of freedom)
+    """
+    z = NormalDist().inv_cdf(q)
+    dof = np.asarray(dof, dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return (z + (z**3 + z) / (4 * dof)
+                + (5*z**5 + 16*z**3 + 3*z) / (96 * dof**2))
+
+
+def FitSaturation(data, stroke=None, conf=0.95, taus=TAUS):
+    """Fit build-up model to every pressure history at once.
+    data   --> pressure array [..., stroke] (NaN strokes are ignored)
+    stroke --> engine stroke number of each stroke (default 1, 2, ...)
+    conf   --> confidence level of plateau bounds
+    taus   --> grid of build-up rates searched [strokes]
+    Returns:
+    dictionary of arrays of shape [...]:
+        'plateau'  --> fit plateau pressure
+        'tau'      --> fit build-up rate [strokes]
+        'se'       --> standard error of plateau
+        'lo', 'hi' --> confidence bounds of plateau
+        'n'        --> number of strokes fit
+        'rms'      --> rms fit error
+    """
+    data = np.asarray(data, dtype=float)
+    shape = data.shape[:-1]
+    nstroke = data.shape[-1]
+    if stroke is None:
+        stroke = np.arange(1, nstroke+1, 1)
+    stroke = np.asarray(stroke, dtype=float)
+    y = data.reshape(-1, nstroke)
+    valid = ~np.isnan(y)
+    mask = valid.astype(float)
+    y0 = np.where(valid, y, 0)
+    n = valid.sum(-1)
+
+    #LEAST SQUARES PLATEAU FOR EVERY TAU OF GRID
+    f = 1 - np.exp(-stroke[None, :] / taus[:, None])   #[tau, stroke]
+    syf = y0 @ f.T                                      #[history, tau]
+    sff = mask @ (f**2).T
+    syy = (y0**2).sum(-1)[:, None]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sse = np.where(sff > 0, syy - syf**2 / sff, np.inf)
+    best = np.clip(np.argmin(sse, axis=-1), 1, len(taus) - 2)
+
+    #REFINE TAU (PARABOLA THROUGH NEIGHBORING GRID POINTS IN LOG TAU)
+    rows = np.arange(len(y))
+    x = np.log(taus)
+    e0, e1, e2 = (sse[rows, best-1], sse[rows, best], sse[rows, best+1])
+    with np.errstate(divide='ignore', invalid='ignore'):
+        curv = e0 - 2*e1 + e2
+        step = np.where(curv > 0, 0.5 * (e0 - e2) / curv, 0)
+    step = np.clip(np.nan_to_num(step), -1, 1)
+    tau = np.exp(x[best] + step * (x[1] - x[0]))
+
+    #PLATEAU AND ERROR AT REFINED TAU
+    expo = np.exp(-stroke[None, :] / tau[:, None])      #[history, stroke]
+    fh = (1 - expo) * mask
+    with np.errstate(divide='ignore', invalid='ignore'):
+        plateau = (y0 * fh).sum(-1) / (fh**2).sum(-1)
+    resid = (y0 - plateau[:, None] * fh) * mask
+    sse = (resid**2).sum(-1)
+
+    #LINEARIZED COVARIANCE OF (PLATEAU, TAU)
+    j1 = fh
+    j2 = plateau[:, None] * (-stroke[None, :] / tau[:, None]**2) * expo * mask
+    a = (j1**2).sum(-1)
+    b = (j1*j2).sum(-1)
+    c = (j2**2).sum(-1)
+    dof = n - 2
+    with np.errstate(divide='ignore', invalid='ignore'):
+        s2 = np.where(dof > 0, sse / dof, np.nan)
+        se = np.sqrt(s2 * c / (a*c - b**2))
+        rms = np.sqrt(sse / n)
+    half = TQuantile(0.5 + conf/2, dof) * se
+
+    out = {'plateau' : plateau, 'tau' : tau, 'se' : se,
+            'lo' : plateau - half, 'hi' : plateau + half, 'n' : n,
+            'rms' : rms}
+    return {key : val.reshape(shape) for key, val in out.items()}
+
+
+def PrefixData(data, nmin=3):
+    """Every prefix of the stroke axis (first nmin, nmin+1, ... strokes),
+    with later strokes NaN.
+    data --> pressure array [..., stroke]
+    Returns:
+    array of shape [prefix, ..., stroke]
+    """
+    nstroke = data.shape[-1]
+    lengths = np.arange(nmin, max(nmin, nstroke) + 1, 1)
+    keep = np.arange(nstroke)[None, :] < lengths[:, None]   #[prefix, stroke]
+    keep = keep.reshape((len(lengths),) + (1,) * (data.ndim - 1) + (nstroke,))
+    return np.where(keep, data[None], np.nan)
+
+
+def PercDiffBounds(lo, hi):
+    """Conservative bounds of percent difference of each cylinder from the
+    max cylinder, given plateau bounds [..., cylinder]
+    """
+    reflo = np.fmax.reduce(lo, axis=-1)[..., None]
+    refhi = np.fmax.reduce(hi, axis=-1)[..., None]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        lower = (lo / refhi - 1) * 100
+        upper = np.minimum((hi / reflo - 1) * 100, 0)
+    return lower, upper
+
+
+def SettleVerdict(data, thresh=15, ref=0, conf=0.95, nmin=3):
+    """Earliest stroke at which the pass/fail verdict of each test is
+    settled: for every prefix from that stroke on, the percent difference
+    bounds of every dry cylinder are all below or all above -thresh.
+    data   --> pressure array [..., test type, cylinder, stroke]
+    thresh --> percentage threshold for poor cylinder performance
+    ref    --> index of test type used for cylinder comparison (dry test)
+    conf   --> confidence level of plateau bounds
+    nmin   --> fewest strokes fit
+    Returns:
+    dictionary of arrays:
+        'stroke'  --> settled stroke of each test [...] (NaN if never)
+        'nstroke' --> strokes recorded of each test [...]
+        'fail'    --> predicted failure of each cylinder at settled
+                        stroke [..., cylinder]
+        'plateau', 'lo', 'hi' --> plateau fit to all strokes [..., cyl]
+        'settled' --> verdict settled with each prefix [prefix, ...]
+    """
+    dry = np.asarray(data, dtype=float)[..., ref, :, :]
+    nstroke = (~np.isnan(dry)).any(axis=-2)
+    nstroke = nstroke.shape[-1] - np.argmax(nstroke[..., ::-1], axis=-1)
+    fit = FitSaturation(PrefixData(dry, nmin), conf=conf)
+    lower, upper = PercDiffBounds(fit['lo'], fit['hi'])
+    sure = (upper < -thresh) | (lower >= -thresh)
+    settled = sure.all(axis=-1) & ~np.isnan(fit['se']).any(axis=-1)
+    #Settled from this prefix through every later prefix
+    stays = np.logical_and.accumulate(settled[::-1], axis=0)[::-1]
+    first = np.argmax(stays, axis=0)
+    stroke = np.where(stays.any(axis=0), first + nmin, np.nan)
+
+    #Predicted verdict with prefix of settled stroke (all strokes if never)
+    idx = np.where(stays.any(axis=0), first, len(settled) - 1)
+    plateau = np.take_along_axis(fit['plateau'], idx[None, ..., None],
+                                    axis=0)[0]
+    maxcyl = np.fmax.reduce(plateau, axis=-1)[..., None]
+    fail = (plateau / maxcyl - 1) * 100 < -thresh
+    return {'stroke' : stroke, 'nstroke' : nstroke, 'fail' : fail,
+            'plateau' : fit['plateau'][-1], 'lo' : fit['lo'][-1],
+            'hi' : fit['hi'][-1], 'settled' : settled}
+
+
+def ParseArgs(args=None):
+    """Parse command line arguments for early verdict analysis"""
+    parser = argparse.ArgumentParser(
+                description='Predict plateau pressure and earliest settled '
+                            'verdict of compression tests')
+    parser.add_argument('source', nargs='?', default='Data',
+                help='directory or glob of CompTest_*.dat files')
+    parser.add_argument('--thresh', type=float, default=15,
+                help='percentage threshold for poor cylinder performance')
+    parser.add_argument('--conf', type=float, default=0.95,
+                help='confidence level of plateau bounds')
+    parser.add_argument('--nmin', type=int, default=3,
+                help='fewest strokes fit')
+    parser.add_argument('--ncyl', type=int, default=4,
+                help='number of cylinders in engine')
+    return parser.parse_args(args)
+
+
+if __name__ == "__main__":
+
+    args = ParseArgs()
+
+    from compBatch import FindTestFiles
+    from compTest import LoadTests
+    from compAnalysis import StackTests, CalcMaxima
+    fleet = LoadTests(FindTestFiles(args.source), args.ncyl)
+    names = list(fleet.keys())
+    data = StackTests([fleet[name].pres for name in names])
+    result = SettleVerdict(data, args.thresh, conf=args.conf,
+                            nmin=args.nmin)
+    actual = CalcMaxima(data, args.thresh)['fail']
+
+    table = pd.DataFrame({'test' : names,
+                    'nstroke' : result['nstroke'],
+                    'settled' : result['stroke'],
+                    'predfail' : [list(np.nonzero(f)[0] + 1)
+                                    for f in result['fail']],
+                    'fail' : [list(np.nonzero(f)[0] + 1) for f in actual]})
+    with pd.option_context('display.width', 120):
+        print(table)
+    done = ~np.isnan(result['stroke'])
+    print('\nVerdict settled early in {} of {} tests, {:.1f} strokes saved '
+            'on average, {} of them agree with full test'.format(
+            done.sum(), len(names),
+            np.mean(result['nstroke'][done] - result['stroke'][done])
+                if done.any() else 0,
+            (result['fail'][done] == actual[done]).all(axis=-1).sum()))
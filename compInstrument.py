@@ -0,0 +1,114 @@
+"""COMPRESSION TEST PIPELINE INSTRUMENTATION
+Logan Halstrom
+CREATED: 17 OCT 2026
+
+DESCRIPTION:  Optional timing and memory instrumentation of the stages of
+plotCompression.main (load, maxima, plots, wet-dry deltas) and of each plot
+save.  Each finished stage produces a record with its wall time, CPU time
+and (optionally) peak traced memory, which is passed to every registered
+callback.  JsonLinesCallback writes records as JSON lines.
+
+Nothing is measured unless a callback is registered, so there is no cost
+when instrumentation is off.
+
+USAGE:
+import compInstrument
+compInstrument.RegisterCallback(compInstrument.JsonLinesCallback('t.jsonl'))
+plotCompression.main(...)
+"""
+
+import os
+import json
+import time
+import threading
+import tracemalloc
+from contextlib import contextmanager
+
+_callbacks = []               #functions called with each stage record
+_memory = False               #also record peak memory of each stage
+_local = threading.local()    #stack of running stages of each thread
+
+
+def RegisterCallback(callback, memory=False):
+    """Call callback with record of each finished stage.
+    callback --> function taking record dictionary
+    memory   --> record peak memory of each stage (uses tracemalloc, slows
+                    down Python allocations while enabled)
+    Returns:
+    callback (so it can be used as a decorator)
+    """
+    global _memory
+    _callbacks.append(callback)
+    if memory:
+        _memory = True
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+    return callback
+
+
+def UnregisterCallback(callback):
+    """Stop calling callback.  Memory tracing stops with last callback."""
+    global _memory
+    _callbacks.remove(callback)
+    if not _callbacks and _memory:
+        _memory = False
+        tracemalloc.stop()
+
+
+def JsonLinesCallback(path):
+    """Callback writing each record as a line of JSON to file at path.
+    Lines are appended with a single write, so several processes can share
+    one file.
+    """
+    def callback(record):
+        line = json.dumps(record) + '\n'
+        with open(path, 'a') as f:
+            f.write(line)
+    return callback
+
+
+def Instrumented():
+    """True if stages are being recorded"""
+    return len(_callbacks) > 0
+
+
+@contextmanager
+def Stage(stage, **info):
+    """Record wall time, CPU time and peak memory of code in with-block.
+    stage --> stage name (e.g. 'load', 'maxima', 'saveplot')
+    info  --> extra fields of record (e.g. test name, save path)
+    """
+    if not _callbacks:
+        yield
+        return
+
+    stack = getattr(_local, 'stack', None)
+    if stack is None:
+        stack = _local.stack = []
+    if _memory:
+        #Running peak of enclosing stage before peak is reset for this one
+        if stack:
+            stack[-1] = max(stack[-1], tracemalloc.get_traced_memory()[1])
+        tracemalloc.reset_peak()
+    stack.append(0)
+    start = tracemalloc.get_traced_memory()[0] if _memory else 0
+
+    wall = time.perf_counter()
+    cpu = time.thread_time()
+    try:
+        yield
+    finally:
+        record = {'stage' : stage,
+                    'wall_s' : time.perf_counter() - wall,
+                    'cpu_s' : time.thread_time() - cpu,
+                    'pid' : os.getpid(), 'time' : time.time()}
+        peak = stack.pop()
+        if _memory:
+            peak = max(peak, tracemalloc.get_traced_memory()[1])
+            #Peak memory used above what was in use at start of stage
+            record['peak_mb'] = (peak - start) / 2**20
+            if stack:
+                stack[-1] = max(stack[-1], peak)
+        record.update(info)
+        for callback in list(_callbacks):
+            callback(record)
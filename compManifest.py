@@ -0,0 +1,116 @@
+"""COMPRESSION TEST OUTPUT MANIFEST
+Logan Halstrom
+CREATED: 17 OCT 2026
+
+DESCRIPTION:  Manifest of the inputs used to produce the results of each
+test in Results/, for incremental batch runs.  A test is up to date (and its
+analysis and plotting are skipped) if its data file content, analysis
+settings (thresh, tests, ncyl, exclude), plot settings (ylim, palette) and
+plot mode (plotting, figure reuse, concurrent rendering, export formats)
+are unchanged and all of its plots still exist.  Maxima of each test are
+stored in the manifest so skipped tests still appear in batch results.
+"""
+
+import os
+import json
+
+import pandas as pd
+
+from compCache import ContentHash
+
+MANIFEST = 'Results/manifest.json' #default manifest path
+
+
+def LoadManifest(path=MANIFEST):
+    """Load manifest entries keyed by test name (empty if no manifest)"""
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def SaveManifest(manifest, path=MANIFEST):
+    """Save manifest through temporary file so it is never left partial"""
+    parent = os.path.dirname(path)
+    if parent != '':
+        os.makedirs(parent, exist_ok=True)
+    tmp = '{}.{}.tmp'.format(path, os.getpid())
+    with open(tmp, 'w') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def DataHash(path, entry=None):
+    """Content hash of data file.  Reuses hash of manifest entry if the
+    file modification time and size have not changed.
+    path  --> path to data file
+    entry --> previous manifest entry of test (or None)
+    Returns:
+    dictionary with content hash, modification time and size of file
+    """
+    stat = os.stat(path)
+    if (entry is not None and entry['data']['mtime'] == stat.st_mtime_ns
+            and entry['data']['size'] == stat.st_size):
+        return dict(entry['data'])
+    with open(path, 'rb') as f:
+        text = f.read()
+    return {'hash' : ContentHash(text), 'mtime' : stat.st_mtime_ns,
+            'size' : stat.st_size}
+
+
+def TestInputs(kwargs, palette=None, reuse=False, export=None):
+    """Settings that change the results of a test (besides its data).
+    Rendering modes are only recorded if set, so manifests of plain runs
+    stay valid.
+    kwargs  --> keyword arguments passed to main
+    palette --> plot color palette (None if not plotting)
+    reuse   --> figure reuse mode of batch (see compBatch.RunBatch)
+    export  --> (formats, dpis) plots are saved in (None for PNG only)
+    """
+    inputs = {'thresh' : kwargs['thresh'], 'tests' : kwargs['tests'],
+                'ncyl' : kwargs['ncyl'], 'plot' : kwargs['plot']}
+    if kwargs.get('exclude'):
+        inputs['exclude'] = True
+    if kwargs['plot']:
+        inputs['ylim'] = kwargs['ylim']
+        inputs['style'] = palette
+        #Plot rendering mode
+        if reuse:
+            inputs['reuse'] = reuse
+        if kwargs.get('concurrent'):
+            inputs['concurrent'] = True
+        if export is not None:
+            inputs['export'] = export
+    #Compare as stored in json (e.g. tuples become lists)
+    return json.loads(json.dumps(inputs))
+
+
+def UpToDate(entry, data, inputs):
+    """Check if results of test in manifest are still valid.
+    entry  --> manifest entry of test (or None)
+    data   --> data file hash from DataHash
+    inputs --> test settings from TestInputs
+    """
+    if entry is None:
+        return False
+    if entry['data']['hash'] != data['hash'] or entry['inputs'] != inputs:
+        return False
+    return all(os.path.isfile(path) for path in entry['outputs'])
+
+
+def MakeEntry(data, inputs, outputs, maxima):
+    """Manifest entry of a test that was just run.
+    data    --> data file hash from DataHash
+    inputs  --> test settings from TestInputs
+    outputs --> paths of plots saved for test
+    maxima  --> maxima dataframe of test
+    """
+    return {'data' : data, 'inputs' : inputs, 'outputs' : list(outputs),
+            'columns' : list(maxima.columns),
+            'maxima' : {col : maxima[col].tolist() for col in maxima}}
+
+
+def EntryMaxima(entry):
+    """Maxima dataframe stored in manifest entry"""
+    return pd.DataFrame(entry['maxima'], columns=entry['columns'])
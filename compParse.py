@@ -0,0 +1,132 @@
+"""COMPRESSION TEST DATA PARSER
+Logan Halstrom
+CREATED: 17 OCT 2026
+
+DESCRIPTION:  Single-pass tokenizer for blank-padded compression test data
+files.  Fields are split on commas and converted straight to floats, with
+whitespace-only (or empty) fields becoming NaN as they are parsed, so no
+regex replacement or object-dtype conversion is needed afterwards.
+
+Many files can be parsed into one preallocated buffer of shape
+[file, stroke, column] for fleet-scale analysis, or a chunk at a time as
+fleet pressure arrays [file, test type, cylinder, stroke] (FleetArrays).
+"""
+
+import numpy as np
+
+NAN = float('nan')
+
+
+def _ParseRows(rows, ncol):
+    """Convert rows of byte fields to floats, padding short rows with NaN.
+    Slow path for files with ragged rows.
+    """
+    out = []
+    for row in rows:
+        vals = [float(f) if f.strip() else NAN for f in row.split(b',')]
+        if len(vals) != ncol:
+            vals = (vals + [NAN] * ncol)[:ncol]
+        out.append(vals)
+    return out
+
+
+def ParseCompText(text, ncol=9):
+    """Parse compression test data text into float array.
+    text --> contents of data file (bytes)
+    ncol --> number of columns (stroke + dry and wet for each cylinder),
+                None to use number of fields in first row
+    Returns:
+    array of shape [stroke, column]
+    """
+    #Skip blank lines (e.g. trailing newlines at end of file)
+    rows = [line for line in text.splitlines() if line.strip()]
+    if ncol is None:
+        ncol = rows[0].count(b',') + 1 if rows else 1
+    if any(row.count(b',') != ncol - 1 for row in rows):
+        #Ragged rows, pad each one individually
+        return np.array(_ParseRows(rows, ncol), dtype=float).reshape(-1, ncol)
+    fields = b','.join(rows).split(b',')
+    #Blank fields become NaN while parsing, numpy converts the rest
+    vals = [f if f.strip() else b'nan' for f in fields]
+    return np.array(vals, dtype=float).reshape(-1, ncol)
+
+
+def ParseCompTest(filename, ncol=9):
+    """Read and parse a single compression test data file.
+    filename --> path to data file to read
+    ncol     --> number of columns (stroke + dry and wet for each cylinder),
+                    None to use number of fields in first row
+    Returns:
+    array of shape [stroke, column]
+    """
+    with open(filename, 'rb') as f:
+        text = f.read()
+    return ParseCompText(text, ncol)
+
+
+def ParseCompTests(filenames, ncol=9, nstroke=32):
+    """Bulk parse many compression test data files into one buffer.
+    Buffer is preallocated and NaN-filled, and is only grown (doubling
+    stroke axis) if a file has more strokes than expected.
+    filenames --> list of paths to data files
+    ncol      --> number of columns (stroke + dry and wet for each cylinder)
+    nstroke   --> expected maximum number of strokes in any file
+    Returns:
+    array of shape [file, stroke, column], number of strokes in each file
+    """
+    def Read(filename):
+        with open(filename, 'rb') as f:
+            return f.read()
+    return ParseCompTexts((Read(f) for f in filenames), len(filenames), ncol,
+                            nstroke)
+
+
+def ParseCompTexts(texts, ntext, ncol=9, nstroke=32):
+    """Bulk parse contents of many data files into one buffer (see
+    ParseCompTests), e.g. for files already read to hash them.
+    texts --> iterable of data file contents (bytes)
+    ntext --> number of texts
+    Returns:
+    array of shape [file, stroke, column], number of strokes in each file
+    """
+    buf = np.full((ntext, nstroke, ncol), np.nan)
+    counts = np.zeros(ntext, dtype=int)
+    for i, text in enumerate(texts):
+        data = ParseCompText(text, ncol)
+        n = data.shape[0]
+        if n > buf.shape[1]:
+            #Grow stroke axis to fit current file
+            grow = np.full((ntext, max(n, 2 * buf.shape[1]), ncol), np.nan)
+            grow[:, :buf.shape[1]] = buf
+            buf = grow
+        buf[i, :n] = data
+        counts[i] = n
+    return buf[:, :max(counts.max(initial=0), 1)], counts
+
+
+def FleetArray(buf, ncyl=4, ntest=2):
+    """Fleet pressure array of bulk parsed data files.
+    buf   --> array of shape [file, stroke, column] from ParseCompTests
+    ncyl  --> number of cylinders in engine
+    ntest --> number of test types (e.g. 2 for dry and wet)
+    Returns:
+    array of shape [file, test type, cylinder, stroke]
+    """
+    return buf[:, :, 1:].transpose(0, 2, 1).reshape(len(buf), ntest, ncyl, -1)
+
+
+def FleetArrays(filenames, ncyl=4, ntest=2, chunk=10000):
+    """Parse many compression test data files a chunk of files at a time,
+    as fleet pressure arrays.
+    filenames --> list of paths to data files
+    ncyl      --> number of cylinders in engine
+    ntest     --> number of test types (e.g. 2 for dry and wet)
+    chunk     --> number of files parsed into memory at a time
+    Yields:
+    index of first file of chunk, array of shape
+    [file, test type, cylinder, stroke]
+    """
+    ncol = 1 + ntest * ncyl
+    for start in range(0, len(filenames), chunk):
+        buf, _ = ParseCompTests(filenames[start:start+chunk], ncol)
+        yield start, FleetArray(buf, ncyl, ntest)
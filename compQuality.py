@@ -0,0 +1,291 @@
+"""COMPRESSION TEST DATA QUALITY CHECKS
+Logan Halstrom
+CREATED: 17 OCT 2026
+
+DESCRIPTION:  Vectorized checks of pressure histories for the data problems
+that otherwise need hand-made variants of data files (e.g. bad first stroke
+reading of CompTest_2017-01-07_2nd_Low3_1999Camry.dat, or retests copied
+from another file).  Every check is a few array operations on the fleet
+array [test, test type, cylinder, stroke] (compAnalysis), so a whole data
+archive is checked at once:
+    nonmono   --> single reading breaks build-up against both neighbouring
+                    strokes (spike above both or dip below both)
+    outlier   --> single stroke far off the other cylinders at that stroke
+                    (relative to how that cylinder compares on other strokes)
+    duprow    --> stroke row repeated from previous stroke (pasted twice)
+                    while pressures are still building up
+    gap       --> blank readings between recorded strokes
+    truncated --> history ends while pressure is still rising
+    tail      --> history ends many strokes before others of the test type
+    wetdry    --> wet test maximum below dry test maximum
+    duplicate --> test shares most of its histories with another test
+                    (retest or copy of another file)
+Flagged strokes (nonmono, outlier, duprow) can be excluded (set to NaN)
+before the maxima analysis (main(..., exclude=True)).
+
+USAGE:
+python compQuality.py Data -o Results/quality.csv
+"""
+
+import argparse
+import warnings
+
+import numpy as np
+import pandas as pd
+
+TOL = 5.0       #gauge reading error [psi]
+RATIO = 2.0     #outlier factor from expected reading
+MAXTAIL = 4     #most strokes a history may end before others of test type
+STROKECHECKS = ['nonmono', 'outlier', 'duprow'] #flags of single strokes
+CHECKS = STROKECHECKS + ['gap', 'truncated', 'tail', 'wetdry', 'duplicate']
+
+
+def CheckHistories(data, tests=['dry', 'wet'], tol=TOL, ratio=RATIO,
+                    maxtail=MAXTAIL):
+    """Run data quality checks on every pressure history at once.
+    data    --> pressure array [..., test type, cylinder, stroke]
+    tests   --> test types of test type axis
+    tol     --> gauge reading error (smaller drops/rises are ignored) [psi]
+    ratio   --> factor off expected reading for stroke to be an outlier
+    maxtail --> most strokes a history may end before others of test type
+    Returns:
+    dictionary of boolean flags:
+        'nonmono', 'outlier' --> [..., test type, cylinder, stroke]
+        'duprow'             --> [..., stroke]
+        'gap', 'truncated', 'tail' --> [..., test type, cylinder]
+        'wetdry'             --> [..., cylinder]
+    """
+    data = np.asarray(data, dtype=float)
+    valid = ~np.isnan(data)
+    nstroke = data.shape[-1]
+    index = np.arange(nstroke)
+    recorded = valid.any(axis=-1)
+    last = np.where(recorded,
+                    nstroke - np.argmax(valid[..., ::-1], axis=-1), 0)
+    first = np.argmax(valid, axis=-1)
+    inside = (index >= first[..., None]) & (index < last[..., None])
+    flags = {}
+
+    with np.errstate(invalid='ignore', divide='ignore'), \
+            warnings.catch_warnings():
+        #(histories or strokes with no readings give NaN medians)
+        warnings.simplefilter('ignore', RuntimeWarning)
+        #SPIKE OR DIP BREAKING BUILD-UP
+        #(of the readings around a drop, flag the one furthest from the
+        #midpoint of its neighbours, i.e. the spike itself rather than the
+        #reading after it, so excluding it removes the bad reading)
+        prev = np.full_like(data, np.nan)
+        prev[..., 1:] = data[..., :-1]
+        nxt = np.full_like(data, np.nan)
+        nxt[..., :-1] = data[..., 1:]
+        mid = np.where(np.isnan(prev), nxt,
+                        np.where(np.isnan(nxt), prev, (prev + nxt) / 2))
+        dev = np.nan_to_num(np.abs(data - mid))
+        devprev = np.zeros_like(dev)
+        devprev[..., 1:] = dev[..., :-1]
+        devnext = np.zeros_like(dev)
+        devnext[..., :-1] = dev[..., 1:]
+        breaks = (data > nxt + tol) | (data < prev - tol)
+        flags['nonmono'] = (valid & breaks & (dev >= devprev)
+                            & (dev >= devnext))
+
+        #READING VS OTHER CYLINDERS AT SAME STROKE
+        #(log ratio to median of cylinders, minus typical log ratio of
+        #cylinder over all strokes)
+        logp = np.log(np.where(data > 0, data, np.nan))
+        rel = logp - np.nanmedian(logp, axis=-2, keepdims=True)
+        off = rel - np.nanmedian(rel, axis=-1, keepdims=True)
+        flags['outlier'] = valid & (np.abs(off) > np.log(ratio))
+
+        #SAME READINGS AS PREVIOUS STROKE IN EVERY COLUMN DURING BUILD-UP
+        #(every reading repeating is normal once pressures level off, but
+        #not while the strokes around it are still rising)
+        rows = data.reshape(data.shape[:-3] + (-1, nstroke))
+        rowvalid = ~np.isnan(rows)
+        same = (rows[..., 1:] == rows[..., :-1]) | (~rowvalid[..., 1:]
+                                                    & ~rowvalid[..., :-1])
+        rise = np.fmax.reduce(rows[..., 1:] - rows[..., :-1], axis=-2) > tol
+        building = np.zeros_like(rise)
+        building[..., 1:] |= rise[..., :-1]
+        building[..., :-1] |= rise[..., 1:]
+        dup = same.all(axis=-2) & rowvalid[..., 1:].any(axis=-2) & building
+        flags['duprow'] = np.concatenate([np.zeros(dup.shape[:-1] + (1,),
+                                                    dtype=bool), dup], axis=-1)
+
+        #BLANKS BETWEEN RECORDED STROKES
+        flags['gap'] = (inside & ~valid).any(axis=-1)
+
+        #STILL RISING AT LAST STROKE
+        lastval = np.take_along_axis(data, np.maximum(last - 1, 0)[..., None],
+                                        axis=-1)[..., 0]
+        prevval = np.take_along_axis(data, np.maximum(last - 2, 0)[..., None],
+                                        axis=-1)[..., 0]
+        flags['truncated'] = (last >= 2) & (lastval - prevval > tol)
+
+        #ENDS LONG BEFORE OTHER CYLINDERS OF SAME TEST TYPE
+        longest = last.max(axis=-1, keepdims=True)
+        flags['tail'] = recorded & (last < longest - maxtail)
+
+        #WET MAXIMUM BELOW DRY MAXIMUM
+        maxs = np.fmax.reduce(data, axis=-1)
+        if 'wet' in tests and 'dry' in tests:
+            flags['wetdry'] = (maxs[..., tests.index('wet'), :]
+                                < maxs[..., tests.index('dry'), :] - tol)
+        else:
+            flags['wetdry'] = np.zeros(maxs.shape[:-2] + maxs.shape[-1:],
+                                        dtype=bool)
+    return flags
+
+
+def DuplicateTests(data, names, share=0.5):
+    """Find tests that share most of their pressure histories with an
+    earlier test (retests or copies of another data file).
+    data  --> fleet pressure array [test, test type, cylinder, stroke]
+    names --> name of each test
+    share --> fraction of recorded histories shared to be a duplicate
+    Returns:
+    dictionary of (earlier test name, histories shared, histories) keyed
+    by test name
+    """
+    data = np.asarray(data, dtype=float)
+    hists = data.reshape(len(data), -1, data.shape[-1])
+    #NaN compares unequal, so compare with NaN replaced by marker value
+    keys = np.where(np.isnan(hists), -1.0, hists)
+    recorded = ~np.isnan(hists).all(axis=-1)
+    seen = {} #test indices of each history
+    for i in range(len(hists)):
+        for j in np.nonzero(recorded[i])[0]:
+            seen.setdefault(keys[i, j].tobytes(), []).append(i)
+    dups = {}
+    for i in range(len(hists)):
+        nrec = recorded[i].sum()
+        counts = {}
+        for j in np.nonzero(recorded[i])[0]:
+            for k in seen[keys[i, j].tobytes()]:
+                if k < i:
+                    counts[k] = counts.get(k, 0) + 1
+        if counts:
+            k = max(counts, key=counts.get)
+            if counts[k] >= share * nrec:
+                dups[names[i]] = (names[k], counts[k], int(nrec))
+    return dups
+
+
+def QualityReport(fleet, tests=['dry', 'wet'], ncyl=4, **kwargs):
+    """Data quality report of every test of a fleet.
+    fleet  --> dictionary of test dataframes or compTest.CompressionTest
+                keyed by test name
+    kwargs --> options of CheckHistories (tol, ratio, maxtail)
+    Returns:
+    dataframe with one row per flag: 'test', 'check', 'type', 'cyl',
+    'stroke' (NaN if not a single stroke flag), 'value' (pressure)
+    """
+    from compAnalysis import TestArray, StackTests
+    names = list(fleet.keys())
+    data = StackTests([TestArray(fleet[name], tests, ncyl)
+                        for name in names])
+    flags = CheckHistories(data, tests, **kwargs)
+
+    rows = []
+    def Add(check, k, i, j, s=None, detail=''):
+        rows.append({'test' : names[k], 'check' : check,
+                'type' : tests[i] if i is not None else None,
+                'cyl' : j + 1 if j is not None else None,
+                'stroke' : s + 1 if s is not None else np.nan,
+                'value' : data[k, i, j, s] if s is not None else np.nan,
+                'detail' : detail})
+    for check in ['nonmono', 'outlier']:
+        for k, i, j, s in zip(*np.nonzero(flags[check])):
+            Add(check, k, i, j, s)
+    for k, s in zip(*np.nonzero(flags['duprow'])):
+        rows.append({'test' : names[k], 'check' : 'duprow', 'type' : None,
+                        'cyl' : None, 'stroke' : s + 1, 'value' : np.nan,
+                        'detail' : 'same as stroke {}'.format(s)})
+    for check in ['gap', 'truncated', 'tail']:
+        for k, i, j in zip(*np.nonzero(flags[check])):
+            Add(check, k, i, j)
+    for k, j in zip(*np.nonzero(flags['wetdry'])):
+        Add('wetdry', k, None, j)
+    for name, (other, nshare, nrec) in DuplicateTests(data, names).items():
+        rows.append({'test' : name, 'check' : 'duplicate', 'type' : None,
+                        'cyl' : None, 'stroke' : np.nan, 'value' : np.nan,
+                        'detail' : 'shares {}/{} histories with {}'.format(
+                                                        nshare, nrec, other)})
+    report = pd.DataFrame(rows, columns=['test', 'check', 'type', 'cyl',
+                                            'stroke', 'value', 'detail'])
+    #Order of fleet, then checks
+    report['test'] = pd.Categorical(report['test'], names, ordered=True)
+    report['check'] = pd.Categorical(report['check'], CHECKS, ordered=True)
+    return report.sort_values(['test', 'check', 'type', 'cyl', 'stroke'],
+                                kind='stable').reset_index(drop=True)
+
+
+def ExcludeFlagged(data, tests=['dry', 'wet'], checks=STROKECHECKS, **kwargs):
+    """Pressure data with flagged strokes removed (set to NaN).
+    data   --> pressure array [..., test type, cylinder, stroke]
+    checks --> single stroke checks to exclude
+    kwargs --> options of CheckHistories (tol, ratio, maxtail)
+    Returns:
+    copy of data, boolean mask of excluded readings
+    """
+    data = np.array(data, dtype=float)
+    flags = CheckHistories(data, tests, **kwargs)
+    mask = np.zeros(data.shape, dtype=bool)
+    for check in checks:
+        flag = flags[check]
+        if check == 'duprow':
+            flag = flag[..., None, None, :]
+        mask |= flag
+    data[mask] = np.nan
+    return data, mask
+
+
+def ParseArgs(args=None):
+    """Parse command line arguments for data quality checks"""
+    parser = argparse.ArgumentParser(
+                description='Check compression test data quality')
+    parser.add_argument('source', nargs='?', default='Data',
+                help='directory or glob of CompTest_*.dat files')
+    parser.add_argument('--tests', nargs='+', default=['dry', 'wet'],
+                help='types of tests performed')
+    parser.add_argument('--ncyl', type=int, default=4,
+                help='number of cylinders in engine')
+    parser.add_argument('--tol', type=float, default=TOL,
+                help='gauge reading error [psi]')
+    parser.add_argument('--ratio', type=float, default=RATIO,
+                help='factor off expected reading for outlier stroke')
+    parser.add_argument('--maxtail', type=int, default=MAXTAIL,
+                help='most strokes a history may end before the others')
+    parser.add_argument('--cache', default=None,
+                help='directory of parsed data cache (e.g. .compcache)')
+    parser.add_argument('-o', '--output', default=None,
+                help='save report to this csv file')
+    return parser.parse_args(args)
+
+
+if __name__ == "__main__":
+
+    args = ParseArgs()
+
+    from compBatch import FindTestFiles
+    from compTest import LoadTests
+    fleet = LoadTests(FindTestFiles(args.source), args.ncyl, args.tests,
+                        args.cache)
+    report = QualityReport(fleet, args.tests, args.ncyl, tol=args.tol,
+                            ratio=args.ratio, maxtail=args.maxtail)
+    #Per file report
+    for name in fleet:
+        flags = report[report['test'] == name]
+        print('\n{}: {}'.format(name, 'OK' if flags.empty else
+                '{} flags'.format(len(flags))))
+        for _, row in flags.iterrows():
+            where = ' '.join('{} {}'.format(key, row[key] if key == 'type'
+                                                else int(row[key]))
+                        for key in ['type', 'cyl', 'stroke']
+                        if row[key] is not None and not pd.isna(row[key]))
+            print('    {:<10} {:<22} {}{}'.format(row['check'], where,
+                    '' if pd.isna(row['value'])
+                        else 'p={:.0f} '.format(row['value']),
+                    row['detail']))
+    if args.output is not None:
+        report.to_csv(args.output, index=False)
@@ -0,0 +1,365 @@
+"""COMPRESSION TEST PLOT RENDERING
+Logan Halstrom
+CREATED: 17 OCT 2026
+
+DESCRIPTION:  Reusable plot templates for rendering many compression tests.
+Each kind of plot (pressure history, normalized pressure history, wet-dry
+delta) is built once with the plotting functions of plotCompression.  For
+every following test, new data is swapped into the existing lines with
+set_data and the axis limits are updated before saving, so no figures or
+legends are rebuilt and memory stays flat over large batches.
+
+FleetOverview renders a whole fleet on a few pages of small multiples
+(one panel per test) instead of three figures per test, or the pressure
+history of every cylinder of the fleet overlaid on a single plot.
+"""
+
+import numpy as np
+
+import plotCompression as pc
+from compInstrument import Stage
+
+
+def SetStrokeAxis(ax, stroke, ylim=None):
+    """Update x-axis (engine stroke) and y-axis limits for new data.
+    ax     --> plot axes
+    stroke --> engine stroke number of each data point
+    ylim   --> boundaries of y-axis ([ymin, ymax]), None to autoscale
+    """
+    nstroke = np.nanmax(stroke)
+    ax.set_xlim([0, nstroke])
+    ax.set_xticks(np.arange(1, nstroke+1, 2.0))
+    if ylim is None:
+        ax.set_autoscaley_on(True)
+        ax.relim()
+        ax.autoscale_view(scalex=False)
+    else:
+        ax.set_ylim(ylim)
+
+
+class PlotTemplates(object):
+    """Plot templates built on first use and updated for each new test.
+    Templates are keyed by plot type and everything that changes their
+    layout (test types, cylinders, normalization).
+    """
+
+    def __init__(self, fixed=False):
+        """fixed --> save every test with the tight layout found for the
+                    first test, so figures are drawn once per save (axis
+                    labels wider than for the first test may be clipped)
+        """
+        self.axes = {}
+        self.fixed = fixed
+        self.bboxes = {} #fixed layout of each template figure
+
+    def PressHist(self, df, ylim=None, norm=False,
+                    tests=['dry', 'wet'], cyls=[1, 2, 3, 4]):
+        """Pressure history plot (see plotCompression.PlotPressHist)"""
+        key = ('hist', tuple(tests), tuple(cyls), norm)
+        ax = self.axes.get(key)
+        if ax is None:
+            ax = self.axes[key] = pc.PlotPressHist(df, ylim, norm,
+                                                    tests, cyls)
+            return ax
+        stroke = df['Stroke'].values
+        for line in ax.get_lines():
+            #Line labels are data keys
+            line.set_data(stroke, df[line.get_label()].values)
+        SetStrokeAxis(ax, stroke, ylim)
+        return ax
+
+    def DryVsWetDelta(self, df, ylim=None, norm=1):
+        """Wet - dry delta plot (see plotCompression.PlotDryVsWetDelta)"""
+        key = ('delta', np.max(norm) == 1, len(np.atleast_1d(norm)))
+        ax = self.axes.get(key)
+        if ax is None:
+            ax = self.axes[key] = pc.PlotDryVsWetDelta(df, ylim, norm)
+            return ax
+        if np.max(norm) == 1:
+            norm = np.ones(len(ax.get_lines()))
+        stroke = df['Stroke'].values
+        for j, line in enumerate(ax.get_lines()):
+            #Line labels are cylinder numbers
+            name = '{}del'.format(line.get_label())
+            line.set_data(stroke, df[name].values / norm[j])
+        SetStrokeAxis(ax, stroke, ylim)
+        return ax
+
+    def Save(self, ax, savename):
+        """Save template figure, keep it open for the next test"""
+        bbox = 'tight'
+        if self.fixed:
+            fig = ax.figure
+            if fig not in self.bboxes:
+                self.bboxes[fig] = pc.lplot.TightBbox(fig)
+            bbox = self.bboxes[fig]
+        pc.SavePlot(savename, fig=ax.figure, bbox=bbox)
+
+    def Close(self):
+        """Close all template figures"""
+        for ax in self.axes.values():
+            pc.plt.close(ax.figure)
+        self.axes = {}
+        self.bboxes = {}
+
+
+########################################################################
+### CONCURRENT RENDERING ###############################################
+########################################################################
+    #Plots are drawn on their own Figure/Agg canvas (agg=True) and saved
+    #with fig.savefig, never through pyplot, so the plots of a test can be
+    #rendered at the same time
+
+_renderpool = None #thread pool shared by all concurrent renders
+
+
+def RenderPool(workers=3):
+    """Thread pool used to render plots (one thread per plot of a test)"""
+    global _renderpool
+    if _renderpool is None:
+        from concurrent.futures import ThreadPoolExecutor
+        _renderpool = ThreadPoolExecutor(max_workers=workers)
+    return _renderpool
+
+
+def RenderPressHist(df, savename, ylim=None, norm=False,
+                        tests=['dry', 'wet'], cyls=[1, 2, 3, 4]):
+    """Plot pressure history on Agg figure and save it"""
+    ax = pc.PlotPressHist(df, ylim, norm, tests, cyls, agg=True)
+    pc.SavePlot(savename, fig=ax.figure)
+    return savename
+
+
+def RenderDryVsWetDelta(df, savename, ylim=None, norm=1, cyls=None):
+    """Plot wet - dry delta on Agg figure and save it"""
+    ax = pc.PlotDryVsWetDelta(df, ylim, norm, agg=True, cyls=cyls)
+    pc.SavePlot(savename, fig=ax.figure)
+    return savename
+
+
+def RenderTest(histdf, deltadf, drymax, name, ylim=None,
+                tests=['dry', 'wet'], cyls=[1, 2, 3, 4], pool=None):
+    """Render the three plots of a test at the same time.
+    histdf  --> test data with normalized pressure (before wet-dry fill)
+    deltadf --> test data with wet - dry deltas
+    drymax  --> max dry pressure of each cylinder (delta normalization)
+    name    --> name for current test
+    ylim    --> y-axis range of pressure history plot
+    pool    --> executor to render on (default: shared thread pool,
+                    a process pool also works)
+    Returns:
+    paths of saved plots
+    """
+    #Set plot styles once before any thread plots
+    pc.InitPlotting()
+    if pool is None:
+        pool = RenderPool()
+    savenames = pc.SaveNames(name)
+    futures = [
+        pool.submit(RenderPressHist, histdf, savenames[0],
+                    ylim, False, tests, cyls),
+        pool.submit(RenderPressHist, histdf, savenames[1],
+                    None, True, tests, cyls),
+        pool.submit(RenderDryVsWetDelta, deltadf, savenames[2],
+                    None, drymax, cyls),
+        ]
+    return [f.result() for f in futures]
+
+
+########################################################################
+### FLEET OVERVIEW #####################################################
+########################################################################
+    #Many tests on a few large small-multiple figures (one panel per
+    #test) instead of three figures per test.  Data of the whole fleet is
+    #analyzed in one vectorized pass (see compAnalysis), and each page is
+    #one Figure/Agg canvas with shared axes and a single legend
+
+OVERVIEWS = ['presshist', 'delta', 'percdiff'] #kinds of fleet overview
+
+
+def FleetFigure(nrows, ncols, xlbl, ylbl, panelsize=3.5):
+    """Start page of fleet overview with shared axes (Agg canvas, no pyplot)
+    Returns:
+    figure, 2D array of axes [row, col]
+    """
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    fig = Figure(figsize=[ncols*panelsize, nrows*panelsize])
+    FigureCanvasAgg(fig)
+    axes = fig.subplots(nrows, ncols, sharex=True, sharey=True,
+                        squeeze=False)
+    fig.subplots_adjust(left=0.07, right=0.98, bottom=0.07, top=0.92,
+                        wspace=0.05, hspace=0.2)
+    size = pc.lplot.font_lbl['size']
+    fig.supxlabel(xlbl, fontsize=size)
+    fig.supylabel(ylbl, fontsize=size)
+    for ax in axes.flat:
+        ax.grid(True)
+        ax.tick_params(labelsize=pc.lplot.font_tck // 2)
+        #Only outer panels have tick labels (axes are shared)
+        ax.label_outer()
+    return fig, axes
+
+
+def FleetData(fleet, thresh=15, tests=['dry', 'wet'], ncyl=4):
+    """Analyze whole fleet at once for overview plots.
+    fleet --> dictionary of test dataframes or compTest.CompressionTest
+                keyed by test name
+    Returns:
+    list of test names, dictionary of fleet arrays:
+        'pres'  --> pressure [test, test type, cylinder, stroke]
+        'delta' --> wet - dry delta / max dry pressure [test, cyl, stroke]
+        and CalcMaxima results ('max', 'percdiff', 'fail', ...)
+    """
+    from compAnalysis import (TestArray, StackTests, CalcMaxima, FillLast,
+                                CalcDelta)
+    names = list(fleet.keys())
+    data = StackTests([TestArray(fleet[name], tests, ncyl)
+                        for name in names])
+    dry = tests.index('dry')
+    result = CalcMaxima(data, thresh, ref=dry)
+    result['pres'] = data
+    if 'wet' in tests:
+        delta = CalcDelta(FillLast(data), dry)[:, tests.index('wet')]
+        result['delta'] = delta / result['max'][:, dry, :, None]
+    else:
+        result['delta'] = np.full(data[:, dry].shape, np.nan)
+    return names, result
+
+
+def _PlotPanel(ax, kind, k, name, result, tests, thresh):
+    """Plot test k of fleet on its overview panel.
+    Returns:
+    line/bar handles and labels for legend
+    """
+    colors = pc.colors
+    ncyl = result['max'].shape[-1]
+    stroke = np.arange(1, result['pres'].shape[-1]+1, 1)
+    cylcolors = [colors[j % len(colors)] for j in range(ncyl)]
+    handles = []
+    labels = []
+    if kind == 'presshist':
+        testmarkers = ['o', '.', 's', '^', 'v', 'D'] #marker of each test type
+        for i, test in enumerate(tests):
+            marker = testmarkers[i % len(testmarkers)]
+            for j in range(ncyl):
+                h, = ax.plot(stroke, result['pres'][k, i, j],
+                                color=cylcolors[j], linestyle='-',
+                                marker=marker, markersize=4, linewidth=1)
+                handles.append(h)
+                labels.append('{}{}'.format(j+1, test))
+    elif kind == 'delta':
+        for j in range(ncyl):
+            h, = ax.plot(stroke, result['delta'][k, j], color=cylcolors[j],
+                            linestyle='-', marker='o', markersize=4,
+                            linewidth=1)
+            handles.append(h)
+            labels.append(str(j+1))
+    else:
+        fail = result['fail'][k]
+        ax.bar(np.arange(1, ncyl+1, 1), result['percdiff'][k],
+                color=cylcolors,
+                edgecolor=['red' if f else 'none' for f in fail],
+                linewidth=2)
+        h = ax.axhline(-thresh, color='red', linestyle='--', linewidth=1)
+        handles.append(h)
+        labels.append('-{}%'.format(thresh))
+    color = 'red' if result['fail'][k].any() else 'black'
+    ax.set_title(str(name), fontsize=pc.lplot.font_tck // 2, color=color)
+    return handles, labels
+
+
+def RenderFleetPage(kind, names, result, savename, page, npanel,
+                    nrows=4, ncols=5, ylim=None, tests=['dry', 'wet'],
+                    thresh=15):
+    """Render one page of fleet overview and save it
+    names, result --> tests to render from (e.g. only tests of page, with
+                        page 0) and their fleet data (see FleetData)
+    """
+    pc.InitPlotting() #(if rendered in another process)
+    ylbl = {'presshist' : 'Cylinder Pressure [psi]',
+            'delta' : 'Norm. Wet - Dry',
+            'percdiff' : 'Diff. from Max Cyl. [%]'}[kind]
+    xlbl = 'Cylinder' if kind == 'percdiff' else 'Engine Stroke'
+    fig, axes = FleetFigure(nrows, ncols, xlbl, ylbl)
+    first = page * npanel
+    for p, ax in enumerate(axes.flat):
+        k = first + p
+        if k >= len(names):
+            ax.set_visible(False)
+            continue
+        handles, labels = _PlotPanel(ax, kind, k, names[k], result,
+                                        tests, thresh)
+        if p == 0:
+            #Single legend shared by all panels
+            fig.legend(handles, labels, loc='upper center',
+                        ncol=min(len(labels), 8),
+                        prop={'size' : pc.lplot.font_leg // 2})
+    if kind == 'percdiff':
+        axes[0, 0].set_xticks(np.arange(1, result['max'].shape[-1]+1, 1))
+    else:
+        nstroke = result['pres'].shape[-1]
+        axes[0, 0].set_xlim([0, nstroke])
+        axes[0, 0].set_xticks(np.arange(1, nstroke+1, 2.0))
+    if ylim is not None:
+        axes[0, 0].set_ylim(ylim)
+    #Layout is fixed by FleetFigure, so save without tight bbox (which
+    #draws the figure twice)
+    with Stage('saveplot', path=savename):
+        pc.lplot.MakeOutputDir(pc.lplot.GetParentDir(savename))
+        fig.savefig(savename)
+    return savename
+
+
+def RenderFleetOverlay(result, savename, ylim=None, tests=['dry', 'wet']):
+    """Render pressure history of every cylinder of fleet on one plot and
+    save it (see plotCompression.PlotPressOverlay)
+    """
+    ax = pc.PlotPressOverlay(result['pres'], ylim=ylim, tests=tests, agg=True)
+    pc.SavePlot(savename, fig=ax.figure)
+    return savename
+
+
+def FleetOverview(fleet, kinds=OVERVIEWS, ylim=None, thresh=15,
+                    tests=['dry', 'wet'], ncyl=4, nrows=4, ncols=5,
+                    savename='Results/FleetOverview_{kind}_{page}.png',
+                    pool=None):
+    """Render overview of a whole fleet on pages of small multiples.
+    fleet    --> dictionary of test dataframes or compTest.CompressionTest
+                    keyed by test name
+    kinds    --> overviews to render: 'presshist' (pressure histories),
+                    'delta' (normalized wet - dry delta),
+                    'percdiff' (percent difference bars of each cylinder),
+                    'overlay' (pressure histories of all tests on one plot)
+    ylim     --> y-axis range of pressure history overviews
+    nrows, ncols --> panels on each page
+    savename --> path of each page (formatted with kind and page number)
+    pool     --> executor to render pages on (default: shared thread pool,
+                    a process pool renders pages in parallel)
+    Returns:
+    paths of saved pages
+    """
+    pc.InitPlotting()
+    if pool is None:
+        pool = RenderPool()
+    names, result = FleetData(fleet, thresh, tests, ncyl)
+    npanel = nrows * ncols
+    npage = max(1, -(-len(names) // npanel))
+    #Only tests of each page are sent to (and pickled for) page renderers
+    pages = [(names[page*npanel:(page+1)*npanel],
+                {key : val[page*npanel:(page+1)*npanel]
+                    for key, val in result.items()})
+                for page in range(npage)]
+    futures = []
+    for kind in kinds:
+        if kind == 'overlay':
+            futures.append(pool.submit(RenderFleetOverlay, result,
+                            savename.format(kind=kind, page=1), ylim, tests))
+            continue
+        for page, (pagenames, pageresult) in enumerate(pages):
+            path = savename.format(kind=kind, page=page+1)
+            futures.append(pool.submit(RenderFleetPage, kind, pagenames,
+                            pageresult, path, 0, npanel, nrows, ncols,
+                            ylim if kind == 'presshist' else None,
+                            tests, thresh))
+    return [f.result() for f in futures]
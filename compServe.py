@@ -0,0 +1,347 @@
+"""COMPRESSION TEST ANALYSIS SERVICE
+Logan Halstrom
+CREATED: 17 OCT 2026
+
+DESCRIPTION:  Local HTTP service that runs plotCompression.main on uploaded
+compression test data files (or Excel workbooks of many tests, see
+compExcel) and returns the pass/fail verdict as JSON, with links to the
+rendered plots.  Analysis and plotting run on a bounded process pool
+(matplotlib is never imported by the server itself), so many uploads can be
+handled at once while request threads only wait on results.
+
+Results are keyed by the content hash of the uploaded file and the analysis
+settings, so identical uploads are analyzed only once: later uploads (or
+uploads still running) get the same result.  Results are kept on disk and
+survive restarts of the service.
+
+Endpoints:
+    POST /analyze?name=NAME[&thresh=15&ylim=50,275&ncyl=4&tests=dry,wet]
+            --> upload data file or .xlsx workbook (request body),
+                returns result JSON
+    GET  /results/KEY --> result JSON of a previous upload
+    GET  /plots/FILE  --> rendered plot
+
+USAGE:
+python compServe.py --port 8050 -j 2 --ylim 50 275
+curl --data-binary @Data/CompTest_2017-02-11_1st_1999Camry.dat \
+    'http://localhost:8050/analyze?name=2017-02-11_1st_1999Camry'
+"""
+
+import io
+import os
+import json
+import argparse
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs, quote
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+
+from compCache import ContentHash
+from compManifest import TestInputs
+from compBatch import _InitWorker, _RunOne
+from plotCompression import SaveNames, PALETTE
+
+RESULTS = 'Results'                         #plot output directory of main
+SERVEDIR = os.path.join(RESULTS, 'serve')   #uploads and result JSON
+MAXUPLOAD = 16 * 1024 * 1024                #largest accepted upload [bytes]
+
+
+class AnalysisService(object):
+    """Pool of analysis workers with content-hash result cache"""
+
+    def __init__(self, workers=2, maxpending=64, ylim=None, thresh=15,
+                    tests=['dry', 'wet'], ncyl=4, plot=True,
+                    servedir=SERVEDIR, timeout=300):
+        """workers    --> number of analysis processes
+        maxpending --> most uploads queued or running at once (more are
+                        refused as busy)
+        (ylim, thresh, tests, ncyl, plot --> default settings, see main)
+        servedir   --> directory of uploaded files and results
+        timeout    --> longest wait for a result [s]
+        """
+        self.defaults = {'ylim' : ylim, 'thresh' : thresh, 'tests' : tests,
+                            'ncyl' : ncyl, 'plot' : plot, 'verbose' : False}
+        self.servedir = servedir
+        self.timeout = timeout
+        self.maxpending = maxpending
+        self.pool = ProcessPoolExecutor(max_workers=workers,
+                        initializer=_InitWorker, initargs=(plot,))
+        self.jobs = {} #running jobs keyed by result key
+        self.lock = threading.Lock()
+        os.makedirs(servedir, exist_ok=True)
+
+    def Settings(self, query):
+        """Analysis settings of upload from query string values"""
+        kwargs = dict(self.defaults)
+        if 'thresh' in query:
+            kwargs['thresh'] = float(query['thresh'])
+        if 'ncyl' in query:
+            kwargs['ncyl'] = int(query['ncyl'])
+        if 'tests' in query:
+            kwargs['tests'] = query['tests'].split(',')
+        if 'ylim' in query:
+            ylim = [float(y) for y in query['ylim'].split(',')]
+            if len(ylim) != 2:
+                raise ValueError('ylim must be ymin,ymax')
+            kwargs['ylim'] = ylim
+        if 'plot' in query:
+            kwargs['plot'] = (self.defaults['plot']
+                                and query['plot'] not in ['0', 'false'])
+        return kwargs
+
+    def ResultPath(self, key):
+        """Path of stored result JSON"""
+        return os.path.join(self.servedir, key + '.json')
+
+    def Stored(self, key):
+        """Stored result of key (None if not analyzed yet)"""
+        try:
+            with open(self.ResultPath(key)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def Start(self, text, kwargs):
+        """Queue analysis of uploaded data file, unless an identical upload
+        is already analyzed or running.
+        text   --> contents of data file
+        kwargs --> analysis settings (see Settings)
+        Returns:
+        result key, stored result (or None), running job (or None),
+        True if result or job of identical upload was reused
+        """
+        inputs = TestInputs(kwargs, PALETTE)
+        key = ContentHash(text + json.dumps(inputs, sort_keys=True)
+                                    .encode())[:16]
+        with self.lock:
+            result = self.Stored(key)
+            if result is not None:
+                return key, result, None, True
+            job = self.jobs.get(key)
+            if job is not None:
+                return key, None, job, True
+            npending = sum(not j.done() for j in self.jobs.values())
+            if npending >= self.maxpending:
+                raise BusyError('{} uploads already pending'.format(
+                                                                npending))
+            path = os.path.join(self.servedir, key + '.dat')
+            with open(path, 'wb') as f:
+                f.write(text)
+            #Plots are named by key, so uploads never overwrite each other
+            job = self.pool.submit(_RunOne,
+                                    ('_' + key, path, kwargs, False, True,
+                                        False))
+            self.jobs[key] = job
+            return key, None, job, False
+
+    def Finish(self, key, job, kwargs):
+        """Wait for analysis job and store its result.
+        Returns:
+        result dictionary
+        """
+        try:
+            _, _, maxima, _, error = job.result(timeout=self.timeout)
+            if error is not None:
+                raise AnalysisError(error)
+        except TimeoutError:
+            raise
+        except Exception:
+            #Data file could not be analyzed, do not keep upload
+            with self.lock:
+                self.jobs.pop(key, None)
+            try:
+                os.remove(os.path.join(self.servedir, key + '.dat'))
+            except OSError:
+                pass
+            raise
+
+        result = {'key' : key, 'settings' : TestInputs(kwargs, PALETTE),
+                    'maxima' : maxima.to_dict(orient='records')}
+        fail = maxima['cyl'][maxima['percdiff'] < -kwargs['thresh']]
+        result['fail'] = [int(cyl) for cyl in fail]
+        result['verdict'] = 'fail' if result['fail'] else 'pass'
+        result['plots'] = ['/plots/' + quote(os.path.basename(path))
+                            for path in SaveNames('_' + key)
+                            if kwargs['plot'] and os.path.isfile(path)]
+        with self.lock:
+            #Stored before job is dropped, so identical uploads never rerun
+            if self.jobs.get(key) is job:
+                tmp = '{}.tmp'.format(self.ResultPath(key))
+                with open(tmp, 'w') as f:
+                    json.dump(result, f, indent=1)
+                os.replace(tmp, self.ResultPath(key))
+                self.jobs.pop(key)
+        return result
+
+    def Submit(self, text, name, kwargs):
+        """Analyze uploaded data file, or reuse result of identical upload.
+        text   --> contents of data file
+        name   --> test name (only reported, results are keyed by content)
+        kwargs --> analysis settings (see Settings)
+        Returns:
+        result dictionary, True if result was reused
+        """
+        key, result, job, reused = self.Start(text, kwargs)
+        if result is None:
+            result = self.Finish(key, job, kwargs)
+        return dict(result, name=name), reused
+
+    def SubmitWorkbook(self, text, name, kwargs):
+        """Analyze every test sheet of uploaded Excel workbook (see compExcel)
+        at once.  Each sheet is cached like an uploaded data file.
+        Returns:
+        result dictionary with result of each test, True if all results
+        were reused
+        """
+        from compExcel import ParseWorkbook, SheetNames, SplitSheets
+        from compSynth import FormatCompTest
+        tests = kwargs['tests']
+        data = ParseWorkbook(text, 2 + len(tests) * kwargs['ncyl'],
+                                tuple(tests))
+        sheets = SplitSheets(data, SheetNames(io.BytesIO(text)),
+                                name + '.xlsx')
+        started = [(sheet, self.Start(FormatCompTest(sheetdata).encode(),
+                                        kwargs))
+                    for sheet, sheetdata in sheets.items()]
+        results = []
+        for sheet, (key, result, job, reused) in started:
+            if result is None:
+                result = self.Finish(key, job, kwargs)
+            results.append(dict(result, name=sheet))
+        fail = any(result['fail'] for result in results)
+        return ({'name' : name, 'tests' : results,
+                    'verdict' : 'fail' if fail else 'pass'},
+                all(s[1][3] for s in started))
+
+    def Close(self):
+        """Stop analysis workers"""
+        self.pool.shutdown(cancel_futures=True)
+
+
+class BusyError(Exception):
+    """Too many uploads pending"""
+
+
+class AnalysisError(Exception):
+    """Uploaded data file could not be analyzed"""
+
+
+class AnalysisHandler(BaseHTTPRequestHandler):
+    """HTTP requests of analysis service (service set by Serve)"""
+
+    service = None
+
+    def SendJson(self, obj, status=200):
+        """Send JSON response"""
+        body = json.dumps(obj, indent=1).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def SendFile(self, path, ctype='image/png'):
+        """Send file response (404 if missing)"""
+        try:
+            with open(path, 'rb') as f:
+                body = f.read()
+        except OSError:
+            return self.SendJson({'error' : 'not found'}, 404)
+        self.send_response(200)
+        self.send_header('Content-Type', ctype)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        parts = url.path.strip('/').split('/')
+        if len(parts) == 2 and parts[0] == 'results':
+            result = self.service.Stored(os.path.basename(parts[1]))
+            if result is None:
+                return self.SendJson({'error' : 'no such result'}, 404)
+            return self.SendJson(result)
+        if len(parts) == 2 and parts[0] == 'plots':
+            #basename: never serve files outside of results directory
+            return self.SendFile(os.path.join(RESULTS,
+                                                os.path.basename(parts[1])))
+        self.SendJson({'usage' : 'POST data file to /analyze?name=NAME'},
+                        404 if url.path not in ['', '/'] else 200)
+
+    def do_POST(self):
+        url = urlsplit(self.path)
+        if url.path != '/analyze':
+            return self.SendJson({'error' : 'not found'}, 404)
+        query = {k : v[-1] for k, v in parse_qs(url.query).items()}
+        size = int(self.headers.get('Content-Length', 0))
+        if size <= 0:
+            return self.SendJson({'error' : 'empty upload'}, 400)
+        if size > MAXUPLOAD:
+            return self.SendJson({'error' : 'upload too large'}, 413)
+        text = self.rfile.read(size)
+        try:
+            kwargs = self.service.Settings(query)
+            #Excel workbooks are zip files
+            submit = (self.service.SubmitWorkbook
+                        if text.startswith(b'PK\x03\x04')
+                        else self.service.Submit)
+            result, reused = submit(text, query.get('name', 'upload'), kwargs)
+        except BusyError as e:
+            return self.SendJson({'error' : 'busy: {}'.format(e)}, 503)
+        except TimeoutError:
+            return self.SendJson({'error' : 'analysis timed out'}, 504)
+        except AnalysisError as e:
+            return self.SendJson({'error' : str(e)}, 400)
+        except Exception as e:
+            #Bad settings or data file that cannot be analyzed
+            return self.SendJson({'error' : '{}: {}'.format(
+                                        type(e).__name__, e)}, 400)
+        self.SendJson(dict(result, cached=reused))
+
+
+def Serve(service, port=8050, host='localhost'):
+    """Run analysis service until interrupted"""
+    AnalysisHandler.service = service
+    server = ThreadingHTTPServer((host, port), AnalysisHandler)
+    server.daemon_threads = True
+    print('Serving compression test analysis on http://{}:{}'.format(
+                                                                host, port))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.Close()
+
+
+def ParseArgs(args=None):
+    """Parse command line arguments for analysis service"""
+    parser = argparse.ArgumentParser(
+                description='Local HTTP compression test analysis service')
+    parser.add_argument('--port', type=int, default=8050,
+                help='port to serve on')
+    parser.add_argument('--host', default='localhost',
+                help='address to serve on')
+    parser.add_argument('-j', '--workers', type=int, default=2,
+                help='number of analysis processes')
+    parser.add_argument('--maxpending', type=int, default=64,
+                help='most uploads queued or running at once')
+    parser.add_argument('--ylim', type=float, nargs=2, default=None,
+                metavar=('YMIN', 'YMAX'), help='default pressure plot range')
+    parser.add_argument('--thresh', type=float, default=15,
+                help='default percentage threshold for poor cylinders')
+    parser.add_argument('--ncyl', type=int, default=4,
+                help='default number of cylinders in engine')
+    parser.add_argument('--noplot', action='store_true',
+                help='analysis only, no plots')
+    return parser.parse_args(args)
+
+
+if __name__ == "__main__":
+
+    args = ParseArgs()
+    Serve(AnalysisService(args.workers, args.maxpending, args.ylim,
+                            args.thresh, ncyl=args.ncyl,
+                            plot=not args.noplot),
+            args.port, args.host)
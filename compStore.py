@@ -0,0 +1,218 @@
+"""COMPRESSION TEST RESULTS DATABASE
+Logan Halstrom
+CREATED: 17 OCT 2026
+
+DESCRIPTION:  Local SQLite database of compression test results, so tests of
+the same vehicle can be compared over time without re-running them.  Each
+test is indexed by vehicle, date, run number and variant parsed from the
+data file name convention:
+    CompTest_<date>_<nth>_<variant>_<vehicle>.dat  (variant is optional)
+e.g. CompTest_2017-01-07_2nd_Low3_1999Camry.dat
+Maxima/percent difference of each cylinder and the pressure history of each
+cylinder in each test type are stored with every test.
+
+USAGE:
+python compStore.py Results/results.db trend 1999Camry 3 --column drymax
+python compStore.py Results/results.db failing 2017-02-01 2017-03-01
+"""
+
+import os
+import re
+import sqlite3
+import argparse
+
+import numpy as np
+import pandas as pd
+
+STORE = 'Results/results.db' #default database path
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS tests (
+    id INTEGER PRIMARY KEY,
+    name TEXT UNIQUE NOT NULL,
+    path TEXT,
+    vehicle TEXT,
+    date TEXT,
+    run INTEGER,
+    variant TEXT,
+    thresh REAL,
+    ncyl INTEGER,
+    nfail INTEGER
+);
+CREATE INDEX IF NOT EXISTS tests_vehicle ON tests (vehicle, date, run);
+CREATE INDEX IF NOT EXISTS tests_date ON tests (date);
+CREATE INDEX IF NOT EXISTS tests_failing ON tests (date) WHERE nfail > 0;
+CREATE TABLE IF NOT EXISTS cylinders (
+    test_id INTEGER NOT NULL REFERENCES tests (id) ON DELETE CASCADE,
+    cyl INTEGER NOT NULL,
+    drymax REAL,
+    wetmax REAL,
+    diff REAL,
+    percdiff REAL,
+    fail INTEGER,
+    PRIMARY KEY (test_id, cyl)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS cylinders_cyl ON cylinders (cyl, test_id);
+CREATE TABLE IF NOT EXISTS histories (
+    test_id INTEGER NOT NULL REFERENCES tests (id) ON DELETE CASCADE,
+    test TEXT NOT NULL,
+    cyl INTEGER NOT NULL,
+    pressure BLOB,
+    PRIMARY KEY (test_id, test, cyl)
+) WITHOUT ROWID;
+'''
+
+#CompTest_<date>_<nth>_<variant>_<vehicle>
+NAMEPATTERN = re.compile(r'^(?:CompTest_)?(?P<date>\d{4}-\d{2}-\d{2})'
+                            r'_(?P<run>\d+)(?:st|nd|rd|th)'
+                            r'(?:_(?P<variant>.+))?_(?P<vehicle>[^_]+)$')
+
+
+def ParseTestName(path):
+    """Get vehicle, date, run number and variant from data file name.
+    path --> data file path or test name (e.g. '2017-01-07_2nd_Low3_1999Camry')
+    Returns:
+    dictionary of test attributes (all None if name does not match)
+    """
+    name = os.path.splitext(os.path.basename(str(path)))[0]
+    match = NAMEPATTERN.match(name)
+    if match is None:
+        return {'vehicle' : None, 'date' : None, 'run' : None,
+                'variant' : None}
+    info = match.groupdict()
+    info['run'] = int(info['run'])
+    return info
+
+
+def OpenStore(path=STORE):
+    """Open (and create if needed) results database"""
+    parent = os.path.dirname(path)
+    if parent != '':
+        os.makedirs(parent, exist_ok=True)
+    conn = sqlite3.connect(path)
+    conn.execute('PRAGMA foreign_keys = ON')
+    conn.execute('PRAGMA journal_mode = WAL')
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def HasTest(conn, name):
+    """True if test is already stored"""
+    return conn.execute('SELECT 1 FROM tests WHERE name = ?',
+                        (str(name),)).fetchone() is not None
+
+
+def StoreTest(conn, name, path, data, maxima, thresh=15,
+                tests=['dry', 'wet']):
+    """Store (or replace) results of a single test.  Not committed.
+    conn   --> database connection from OpenStore
+    name   --> name of test
+    path   --> path to data file (attributes are parsed from its name)
+    data   --> pressure histories [test type, cylinder, stroke]
+                    (e.g. compAnalysis.TestArray of unfilled data)
+    maxima --> maxima dataframe of test (from main)
+    thresh --> percentage threshold for poor cylinder performance
+    tests  --> test types in order of the test type axis of data
+    """
+    info = ParseTestName(path)
+    fail = (maxima['percdiff'] < -thresh).to_numpy()
+    conn.execute('DELETE FROM tests WHERE name = ?', (str(name),))
+    cur = conn.execute(
+        'INSERT INTO tests (name, path, vehicle, date, run, variant, thresh,'
+        ' ncyl, nfail) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+        (str(name), path, info['vehicle'], info['date'], info['run'],
+            info['variant'], thresh, len(maxima), int(fail.sum())))
+    testid = cur.lastrowid
+
+    wetmax = (maxima['wetmax'] if 'wetmax' in maxima
+                else pd.Series(np.nan, index=maxima.index))
+    conn.executemany(
+        'INSERT INTO cylinders VALUES (?, ?, ?, ?, ?, ?, ?)',
+        [(testid, int(c), float(d), float(w), float(f), float(p), int(x))
+            for c, d, w, f, p, x in zip(maxima['cyl'], maxima['drymax'],
+                                        wetmax, maxima['diff'],
+                                        maxima['percdiff'], fail)])
+    conn.executemany(
+        'INSERT INTO histories VALUES (?, ?, ?, ?)',
+        [(testid, test, j+1, np.ascontiguousarray(data[i, j],
+                                                    dtype=np.float64).tobytes())
+            for i, test in enumerate(tests) for j in range(data.shape[1])])
+    return testid
+
+
+def _Query(conn, sql, params=()):
+    """Run query and return results as dataframe"""
+    cur = conn.execute(sql, params)
+    cols = [c[0] for c in cur.description]
+    return pd.DataFrame(cur.fetchall(), columns=cols)
+
+
+def CylinderTrend(conn, vehicle, cyl, column='drymax'):
+    """Trend of one cylinder of a vehicle over all of its tests.
+    vehicle --> vehicle name from data file name (e.g. '1999Camry')
+    cyl     --> cylinder number
+    column  --> cylinder result ('drymax', 'wetmax', 'diff', 'percdiff')
+    Returns:
+    dataframe of test name, date, run, variant and value, oldest first
+    """
+    if column not in ['drymax', 'wetmax', 'diff', 'percdiff', 'fail']:
+        raise ValueError('Unknown cylinder result: {}'.format(column))
+    return _Query(conn,
+        'SELECT t.name, t.date, t.run, t.variant, c.{} AS value'
+        ' FROM tests t JOIN cylinders c ON c.test_id = t.id'
+        ' WHERE t.vehicle = ? AND c.cyl = ?'
+        ' ORDER BY t.date, t.run'.format(column), (vehicle, cyl))
+
+
+def FailingTests(conn, start=None, end=None):
+    """Tests with any cylinder below threshold in a date range.
+    start --> first date (e.g. '2017-02-01', None for no limit)
+    end   --> date after last date (e.g. '2017-03-01', None for no limit)
+    Returns:
+    dataframe of failing tests with their failing cylinders
+    """
+    return _Query(conn,
+        'SELECT t.name, t.vehicle, t.date, t.run, t.variant, c.cyl,'
+        ' c.percdiff FROM tests t JOIN cylinders c ON c.test_id = t.id'
+        ' WHERE t.nfail > 0 AND t.date >= ? AND t.date < ? AND c.fail'
+        ' ORDER BY t.date, t.run, c.cyl',
+        (start or '', end or '9999'))
+
+
+def TestHistory(conn, name):
+    """Stored pressure histories of a test.
+    name --> name of test
+    Returns:
+    dictionary of pressure history arrays keyed by data key (e.g. '3dry')
+    """
+    rows = conn.execute(
+        'SELECT h.test, h.cyl, h.pressure FROM histories h'
+        ' JOIN tests t ON h.test_id = t.id WHERE t.name = ?', (str(name),))
+    return {'{}{}'.format(cyl, test) : np.frombuffer(blob, dtype=np.float64)
+                for test, cyl, blob in rows}
+
+
+def ParseArgs(args=None):
+    """Parse command line arguments for results queries"""
+    parser = argparse.ArgumentParser(
+                description='Query compression test results database')
+    parser.add_argument('db', help='results database')
+    sub = parser.add_subparsers(dest='query', required=True)
+    trend = sub.add_parser('trend', help='trend of a cylinder of a vehicle')
+    trend.add_argument('vehicle')
+    trend.add_argument('cyl', type=int)
+    trend.add_argument('--column', default='drymax')
+    failing = sub.add_parser('failing', help='failing tests in date range')
+    failing.add_argument('start', nargs='?', default=None)
+    failing.add_argument('end', nargs='?', default=None)
+    return parser.parse_args(args)
+
+
+if __name__ == "__main__":
+
+    args = ParseArgs()
+    conn = OpenStore(args.db)
+    if args.query == 'trend':
+        print(CylinderTrend(conn, args.vehicle, args.cyl, args.column))
+    else:
+        print(FailingTests(conn, args.start, args.end))
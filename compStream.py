@@ -0,0 +1,366 @@
+"""COMPRESSION TEST LIVE STREAMING INGEST
+Logan Halstrom
+CREATED: 17 OCT 2026
+
+DESCRIPTION:  Read compression test pressures as they are measured (e.g. by a
+pressure transducer instead of filming a gauge) from a serial port or socket.
+Each sample is a line of text:
+    <test>,<cyl>,<pressure>      (e.g. 'dry,3,145')
+giving the pressure of the next engine stroke of one cylinder.  The last
+strokes of each cylinder are kept in a fixed-size ring buffer, and the
+maxima, normalized pressures and pass/fail verdict (same as CalcMaxima) are
+updated with every sample.  A live pressure history plot (like
+PlotPressHist) is redrawn by blitting only the data lines.
+
+SimulatorSource makes samples from synthetic tests (compSynth), so the
+whole pipeline can be run without hardware.
+
+USAGE:
+python compStream.py --simulate
+python compStream.py --serial /dev/ttyUSB0 --baud 9600
+python compStream.py --serve 5555          (simulator on local socket)
+python compStream.py --socket localhost:5555
+"""
+
+import time
+import socket
+import argparse
+import warnings
+
+import numpy as np
+
+from compAnalysis import MaximaTable
+
+
+def ParseSample(line):
+    """Parse a sample line (e.g. b'dry,3,145').
+    Returns:
+    (test, cyl, pressure), None for blank or malformed lines (including
+    cylinder numbers below 1 and non-finite pressures)
+    """
+    if isinstance(line, bytes):
+        line = line.decode('ascii', 'replace')
+    fields = line.strip().split(',')
+    if len(fields) != 3:
+        return None
+    try:
+        test = fields[0].strip()
+        cyl = int(fields[1])
+        pressure = float(fields[2])
+    except ValueError:
+        return None
+    if cyl < 1 or not np.isfinite(pressure):
+        return None
+    return test, cyl, pressure
+
+
+def FormatSample(test, cyl, pressure):
+    """Format sample as a line of text (inverse of ParseSample)"""
+    return '{},{},{:.1f}\n'.format(test, cyl, pressure).encode('ascii')
+
+
+class StreamState(object):
+    """Running pressure histories and pass/fail verdict of a streamed test.
+    The last nbuf strokes of each history are kept in a ring buffer
+    [test type, cylinder, stroke].  Maxima include every stroke received.
+    """
+
+    def __init__(self, tests=['dry', 'wet'], ncyl=4, nbuf=32, thresh=15):
+        """tests  --> test types in order of the test type axis
+        ncyl   --> number of cylinders in engine
+        nbuf   --> number of strokes kept of each history
+        thresh --> percentage threshold for poor cylinder performance
+        """
+        self.tests = list(tests)
+        self.ncyl = ncyl
+        self.nbuf = nbuf
+        self.thresh = thresh
+        self.ref = self.tests.index('dry')
+        self.buf = np.full((len(tests), ncyl, nbuf), np.nan)
+        self.count = np.zeros((len(tests), ncyl), dtype=int)
+        self.max = np.full((len(tests), ncyl), np.nan)
+        self.diff = np.full(ncyl, np.nan)
+        self.percdiff = np.full(ncyl, np.nan)
+        self.fail = np.zeros(ncyl, dtype=bool)
+
+    def Add(self, test, cyl, pressure):
+        """Add pressure of next stroke of a cylinder and update verdict.
+        Samples of unknown test types or cylinders are skipped with a
+        warning, so one bad sample does not end a live stream.
+        Returns:
+        True if pass/fail verdict of any cylinder changed
+        """
+        if test not in self.tests or not 1 <= cyl <= self.ncyl:
+            warnings.warn('Skipped sample of unknown test/cylinder: '
+                            '{},{},{}'.format(test, cyl, pressure))
+            return False
+        i = self.tests.index(test)
+        j = cyl - 1
+        self.buf[i, j, self.count[i, j] % self.nbuf] = pressure
+        self.count[i, j] += 1
+        if not pressure <= self.max[i, j]:
+            #New maximum (or first stroke)
+            self.max[i, j] = pressure
+            if i == self.ref:
+                return self._Verdict()
+        return False
+
+    def _Verdict(self):
+        """Fractional/percent difference of each cylinder from the max
+        cylinder of the reference (dry) test, and threshold failures
+        """
+        refmax = self.max[self.ref]
+        maxcyl = np.fmax.reduce(refmax)
+        self.diff = (refmax - maxcyl) / maxcyl
+        self.percdiff = self.diff * 100
+        fail = self.percdiff < -self.thresh
+        changed = np.any(fail != self.fail)
+        self.fail = fail
+        return changed
+
+    def History(self, i, j):
+        """Pressure history of cylinder j (index) in test type i (index)
+        held in ring buffer, oldest first.
+        Returns:
+        engine stroke numbers, pressures
+        """
+        n = self.count[i, j]
+        if n <= self.nbuf:
+            pres = self.buf[i, j, :n]
+        else:
+            pres = np.roll(self.buf[i, j], -(n % self.nbuf))
+        return np.arange(n - len(pres) + 1, n + 1), pres
+
+    def Norm(self, i, j):
+        """Pressure history normalized by its maximum (see History)"""
+        stroke, pres = self.History(i, j)
+        return stroke, pres / self.max[i, j]
+
+    def Maxima(self):
+        """Current maxima dataframe (same as main returns)"""
+        return MaximaTable({'max' : self.max, 'diff' : self.diff,
+                            'percdiff' : self.percdiff}, self.tests)
+
+
+class LiveView(object):
+    """Live pressure history plot of a streamed test (like PlotPressHist).
+    The axes are drawn once and saved as a background; each update only
+    restores the background and redraws the data lines and verdict text.
+    """
+
+    def __init__(self, state, ylim=[0, 275], norm=False):
+        """state --> StreamState to plot
+        ylim  --> boundaries of y-axis (fixed, so axes need not be redrawn)
+        norm  --> plot normalized pressures instead
+        """
+        import pandas as pd
+        import plotCompression as pc
+        self.state = state
+        self.norm = norm
+        cyls = np.arange(1, state.ncyl+1, 1)
+
+        #Build plot with empty data, lines are in order of test, cyl
+        stroke = np.arange(1, state.nbuf+1, 1)
+        keys = ['{}{}{}'.format(c, t, 'norm' if norm else '')
+                    for t in state.tests for c in cyls]
+        df = pd.DataFrame({key : np.nan for key in keys}, index=stroke - 1)
+        df['Stroke'] = stroke
+        self.ax = pc.PlotPressHist(df, None if norm else ylim, norm,
+                                    state.tests, cyls)
+        if norm:
+            self.ax.set_ylim([0, 1.05])
+        self.fig = self.ax.figure
+        self.lines = self.ax.get_lines()
+        self.text = self.ax.text(0.02, 0.98, '', transform=self.ax.transAxes,
+                                    va='top', ha='left')
+        for artist in self.lines + [self.text]:
+            artist.set_animated(True)
+
+        #Save background again whenever whole figure is redrawn (resize)
+        self.fig.canvas.mpl_connect('draw_event', self._SaveBackground)
+        pc.plt.show(block=False)
+        self.fig.canvas.draw()
+
+    def _SaveBackground(self, event=None):
+        """Save everything but the animated artists"""
+        self.background = self.fig.canvas.copy_from_bbox(self.fig.bbox)
+        self._DrawArtists()
+
+    def _DrawArtists(self):
+        """Draw data lines and verdict text"""
+        for artist in self.lines + [self.text]:
+            self.ax.draw_artist(artist)
+
+    def Update(self):
+        """Redraw data lines and verdict with current state"""
+        state = self.state
+        get = state.Norm if self.norm else state.History
+        nstroke = 0
+        for k, line in enumerate(self.lines):
+            i, j = divmod(k, state.ncyl)
+            stroke, pres = get(i, j)
+            line.set_data(stroke, pres)
+            if len(stroke):
+                nstroke = max(nstroke, stroke[-1])
+        self.text.set_text('\n'.join(
+            'Cyl {}: {:+.1f}% {}'.format(j+1, p, 'FAIL' if f else '')
+                for j, (p, f) in enumerate(zip(state.percdiff, state.fail))
+                if not np.isnan(p)))
+
+        if nstroke > self.ax.get_xlim()[1]:
+            #Strokes past end of axis, slide window and redraw axes
+            self.ax.set_xlim([nstroke - state.nbuf, nstroke])
+            self.ax.set_xticks(np.arange(nstroke - state.nbuf + 1,
+                                            nstroke + 1, 2.0))
+            self.fig.canvas.draw()
+        else:
+            self.fig.canvas.restore_region(self.background)
+            self._DrawArtists()
+            self.fig.canvas.blit(self.fig.bbox)
+        self.fig.canvas.flush_events()
+
+
+########################################################################
+### SAMPLE SOURCES #####################################################
+########################################################################
+
+def SerialSource(port, baudrate=9600, timeout=1.0):
+    """Samples read from serial port (requires pyserial).
+    Read timeouts give no samples, so the stream only ends when the port
+    is closed.
+    """
+    import serial
+    with serial.Serial(port, baudrate, timeout=timeout) as ser:
+        while ser.is_open:
+            sample = ParseSample(ser.readline())
+            if sample is not None:
+                yield sample
+
+
+def SocketSource(host='localhost', port=5555):
+    """Samples read from TCP socket, until the sender closes it"""
+    with socket.create_connection((host, port)) as sock:
+        with sock.makefile('rb') as f:
+            for line in f:
+                sample = ParseSample(line)
+                if sample is not None:
+                    yield sample
+
+
+def SimulatorSource(ncyl=4, tests=['dry', 'wet'], rate=20.0, seed=None):
+    """Samples of a synthetic compression test (see compSynth.SynthTest),
+    in the order they are measured: each cylinder is tested in turn, dry
+    test of every cylinder first.
+    rate --> samples per second (None for as fast as possible)
+    """
+    from compSynth import SynthTest
+    rng = np.random.default_rng(seed)
+    data = SynthTest(rng, ncyl, wet=any(test != 'dry' for test in tests))
+    #Pressures [stroke, cylinder] of each test type, repeated wet runs
+    #(e.g. 'wet2') are the wet run of the same engine read again
+    runs = {'dry' : data[:, 1:ncyl+1], 'wet' : data[:, ncyl+1:]}
+    for test in tests:
+        if test not in runs:
+            runs[test] = np.round(runs['wet']
+                                    + rng.normal(0, 1.5, runs['wet'].shape))
+    for test in tests:
+        for j in range(ncyl):
+            for pressure in runs[test][:, j]:
+                if np.isnan(pressure):
+                    break
+                if rate:
+                    time.sleep(1 / rate)
+                yield test, j+1, pressure
+
+
+def ServeSamples(samples, port=5555, host='localhost'):
+    """Send samples to the first client to connect to a TCP socket
+    (e.g. ServeSamples(SimulatorSource()) to test SocketSource)
+    """
+    with socket.create_server((host, port)) as server:
+        conn, _ = server.accept()
+        with conn:
+            for sample in samples:
+                conn.sendall(FormatSample(*sample))
+
+
+def Stream(source, state, view=None, interval=0.05):
+    """Add every sample of source to state and update live view.
+    source   --> iterable of (test, cyl, pressure) samples
+    state    --> StreamState to update
+    view     --> LiveView to update (None for no plot)
+    interval --> minimum time between plot updates [s]
+    Returns:
+    state
+    """
+    last = 0
+    for test, cyl, pressure in source:
+        changed = state.Add(test, cyl, pressure)
+        #Show changed verdict right away, otherwise limit redraw rate
+        if view is not None and (changed or
+                                    time.perf_counter() - last >= interval):
+            view.Update()
+            last = time.perf_counter()
+    if view is not None:
+        view.Update()
+    return state
+
+
+def ParseArgs(args=None):
+    """Parse command line arguments for streaming ingest"""
+    parser = argparse.ArgumentParser(
+                description='Live compression test from streamed pressures')
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--simulate', action='store_true',
+                help='stream a synthetic test')
+    source.add_argument('--serial', metavar='PORT',
+                help='serial port of pressure transducer')
+    source.add_argument('--socket', metavar='HOST:PORT',
+                help='TCP socket to read samples from')
+    source.add_argument('--serve', type=int, metavar='PORT',
+                help='send a synthetic test to a client of this port')
+    parser.add_argument('--baud', type=int, default=9600,
+                help='serial port baud rate')
+    parser.add_argument('--rate', type=float, default=20,
+                help='samples per second of simulator')
+    parser.add_argument('--tests', nargs='+', default=['dry', 'wet'],
+                help='types of tests performed')
+    parser.add_argument('--ncyl', type=int, default=4,
+                help='number of cylinders in engine')
+    parser.add_argument('--thresh', type=float, default=15,
+                help='percentage threshold for poor cylinder performance')
+    parser.add_argument('--nbuf', type=int, default=32,
+                help='number of strokes kept of each cylinder')
+    parser.add_argument('--ylim', type=float, nargs=2, default=[0, 275],
+                help='y-axis plotting range')
+    parser.add_argument('--noview', action='store_true',
+                help='do not plot live pressure history')
+    return parser.parse_args(args)
+
+
+if __name__ == "__main__":
+
+    args = ParseArgs()
+
+    if args.serve is not None:
+        ServeSamples(SimulatorSource(args.ncyl, args.tests, args.rate),
+                        args.serve)
+    else:
+        if args.simulate:
+            source = SimulatorSource(args.ncyl, args.tests, args.rate)
+        elif args.serial is not None:
+            source = SerialSource(args.serial, args.baud)
+        else:
+            host, port = args.socket.rsplit(':', 1)
+            source = SocketSource(host, int(port))
+
+        state = StreamState(args.tests, args.ncyl, args.nbuf, args.thresh)
+        view = None if args.noview else LiveView(state, args.ylim)
+        Stream(source, state, view)
+
+        print('\n**********************************')
+        print(state.Maxima())
+        print('Failing cylinders: {}'.format(np.nonzero(state.fail)[0] + 1))
+        if view is not None:
+            import plotCompression as pc
+            pc.plt.show()
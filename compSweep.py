@@ -0,0 +1,168 @@
+"""COMPRESSION TEST THRESHOLD SENSITIVITY SWEEP
+Logan Halstrom
+CREATED: 17 OCT 2026
+
+DESCRIPTION:  Pass/fail of every cylinder of a fleet for a whole grid of
+thresholds, to tune the percdiff threshold (thresh of main) without
+re-running the analysis for every candidate value.  Percent differences of
+every test are found once (compAnalysis.CalcMaxima), then:
+    FailMatrix --> failing cylinders for every threshold (one broadcast
+                    comparison)
+    FailCurves --> fraction of tests (or cylinders) failing vs threshold,
+                    for the whole fleet and for each vehicle model, from
+                    sorted worst cylinders (no matrix needed)
+Files are parsed a chunk at a time (compParse.FleetArrays) and only
+percent differences are kept, so sweeps over 100k tests take seconds.
+
+USAGE:
+python compSweep.py Data --range 5 30 --step 0.5 -o Results/sweep.csv --plot
+"""
+
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from compAnalysis import CalcMaxima
+
+THRESHS = np.arange(0, 30.5, 0.5) #default threshold grid [%]
+
+
+def FleetPercDiff(paths, ncyl=4, tests=['dry', 'wet'], chunk=10000):
+    """Percent difference of each cylinder from max cylinder of many data
+    files, parsed a chunk of files at a time.
+    paths --> data file paths
+    ncyl  --> number of cylinders in engine
+    tests --> test types in column order of data files
+    chunk --> number of files parsed into memory at a time
+    Returns:
+    array of shape [test, cylinder]
+    """
+    from compParse import FleetArrays
+    percdiff = np.empty((len(paths), ncyl))
+    for start, data in FleetArrays(paths, ncyl, len(tests), chunk):
+        percdiff[start:start+len(data)] = CalcMaxima(data,
+                                            ref=tests.index('dry'))['percdiff']
+    return percdiff
+
+
+def FailMatrix(percdiff, threshs=THRESHS):
+    """Failing cylinders for every threshold.
+    percdiff --> percent difference from max cylinder [..., cylinder]
+    threshs  --> thresholds (positive, assessed as negative like main) [%]
+    Returns:
+    boolean array of shape [threshold, ..., cylinder]
+    """
+    threshs = np.asarray(threshs, dtype=float)
+    percdiff = np.asarray(percdiff, dtype=float)
+    return percdiff < -threshs.reshape((-1,) + (1,) * percdiff.ndim)
+
+
+def _FailRate(values, threshs):
+    """Fraction of values below -thresh for every thresh (values sorted)"""
+    if len(values) == 0:
+        return np.full(len(threshs), np.nan)
+    return np.searchsorted(values, -threshs, side='left') / len(values)
+
+
+def FailCurves(percdiff, threshs=THRESHS, models=None, level='test'):
+    """Fraction of fleet failing at every threshold, overall and for each
+    vehicle model.
+    percdiff --> percent difference from max cylinder [test, cylinder]
+    threshs  --> thresholds (positive, assessed as negative like main) [%]
+    models   --> vehicle model of each test (None for fleet only)
+    level    --> 'test' (any cylinder fails) or 'cyl' (each cylinder)
+    Returns:
+    dataframe indexed by threshold with column 'fleet' and a column for
+    each model
+    """
+    threshs = np.asarray(threshs, dtype=float)
+    percdiff = np.asarray(percdiff, dtype=float)
+    if level == 'test':
+        #Test fails if its worst cylinder does
+        values = np.fmin.reduce(percdiff, axis=-1)[:, None]
+    else:
+        values = percdiff
+    #Tests with no data never fail (same as NaN < -thresh)
+    values = np.where(np.isnan(values), np.inf, values)
+
+    curves = {'fleet' : _FailRate(np.sort(values, axis=None), threshs)}
+    if models is not None:
+        models = np.asarray(models, dtype=object)
+        for model in pd.unique(models):
+            group = values[models == model]
+            curves[model] = _FailRate(np.sort(group, axis=None), threshs)
+    return pd.DataFrame(curves, index=pd.Index(threshs, name='thresh'))
+
+
+def PlotFailCurves(curves, thresh=None, level='test',
+                    savename='Results/ThreshSweep.png'):
+    """Plot fail rate vs threshold of fleet and each model, and save it.
+    curves --> dataframe from FailCurves
+    thresh --> threshold currently in use to mark (None for no mark)
+    """
+    import plotCompression as pc
+    pc.InitPlotting()
+    ylbl = 'Tests Failing [%]' if level == 'test' else 'Cylinders Failing [%]'
+    _, ax = pc.lplot.FigureStart(None, 'Threshold [%]', ylbl, figsize=[6, 6])
+    for k, col in enumerate(curves.columns):
+        ax.plot(curves.index, curves[col] * 100, label=str(col),
+                color='k' if col == 'fleet' else pc.colors[k % len(pc.colors)],
+                linewidth=3 if col == 'fleet' else 1.5)
+    if thresh is not None:
+        ax.axvline(thresh, color='red', linestyle='--', linewidth=1)
+    ax.set_xlim([curves.index.min(), curves.index.max()])
+    ax.set_ylim(bottom=0)
+    pc.lplot.PlotLegend(ax, title='Model')
+    pc.SavePlot(savename, fig=ax.figure)
+    return savename
+
+
+def ParseArgs(args=None):
+    """Parse command line arguments for threshold sweep"""
+    parser = argparse.ArgumentParser(
+                description='Fail rate of fleet vs percdiff threshold')
+    parser.add_argument('source', nargs='?', default='Data',
+                help='directory or glob of CompTest_*.dat files')
+    parser.add_argument('--range', type=float, nargs=2, default=[0, 30],
+                metavar=('MIN', 'MAX'), help='range of thresholds [%%]')
+    parser.add_argument('--step', type=float, default=0.5,
+                help='threshold step [%%]')
+    parser.add_argument('--thresh', type=float, default=15,
+                help='threshold currently in use (marked on plot)')
+    parser.add_argument('--level', choices=['test', 'cyl'], default='test',
+                help='fail rate of tests (any cylinder) or of cylinders')
+    parser.add_argument('--ncyl', type=int, default=4,
+                help='number of cylinders in engine')
+    parser.add_argument('--model', default=None,
+                help='vehicle model of all tests (default: from file names)')
+    parser.add_argument('--plot', action='store_true',
+                help='also plot fail rate curves')
+    parser.add_argument('-o', '--output', default=None,
+                help='save fail rate curves to this csv file')
+    return parser.parse_args(args)
+
+
+if __name__ == "__main__":
+
+    args = ParseArgs()
+
+    from compBatch import FindTestFiles
+    from compBaseline import TestModels
+    paths = list(FindTestFiles(args.source).values())
+    threshs = np.arange(args.range[0], args.range[1] + args.step / 2,
+                        args.step)
+    percdiff = FleetPercDiff(paths, args.ncyl)
+    models = TestModels(paths, args.model)
+    curves = FailCurves(percdiff, threshs, models, args.level)
+
+    print('{} tests, {} failing at thresh = {}%:'.format(len(paths),
+            args.level, args.thresh))
+    print(FailCurves(percdiff, [args.thresh], models, args.level).round(3))
+    with pd.option_context('display.max_rows', 20):
+        print(curves.round(3))
+    if args.output is not None:
+        curves.to_csv(args.output)
+    if args.plot:
+        print('Plot saved to {}'.format(PlotFailCurves(curves, args.thresh,
+                                                        args.level)))
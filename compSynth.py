@@ -0,0 +1,161 @@
+"""SYNTHETIC COMPRESSION TEST DATA GENERATOR
+Logan Halstrom
+CREATED: 17 OCT 2026
+
+DESCRIPTION:  Write realistic compression test data files in the same
+blank-padded format as the hand-made files in Data/ (read by
+ReadCompTestData).  Pressure builds up with each engine stroke towards a
+plateau, like a gauge reading.  Wet tests (oil added to cylinder) build up
+to a higher plateau.  Cylinders stop being recorded at different strokes,
+leaving blank (NaN) tails.
+
+USAGE:
+python compSynth.py SynthData -n 100000 --ncyl 4 --dryonly 0.2
+"""
+
+import os
+import argparse
+
+import numpy as np
+
+BLANK = '   ' #whitespace written for missing (NaN) values
+
+
+def SynthTest(rng, ncyl=4, nstroke=(7, 16), wet=True, nantail=True,
+                pmax=(180, 240), weak=0.1):
+    """Make pressure data for a single synthetic compression test.
+    rng     --> numpy random Generator
+    ncyl    --> number of cylinders in engine
+    nstroke --> (min, max) number of engine strokes recorded
+    wet     --> include wet test data (blank wet columns otherwise)
+    nantail --> cylinders stop being recorded at random strokes
+    pmax    --> (min, max) plateau pressure of engine [psi]
+    weak    --> probability of each cylinder being weak (low plateau)
+    Returns:
+    array of shape [stroke, column] (stroke, dry cylinders, wet cylinders)
+    """
+    n = rng.integers(nstroke[0], nstroke[1] + 1)
+    stroke = np.arange(1, n+1, 1)
+
+    #Plateau pressure of each cylinder, some cylinders are weak
+    plateau = rng.uniform(*pmax) * rng.normal(1, 0.02, ncyl)
+    plateau *= np.where(rng.random(ncyl) < weak,
+                        rng.uniform(0.7, 0.9, ncyl), 1)
+    #Build-up rate of each cylinder [strokes]
+    tau = rng.uniform(1.5, 3.5, ncyl)
+    #Pressure reading of each stroke, rounded like a gauge reading
+    dry = plateau * (1 - np.exp(-stroke[:, None] / tau))
+    dry = np.round(dry + rng.normal(0, 1.5, dry.shape))
+    data = np.full((n, 1 + 2*ncyl), np.nan)
+    data[:, 0] = stroke
+    data[:, 1:ncyl+1] = dry
+
+    if wet:
+        #Oil seals rings, wet plateau is higher (more for worn cylinders)
+        boost = rng.uniform(1.05, 1.2, ncyl)
+        wetp = plateau * boost * (1 - np.exp(-stroke[:, None] / (0.9*tau)))
+        data[:, ncyl+1:] = np.round(wetp + rng.normal(0, 1.5, wetp.shape))
+
+    if nantail:
+        #Each cylinder stops at its own stroke (up to 3 strokes early)
+        last = rng.integers(max(n - 3, 1), n + 1, 2*ncyl)
+        mask = stroke[:, None] > last[None, :]
+        data[:, 1:][mask] = np.nan
+        if not wet:
+            data[:, ncyl+1:] = np.nan
+    return data
+
+
+def SynthTrace(rng, peaks, rate=2000, rpm=250, noise=0.5):
+    """Make raw pressure transducer trace of a single cylinder, with a
+    pressure pulse for each compression stroke (every second revolution).
+    rng   --> numpy random Generator
+    peaks --> peak pressure of each stroke [psi] (NaN strokes are skipped)
+    rate  --> sample rate [Hz]
+    rpm   --> cranking speed [rev/min]
+    noise --> standard deviation of transducer noise [psi]
+    Returns:
+    float32 array of pressure samples
+    """
+    peaks = np.asarray(peaks, dtype=float)
+    peaks = peaks[~np.isnan(peaks)]
+    #Samples per compression stroke (4-stroke engine, 2 revolutions)
+    nper = int(rate * 120 / rpm)
+    pulse = np.sin(np.pi * np.arange(nper) / nper) ** 8
+    trace = (peaks[:, None] * pulse[None, :]).ravel()
+    trace += rng.normal(0, noise, trace.shape)
+    return trace.astype(np.float32)
+
+
+def FormatCompTest(data):
+    """Format test data as text of a compression test data file.
+    NaN values are written as whitespace.
+    data --> array of shape [stroke, column]
+    """
+    lines = []
+    for row in data:
+        lines.append(','.join(BLANK if np.isnan(v) else '{:.0f}'.format(v)
+                                for v in row))
+    return '\n'.join(lines) + '\n'
+
+
+def SynthName(i, vehicle='Synth'):
+    """Data file name of i-th synthetic test (dates increase by day)"""
+    date = np.datetime64('2017-01-01') + np.timedelta64(i // 4, 'D')
+    nth = ['1st', '2nd', '3rd', '4th'][i % 4]
+    return 'CompTest_{}_{}_{}{:06d}.dat'.format(date, nth, vehicle, i)
+
+
+def WriteSynthData(outdir, nfile=100, ncyl=4, nstroke=(7, 16), dryonly=0.0,
+                    nantail=True, seed=0, vehicle='Synth'):
+    """Write many synthetic compression test data files.
+    outdir  --> directory to write data files to
+    nfile   --> number of files to write
+    ncyl    --> number of cylinders in engine
+    nstroke --> (min, max) number of engine strokes recorded
+    dryonly --> fraction of tests that are dry only (no wet data)
+    nantail --> cylinders stop being recorded at random strokes
+    seed    --> random seed (same files for same seed)
+    Returns:
+    list of paths of written files
+    """
+    rng = np.random.default_rng(seed)
+    os.makedirs(outdir, exist_ok=True)
+    paths = []
+    for i in range(nfile):
+        wet = rng.random() >= dryonly
+        data = SynthTest(rng, ncyl, nstroke, wet, nantail)
+        path = os.path.join(outdir, SynthName(i, vehicle))
+        with open(path, 'w') as f:
+            f.write(FormatCompTest(data))
+        paths.append(path)
+    return paths
+
+
+def ParseArgs(args=None):
+    """Parse command line arguments for data generator"""
+    parser = argparse.ArgumentParser(
+                description='Write synthetic compression test data files')
+    parser.add_argument('outdir', help='directory to write data files to')
+    parser.add_argument('-n', '--nfile', type=int, default=100,
+                help='number of files to write')
+    parser.add_argument('--ncyl', type=int, default=4,
+                help='number of cylinders in engine')
+    parser.add_argument('--nstroke', type=int, nargs=2, default=[7, 16],
+                help='min and max number of strokes recorded')
+    parser.add_argument('--dryonly', type=float, default=0.0,
+                help='fraction of tests without wet data')
+    parser.add_argument('--nonantail', action='store_true',
+                help='record every cylinder for every stroke')
+    parser.add_argument('--seed', type=int, default=0,
+                help='random seed')
+    return parser.parse_args(args)
+
+
+if __name__ == "__main__":
+
+    args = ParseArgs()
+    paths = WriteSynthData(args.outdir, args.nfile, args.ncyl,
+                            args.nstroke, args.dryonly, not args.nonantail,
+                            args.seed)
+    print('Wrote {} synthetic tests to {}'.format(len(paths), args.outdir))
@@ -0,0 +1,153 @@
+"""COMPRESSION TEST OBJECT
+Logan Halstrom
+CREATED: 17 OCT 2026
+
+DESCRIPTION:  Compact array-backed container of a single compression test
+for any number of cylinders.  All pressures are held in one contiguous
+array indexed as [test type, cylinder, stroke] (the layout used by
+compAnalysis), so data is found by integer indexing instead of formatting
+string keys like '{cyl}{test}', and no columns are ever added.  Instances
+use __slots__, so tens of thousands of tests can be held in memory for a
+fraction of the cost of one DataFrame per test.
+
+USAGE:
+test = CompressionTest.FromFile('Data/CompTest_2017-02-11_1st_1999Camry.dat')
+test.Pressure('dry', 3)         #dry pressure history of cylinder 3
+result = test.Maxima(thresh=15) #see compAnalysis.CalcMaxima
+"""
+
+import numpy as np
+import pandas as pd
+
+from compParse import ParseCompTest
+from compAnalysis import TestArray, CalcMaxima, FillLast, CalcDelta
+
+
+class CompressionTest(object):
+    """Pressure histories of a single compression test"""
+
+    __slots__ = ('name', 'tests', 'stroke', 'pres')
+
+    def __init__(self, pres, stroke=None, tests=('dry', 'wet'), name=None):
+        """pres   --> pressure array [test type, cylinder, stroke]
+        stroke --> engine stroke number of each stroke (default 1, 2, ...)
+        tests  --> test types in order of the test type axis
+        name   --> name of test
+        """
+        self.name = name
+        self.tests = tuple(tests)
+        self.pres = np.ascontiguousarray(pres)
+        if stroke is None:
+            stroke = np.arange(1, self.pres.shape[-1]+1, 1)
+        #Copy, so parsed file data is not kept alive by a view
+        self.stroke = np.array(stroke, dtype=self.pres.dtype)
+
+    @classmethod
+    def FromData(cls, data, tests=('dry', 'wet'), dtype=np.float64,
+                    name=None):
+        """Test from parsed data file array.
+        data  --> array of shape [stroke, column] (stroke, then cylinders of
+                    each test type, e.g. from compParse.ParseCompTest)
+        tests --> test types in column order of data file
+        dtype --> storage type (np.float32 halves memory, pressures are
+                    recorded to the nearest psi)
+        """
+        data = np.asarray(data)
+        ncyl = (data.shape[1] - 1) // len(tests)
+        pres = data[:, 1:1+len(tests)*ncyl].T.reshape(len(tests), ncyl, -1)
+        return cls(pres.astype(dtype), data[:, 0], tests, name)
+
+    @classmethod
+    def FromFile(cls, filename, ncyl=None, tests=('dry', 'wet'), cache=None,
+                    dtype=np.float64, name=None):
+        """Read test from compression test data file.
+        filename --> path to data file to read
+        ncyl     --> number of cylinders in engine (None to count columns)
+        tests    --> test types in column order of data file
+        cache    --> directory of parsed data cache (None to always parse)
+        dtype    --> storage type (see FromData)
+        """
+        ncol = None if ncyl is None else 1 + len(tests) * ncyl
+        if cache is None:
+            data = ParseCompTest(filename, ncol)
+        else:
+            from compCache import LoadCached
+            data = LoadCached(filename, ncol, cache)
+        return cls.FromData(data, tests, dtype, name)
+
+    @classmethod
+    def FromFrame(cls, df, tests=('dry', 'wet'), ncyl=4, dtype=np.float64,
+                    name=None):
+        """Test from dataframe with 'Stroke' and '{cyl}{test}' columns
+        (e.g. from ReadCompTestData)
+        """
+        pres = TestArray(df, list(tests), ncyl).astype(dtype)
+        return cls(pres, df['Stroke'].values, tests, name)
+
+    @property
+    def ncyl(self):
+        """Number of cylinders in engine"""
+        return self.pres.shape[1]
+
+    @property
+    def cyls(self):
+        """Cylinder numbers"""
+        return np.arange(1, self.ncyl+1, 1)
+
+    @property
+    def nstroke(self):
+        """Number of strokes (including NaN tails)"""
+        return self.pres.shape[2]
+
+    @property
+    def nbytes(self):
+        """Memory used by test data [bytes]"""
+        return self.pres.nbytes + self.stroke.nbytes
+
+    def Index(self, test, cyl):
+        """Array indices (test type, cylinder) of a cylinder in a test type"""
+        return self.tests.index(test), cyl - 1
+
+    def Pressure(self, test, cyl):
+        """Pressure history of cylinder number cyl in test type test"""
+        i, j = self.Index(test, cyl)
+        return self.pres[i, j]
+
+    def Maxima(self, thresh=15):
+        """Maxima, normalized pressures and pass/fail of each cylinder
+        (see compAnalysis.CalcMaxima)
+        """
+        return CalcMaxima(self.pres, thresh, ref=self.tests.index('dry'))
+
+    def Filled(self):
+        """Pressures with NaN tails filled with last recorded value"""
+        return FillLast(self.pres)
+
+    def Delta(self):
+        """Filled pressure of each test type minus dry test pressure"""
+        return CalcDelta(self.Filled(), ref=self.tests.index('dry'))
+
+    def Frame(self):
+        """Test data as dataframe (same columns as ReadCompTestData)"""
+        cols = {'Stroke' : self.stroke}
+        for i, test in enumerate(self.tests):
+            for j in range(self.ncyl):
+                cols['{}{}'.format(j+1, test)] = self.pres[i, j]
+        return pd.DataFrame(cols)
+
+    def __repr__(self):
+        return '<CompressionTest {} : {} cyl, {} strokes, {}>'.format(
+                    self.name, self.ncyl, self.nstroke, '/'.join(self.tests))
+
+
+def LoadTests(files, ncyl=None, tests=('dry', 'wet'), cache=None,
+                dtype=np.float64):
+    """Read many compression tests.
+    files --> dictionary of data file paths keyed by test name
+    (see CompressionTest.FromFile for other inputs)
+    Returns:
+    dictionary of CompressionTest keyed by test name
+    """
+    return {name : CompressionTest.FromFile(path, ncyl, tests, cache, dtype,
+                                            name)
+                for name, path in files.items()}
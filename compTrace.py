@@ -0,0 +1,213 @@
+"""COMPRESSION TEST RAW TRACE SEGMENTATION
+Logan Halstrom
+CREATED: 17 OCT 2026
+
+DESCRIPTION:  Turn raw pressure transducer traces (kHz sample rates, millions
+of samples per cylinder) into the one-value-per-stroke test data read by
+ReadCompTestData.  Each trace is memory-mapped (raw binary) or read in byte
+blocks (CSV) and processed one chunk at a time, so memory use does not
+depend on trace length.
+
+Compression strokes are found with a hysteresis threshold: a stroke starts
+when pressure rises above `hi` and ends when it falls back below `lo`.  The
+peak pressure of each stroke (what a gauge reads) is found for all strokes
+of a chunk at once with np.maximum.reduceat.  Strokes that span chunk
+boundaries are carried over to the next chunk.
+
+Traces of a test are stored in a directory with one file per cylinder and
+test type, named by data key: {cyl}{test}.{ext} (e.g. 3dry.f32, 1wet.csv).
+
+USAGE:
+python compTrace.py Traces/2017-03-01_1st_1999Camry -o Data
+"""
+
+import os
+import glob
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from compParse import ParseCompText
+
+CHUNKSIZE = 2**20 #samples processed at a time
+DTYPES = {'.f32' : np.float32, '.f64' : np.float64, '.i16' : np.int16,
+            '.bin' : np.float32} #binary trace types by file extension
+
+
+def BinaryChunks(path, dtype=np.float32, nchan=1, chan=0, offset=0,
+                    chunksize=CHUNKSIZE):
+    """Chunks of a raw binary trace, memory-mapped so only the current chunk
+    is read into memory.
+    path   --> trace file
+    dtype  --> sample data type
+    nchan  --> number of interleaved channels in file
+    chan   --> channel of trace
+    offset --> header size [bytes]
+    """
+    data = np.memmap(path, dtype=dtype, mode='r', offset=offset)
+    data = data[:len(data) - len(data) % nchan].reshape(-1, nchan)[:, chan]
+    for start in range(0, len(data), chunksize):
+        yield np.asarray(data[start:start+chunksize], dtype=float)
+
+
+def CSVChunks(path, ncol=1, col=0, header=False, chunksize=CHUNKSIZE):
+    """Chunks of a CSV trace, parsed a block of whole lines at a time.
+    path   --> trace file
+    ncol   --> number of columns in file
+    col    --> column of trace
+    header --> skip first line
+    """
+    data = np.memmap(path, dtype=np.uint8, mode='r')
+    #Bytes per chunk, assuming about 8 bytes per field
+    nbyte = chunksize * ncol * 8
+    start = 0
+    if header:
+        newline = np.flatnonzero(data[:nbyte] == ord('\n'))
+        start = newline[0] + 1 if len(newline) else len(data)
+    while start < len(data):
+        end = min(start + nbyte, len(data))
+        if end < len(data):
+            #End chunk at last whole line
+            newline = np.flatnonzero(data[start:end] == ord('\n'))
+            if len(newline):
+                end = start + newline[-1] + 1
+        yield ParseCompText(data[start:end].tobytes(), ncol)[:, col]
+        start = end
+
+
+def TraceChunks(path, chunksize=CHUNKSIZE, **kwargs):
+    """Chunks of trace, read by type of file extension (see DTYPES, CSV
+    otherwise)
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if ext in DTYPES:
+        kwargs.setdefault('dtype', DTYPES[ext])
+        return BinaryChunks(path, chunksize=chunksize, **kwargs)
+    return CSVChunks(path, chunksize=chunksize, **kwargs)
+
+
+def StrokePeaks(chunks, hi=20, lo=10):
+    """Peak pressure of each compression stroke of a trace.
+    chunks --> iterable of pressure sample arrays (consecutive parts of trace)
+    hi     --> pressure a stroke starts above [psi]
+    lo     --> pressure a stroke ends below [psi] (lo < hi ignores noise)
+    Returns:
+    array of peak pressure of each stroke
+    """
+    peaks = []
+    inside = False    #in stroke at end of previous chunk
+    openmax = np.nan  #peak so far of stroke open at end of previous chunk
+    for p in chunks:
+        if len(p) == 0:
+            continue
+        #Hysteresis: 1 above hi, 0 below lo, otherwise same as before
+        state = np.full(len(p) + 1, -1, dtype=np.int8)
+        state[0] = inside
+        state[1:][p > hi] = 1
+        state[1:][p < lo] = 0
+        last = np.where(state >= 0, np.arange(len(state)), 0)
+        state = state[np.maximum.accumulate(last)]
+        instroke = state[1:] == 1
+
+        #First sample of each stroke in chunk (and open stroke continued)
+        starts = np.flatnonzero(np.diff(state) == 1)
+        if inside:
+            starts = np.concatenate([[0], starts])
+        if len(starts):
+            #Max of each stroke, samples between strokes are ignored
+            masked = np.where(instroke, p, -np.inf)
+            maxs = np.maximum.reduceat(masked, starts)
+            if inside:
+                maxs[0] = np.fmax(maxs[0], openmax)
+            if instroke[-1]:
+                #Last stroke continues in next chunk
+                openmax = maxs[-1]
+                maxs = maxs[:-1]
+            peaks.append(maxs)
+        inside = bool(instroke[-1])
+    if inside:
+        #Trace ends during a stroke
+        peaks.append([openmax])
+    if not peaks:
+        return np.array([])
+    return np.concatenate(peaks)
+
+
+def FindTraces(tracedir):
+    """Trace files of a test keyed by data key (e.g. '3dry')"""
+    traces = {}
+    for path in sorted(glob.glob(os.path.join(tracedir, '*'))):
+        key = os.path.splitext(os.path.basename(path))[0]
+        traces[key] = path
+    return traces
+
+
+def SegmentTest(traces, tests=['dry', 'wet'], ncyl=4, hi=20, lo=10,
+                chunksize=CHUNKSIZE, **kwargs):
+    """Make test data table (as read by ReadCompTestData) from raw traces.
+    traces --> directory of trace files, or dictionary of trace file paths
+                    keyed by data key (e.g. '3dry')
+    tests  --> test types to load (e.g. ['dry', 'wet'])
+    ncyl   --> number of cylinders in engine
+    hi, lo --> stroke hysteresis thresholds [psi] (see StrokePeaks)
+    kwargs --> trace file options (see BinaryChunks, CSVChunks)
+    Returns:
+    dataframe with 'Stroke' and '{cyl}{test}' columns, missing traces and
+    strokes are NaN
+    """
+    if not isinstance(traces, dict):
+        traces = FindTraces(traces)
+    keys = ['{}{}'.format(cyl, test) for test in tests
+                for cyl in range(1, ncyl+1)]
+    peaks = {}
+    for key in keys:
+        if key in traces:
+            peaks[key] = StrokePeaks(TraceChunks(traces[key], chunksize,
+                                                    **kwargs), hi, lo)
+        else:
+            peaks[key] = np.array([])
+    nstroke = max([len(p) for p in peaks.values()] + [1])
+    data = np.full((nstroke, len(keys) + 1), np.nan)
+    data[:, 0] = np.arange(1, nstroke+1, 1)
+    for i, key in enumerate(keys):
+        data[:len(peaks[key]), i+1] = peaks[key]
+    return pd.DataFrame(data, columns=['Stroke'] + keys)
+
+
+def WriteTestData(df, path):
+    """Write test data table as compression test data file"""
+    from compSynth import FormatCompTest
+    with open(path, 'w') as f:
+        f.write(FormatCompTest(df.to_numpy(dtype=float)))
+
+
+def ParseArgs(args=None):
+    """Parse command line arguments for trace segmentation"""
+    parser = argparse.ArgumentParser(
+                description='Make compression test data from raw traces')
+    parser.add_argument('tracedir', nargs='+',
+                help='directory of {cyl}{test}.{ext} traces of a test')
+    parser.add_argument('--tests', nargs='+', default=['dry', 'wet'],
+                help='types of tests performed')
+    parser.add_argument('--ncyl', type=int, default=4,
+                help='number of cylinders in engine')
+    parser.add_argument('--hi', type=float, default=20,
+                help='pressure a stroke starts above [psi]')
+    parser.add_argument('--lo', type=float, default=10,
+                help='pressure a stroke ends below [psi]')
+    parser.add_argument('-o', '--outdir', default='Data',
+                help='directory to write CompTest_<name>.dat files to')
+    return parser.parse_args(args)
+
+
+if __name__ == "__main__":
+
+    args = ParseArgs()
+    os.makedirs(args.outdir, exist_ok=True)
+    for tracedir in args.tracedir:
+        df = SegmentTest(tracedir, args.tests, args.ncyl, args.hi, args.lo)
+        name = os.path.basename(os.path.normpath(tracedir))
+        path = os.path.join(args.outdir, 'CompTest_{}.dat'.format(name))
+        WriteTestData(df, path)
+        print('{}: {} strokes --> {}'.format(name, len(df), path))
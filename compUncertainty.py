@@ -0,0 +1,207 @@
+"""COMPRESSION TEST MONTE CARLO UNCERTAINTY
+Logan Halstrom
+CREATED: 17 OCT 2026
+
+DESCRIPTION:  Uncertainty of the percent difference of each cylinder from
+the max cylinder, and probability of failing the threshold check, for
+gauge readings with reading error.  main treats readings as exact, but
+pressures are read off a filmed needle with about +/- 5 psi error (see
+Notes sheet of Data/CompressionTest_1999Camry(Mk3).xlsx), and the number
+of strokes cranked before the reading levels off varies between runs.
+
+Each draw perturbs every dry reading by uniform reading error and stops
+each cylinder up to a few strokes early, then repeats the maxima analysis
+of compAnalysis.CalcMaxima.  All draws of many tests are done at once as
+NumPy arrays of shape [draw, test, cylinder], in blocks that fit in memory.
+Only readings close enough to the max of their cylinder to ever be the max
+are perturbed, so 10^4 draws take a few ms per test.
+
+USAGE:
+python compUncertainty.py Data -n 10000 --noise 5 --drop 1
+"""
+
+import argparse
+
+import numpy as np
+import pandas as pd
+
+NOISE = 5.0        #reading error of gauge (+/-) [psi]
+DROP = 1           #most strokes a cylinder may be stopped early
+MAXELEM = 2**24    #most perturbed readings held in memory at once
+
+
+def RecordedStrokes(data):
+    """Number of strokes recorded of each history (up to last non-NaN)
+    data --> pressure array [..., stroke]
+    """
+    valid = ~np.isnan(data)
+    nstroke = data.shape[-1] - np.argmax(valid[..., ::-1], axis=-1)
+    return np.where(valid.any(axis=-1), nstroke, 0)
+
+
+def Candidates(dry, noise=NOISE, drop=DROP):
+    """Readings that can be the maximum of their cylinder in some draw.
+    Readings more than 2 * noise below the max of the strokes that are
+    never dropped can never be the max once perturbed, so they are skipped.
+    dry --> dry pressure array [test, cylinder, stroke]
+    Returns:
+    readings [test, cylinder, candidate] (-inf if none), their stroke index
+    """
+    last = RecordedStrokes(dry)
+    index = np.arange(dry.shape[-1])
+    kept = index < np.maximum(last - drop, 1)[..., None]
+    with np.errstate(invalid='ignore'):
+        floor = np.fmax.reduce(np.where(kept, dry, np.nan), axis=-1)
+        cand = (index < last[..., None]) & (dry >= floor[..., None] - 2*noise)
+    ncand = max(1, cand.sum(axis=-1).max())
+    #Candidates first, in stroke order
+    pos = np.argsort(~cand, axis=-1, kind='stable')[..., :ncand]
+    vals = np.take_along_axis(dry, pos, axis=-1)
+    vals = np.where(np.take_along_axis(cand, pos, axis=-1), vals, -np.inf)
+    return vals.astype(np.float32), pos
+
+
+def PerturbedPercDiff(dry, ndraw, noise=NOISE, drop=DROP, rng=None):
+    """Percent difference of each cylinder from max cylinder for random
+    draws of reading error and number of strokes.
+    dry   --> dry pressure array [test, cylinder, stroke]
+    ndraw --> number of draws
+    noise --> reading error of gauge (uniform +/-) [psi]
+    drop  --> most strokes a cylinder may be stopped early
+    rng   --> numpy random Generator
+    Returns:
+    float32 array of shape [draw, test, cylinder]
+    """
+    if rng is None:
+        rng = np.random.default_rng()
+    dry = np.asarray(dry, dtype=float)
+    ntest, ncyl, _ = dry.shape
+    last = RecordedStrokes(dry)
+    vals, pos = Candidates(dry, noise, drop)
+    out = np.empty((ndraw, ntest, ncyl), dtype=np.float32)
+    nchunk = max(1, MAXELEM // max(1, vals.size))
+    for start in range(0, ndraw, nchunk):
+        n = min(nchunk, ndraw - start)
+        #Cylinders stopped 0 to drop strokes early (at least one stroke)
+        stop = np.maximum(last - rng.integers(0, drop+1, (n, ntest, ncyl)), 1)
+        maxs = np.full((n, ntest, ncyl), -np.inf, dtype=np.float32)
+        for k in range(vals.shape[-1]):
+            #Uniform reading error of every candidate reading
+            val = rng.random((n, ntest, ncyl), dtype=np.float32)
+            val *= 2 * noise
+            val += vals[..., k] - noise
+            val[pos[..., k] >= stop] = -np.inf
+            np.maximum(maxs, val, out=maxs)
+        maxs[np.isinf(maxs)] = np.nan #cylinders with no data
+        maxcyl = np.fmax.reduce(maxs, axis=-1)[..., None]
+        out[start:start+n] = (maxs / maxcyl - 1) * 100
+    return out
+
+
+def PercDiffUncertainty(data, thresh=15, ref=0, ndraw=10000, noise=NOISE,
+                        drop=DROP, conf=0.95, seed=None):
+    """Monte Carlo confidence interval of percent difference of each
+    cylinder and probability of failure.
+    data   --> pressure array [..., test type, cylinder, stroke]
+    thresh --> percentage threshold for poor cylinder performance
+    ref    --> index of test type used for cylinder comparison (dry test)
+    ndraw  --> number of random draws of each test
+    noise  --> reading error of gauge (uniform +/-) [psi]
+    drop   --> most strokes a cylinder may be stopped early
+    conf   --> confidence level of percent difference interval
+    seed   --> random seed (None for random)
+    Returns:
+    dictionary of arrays:
+        'lo', 'hi' --> confidence interval of percent difference [..., cyl]
+        'pfail'    --> probability cylinder is below threshold [..., cyl]
+        'ptest'    --> probability any cylinder of test fails [...]
+    """
+    rng = np.random.default_rng(seed)
+    dry = np.asarray(data, dtype=float)[..., ref, :, :]
+    shape = dry.shape[:-1]
+    dry = dry.reshape((-1,) + dry.shape[-2:])
+    ntest, ncyl, _ = dry.shape
+
+    lo = np.empty((ntest, ncyl))
+    hi = np.empty((ntest, ncyl))
+    pfail = np.empty((ntest, ncyl))
+    ptest = np.empty(ntest)
+    q = [50 * (1 - conf), 50 * (1 + conf)]
+    #Blocks of tests so draws of a block fit in memory
+    nblock = max(1, MAXELEM // (ndraw * ncyl))
+    for start in range(0, ntest, nblock):
+        block = slice(start, start + nblock)
+        percdiff = PerturbedPercDiff(dry[block], ndraw, noise, drop, rng)
+        lo[block], hi[block] = np.percentile(percdiff, q, axis=0)
+        fail = percdiff < -thresh
+        pfail[block] = fail.mean(axis=0)
+        ptest[block] = fail.any(axis=-1).mean(axis=0)
+    return {'lo' : lo.reshape(shape), 'hi' : hi.reshape(shape),
+            'pfail' : pfail.reshape(shape), 'ptest' : ptest.reshape(shape[:-1])}
+
+
+def UncertaintyTable(fleet, thresh=15, tests=['dry', 'wet'], ncyl=4,
+                        **kwargs):
+    """Percent difference uncertainty of every cylinder of a fleet.
+    fleet  --> dictionary of test dataframes or compTest.CompressionTest
+                keyed by test name
+    kwargs --> options of PercDiffUncertainty (ndraw, noise, drop, conf, seed)
+    Returns:
+    dataframe indexed by (test, cyl) with columns 'percdiff_lo',
+    'percdiff_hi', 'pfail'
+    """
+    from compAnalysis import TestArray, StackTests
+    names = list(fleet.keys())
+    data = StackTests([TestArray(fleet[name], tests, ncyl)
+                        for name in names])
+    result = PercDiffUncertainty(data, thresh, tests.index('dry'), **kwargs)
+    ncyl = data.shape[-2]
+    index = pd.MultiIndex.from_product([names, np.arange(1, ncyl+1, 1)],
+                                        names=['test', 'cyl'])
+    return pd.DataFrame({'percdiff_lo' : result['lo'].ravel(),
+                            'percdiff_hi' : result['hi'].ravel(),
+                            'pfail' : result['pfail'].ravel()}, index=index)
+
+
+def ParseArgs(args=None):
+    """Parse command line arguments for uncertainty analysis"""
+    parser = argparse.ArgumentParser(
+                description='Monte Carlo uncertainty of cylinder pass/fail')
+    parser.add_argument('source', nargs='?', default='Data',
+                help='directory or glob of CompTest_*.dat files')
+    parser.add_argument('-n', '--ndraw', type=int, default=10000,
+                help='number of random draws of each test')
+    parser.add_argument('--noise', type=float, default=NOISE,
+                help='reading error of gauge (+/-) [psi]')
+    parser.add_argument('--drop', type=int, default=DROP,
+                help='most strokes a cylinder may be stopped early')
+    parser.add_argument('--conf', type=float, default=0.95,
+                help='confidence level of percent difference interval')
+    parser.add_argument('--thresh', type=float, default=15,
+                help='percentage threshold for poor cylinder performance')
+    parser.add_argument('--tests', nargs='+', default=['dry', 'wet'],
+                help='types of tests performed')
+    parser.add_argument('--ncyl', type=int, default=4,
+                help='number of cylinders in engine')
+    parser.add_argument('--seed', type=int, default=None,
+                help='random seed')
+    return parser.parse_args(args)
+
+
+if __name__ == "__main__":
+
+    args = ParseArgs()
+
+    from compBatch import FindTestFiles
+    from compTest import LoadTests
+    from compAnalysis import CalcMaxima, StackTests
+    fleet = LoadTests(FindTestFiles(args.source), args.ncyl, args.tests)
+    table = UncertaintyTable(fleet, args.thresh, args.tests, args.ncyl,
+                                ndraw=args.ndraw, noise=args.noise,
+                                drop=args.drop, conf=args.conf,
+                                seed=args.seed)
+    data = StackTests([test.pres for test in fleet.values()])
+    table.insert(0, 'percdiff', CalcMaxima(data, args.thresh,
+                    ref=args.tests.index('dry'))['percdiff'].ravel())
+    with pd.option_context('display.max_rows', None, 'display.width', 120):
+        print(table.round(2))
@@ -16,15 +16,8 @@ def MakeOutputDir(savedir):
     """make results output directory if it does not already exist.
     instring --> directory path from script containing folder
     """
-    #split individual directories
-    splitstring = savedir.split('/')
-    prestring = ''
-    for string in splitstring:
-        prestring += string + '/'
-        try:
-            os.mkdir(prestring)
-        except Exception:
-            pass
+    if savedir != '':
+        os.makedirs(savedir, exist_ok=True)
 
 def GetParentDir(savename):
     """Get parent directory from path of file"""
@@ -264,6 +257,47 @@ def PlotStart(title, xlbl, ylbl, horzy='vertical', figsize='square',
 
     return fig, ax
 
+def FigureStart(title, xlbl, ylbl, horzy='vertical', figsize='square',
+                grid=True):
+    """Begin plot like PlotStart, but on a new Figure with its own Agg canvas.
+    Does not touch pyplot global state (current figure/axes, font dicts), so
+    several figures can be built and saved at once in separate threads or
+    processes.  Save with SavePlot(savename, fig=fig).
+    horzy --> vertical or horizontal y axis label
+    figsize --> set figure size. None for autosizing, 'tex' for latex
+                    formatting, or 2D list for user specification.
+    """
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    #SET FIGURE SIZE
+    if figsize == 'tex':
+        #Plot with latex 2-column figure sizing
+        figsize = fig_dims
+    elif figsize == 'square':
+        figsize = [6, 6]
+    fig = Figure(figsize=figsize)
+    FigureCanvasAgg(fig)
+
+    #PLOT FIGURE (USE FONT DICT SETTINGS)
+    ax = fig.add_subplot(1, 1, 1)
+    if title != None:
+        ax.set_title(title, fontdict=font_ttl)
+    ax.set_xlabel(xlbl, fontdict=font_lbl)
+    ax.set_ylabel(ylbl, fontdict=font_lbl, rotation=horzy)
+    #Same as plt.xticks(fontsize=...): size existing tick labels only
+    for label in ax.get_xticklabels() + ax.get_yticklabels():
+        label.set_fontsize(font_tck)
+
+    #INCREASE TITLE SPACING
+    ax.title.set_position([.5, 1.025])
+
+    #TURN GRID ON
+    if grid:
+        ax.grid(True)
+
+    return fig, ax
+
 def MakeTwinx(ax, ylbl, horzy='vertical'):
     """Make separate y-axis with label"""
     ax2 = ax.twinx()
@@ -349,17 +383,112 @@ def ColorBar(label, horzy='horizontal', ticks=None, colorby=None, pad=25):
     cb.set_label(label, rotation=horzy, fontdict=font_lbl, labelpad=pad)
     return cb
 
-def SavePlot(savename, overwrite=1, trans=False):
+def TightBbox(fig, pad=None):
+    """Tight bounding box of figure [in], as found by a 'tight' save.
+    Pass to SavePlot(bbox=...) to save figures with the same layout without
+    drawing them twice (once to find the tight bbox, once to save)
+    pad --> padding around bbox [in] (None for savefig.pad_inches)
+    """
+    import matplotlib
+    if pad == None:
+        pad = matplotlib.rcParams['savefig.pad_inches']
+    renderer = fig.canvas.get_renderer()
+    fig.draw(renderer)
+    return fig.get_tightbbox(renderer).padded(pad)
+
+def SavePlot(savename, overwrite=1, trans=False, fig=None, close=False,
+                bbox='tight'):
     """Save file given save path.  Do not save if file exists
-    or if variable overwrite is 1"""
-    if os.path.isfile(savename):
-        if overwrite == 0:
-            print('     Overwrite is off')
-            return
-        else: os.remove(savename)
+    or if variable overwrite is 1
+    fig   --> figure to save (None for current figure)
+    close --> close figure after saving to free its memory
+    bbox  --> 'tight' to fit figure to its contents (draws figure twice),
+                fixed bbox from TightBbox (draws once), or None for whole
+                figure
+    """
+    if overwrite == 0 and os.path.isfile(savename):
+        print('     Overwrite is off')
+        return
+    #(existing file is overwritten by savefig)
     MakeOutputDir(GetParentDir(savename))
-    plt.savefig(savename, bbox_inches='tight', transparent=trans)
-    # plt.close()
+    if fig == None:
+        fig = plt.gcf()
+    fig.savefig(savename, bbox_inches=bbox, transparent=trans)
+    if close:
+        plt.close(fig)
+
+def _ExportDpis(dpis, fig=None):
+    """PNG export resolutions, None for savefig.dpi, 'figure' for figure dpi"""
+    import matplotlib
+    dpis = [matplotlib.rcParams['savefig.dpi'] if d == None else d
+                for d in dpis]
+    return [fig.dpi if d == 'figure' and fig != None else d for d in dpis]
+
+def ExportNames(savename, formats=['png'], dpis=[None]):
+    """Paths of files written by ExportPlot (see ExportPlot for inputs)"""
+    base = os.path.splitext(savename)[0]
+    paths = []
+    for fmt in formats:
+        if fmt != 'png':
+            paths.append('{}.{}'.format(base, fmt))
+        elif len(dpis) == 1:
+            paths.append('{}.png'.format(base))
+        else:
+            paths.extend('{}_{:g}dpi.png'.format(base, d)
+                            for d in _ExportDpis(dpis))
+    return paths
+
+def ExportPlot(savename, formats=['png'], dpis=[None], trans=False,
+                fig=None, close=False, bbox='tight'):
+    """Save figure in several formats and resolutions with a single layout
+    pass and a single raster render.  Lower resolution PNGs are resampled
+    from the highest resolution render, vector formats (pdf, svg, eps) are
+    each written by their own backend.
+    savename --> save path, extension is replaced by each format
+                    (PNGs are named '<name>_<dpi>dpi.png' if several dpis)
+    formats  --> file formats to write (e.g. ['png', 'pdf', 'svg'])
+    dpis     --> PNG resolutions (None for savefig.dpi)
+    bbox     --> 'tight', fixed bbox (see TightBbox) or None (see SavePlot)
+    Returns:
+    paths of saved files
+    """
+    import io
+    MakeOutputDir(GetParentDir(savename))
+    if fig == None:
+        fig = plt.gcf()
+    if bbox == 'tight':
+        #Find layout once for every output
+        bbox = TightBbox(fig)
+    dpis = _ExportDpis(dpis, fig)
+    paths = []
+    for fmt in formats:
+        names = ExportNames(savename, [fmt], dpis)
+        if fmt != 'png':
+            fig.savefig(names[0], bbox_inches=bbox, transparent=trans)
+            paths.extend(names)
+            continue
+        #Render once at highest resolution
+        buf = io.BytesIO()
+        fig.savefig(buf, format='png', dpi=max(dpis), bbox_inches=bbox,
+                    transparent=trans)
+        from PIL import Image
+        buf.seek(0)
+        img = Image.open(buf)
+        img.load()
+        for d, path in zip(dpis, names):
+            if d == max(dpis):
+                with open(path, 'wb') as f:
+                    f.write(buf.getvalue())
+            else:
+                scale = d / max(dpis)
+                size = (max(1, round(img.width * scale)),
+                        max(1, round(img.height * scale)))
+                img.resize(size, Image.LANCZOS).save(path,
+                                                        dpi=(d, d))
+            paths.append(path)
+    if close:
+        plt.close(fig)
+    return paths
 
 def ShowPlot(showplot=1):
     """Show plot if variable showplot is 1"""
@@ -382,27 +511,56 @@ def TextBox(ax, boxtext, x=0.005, y=0.95, fontsize=font_box['size'],
     ax.text(x, y, boxtext, transform=ax.transAxes, fontsize=fontsize,
             verticalalignment='top', bbox=props)
 
+def PlotLines(ax, x, y, colors='k', linestyle='-', linewidth=1, alpha=1,
+                label=None, zorder=2):
+    """Plot many lines as a single LineCollection (one artist to draw
+    instead of one Line2D per line, for thousands of lines).
+    ax     --> plot axes
+    x      --> x data of all lines [point] or of each line [line, point]
+    y      --> y data of each line [line, point] (NaN points are not drawn)
+    colors --> single color or color of each line
+    Returns:
+    LineCollection
+    """
+    from matplotlib.collections import LineCollection
+    y = np.atleast_2d(np.asarray(y, dtype=float))
+    x = np.broadcast_to(np.asarray(x, dtype=float), y.shape)
+    lines = LineCollection(np.stack([x, y], axis=-1), colors=colors,
+                            linestyles=linestyle, linewidths=linewidth,
+                            alpha=alpha, label=label, zorder=zorder)
+    ax.add_collection(lines)
+    ax.autoscale_view()
+    return lines
+
+def _ArtistData(artist):
+    """xy data of a line or collection as array [point, 2]"""
+    if hasattr(artist, 'get_xydata'):
+        return np.asarray(artist.get_xydata(), dtype=float)
+    if hasattr(artist, 'get_segments'):
+        #Path vertices directly (get_segments copies every segment)
+        paths = artist.get_paths()
+        if not paths:
+            return np.empty((0, 2))
+        return np.concatenate([p.vertices for p in paths]).astype(float)
+    return np.asarray(artist.get_offsets(), dtype=float).reshape(-1, 2)
+
 def TightLims(ax, tol=0.0):
     """Return axis limits for tight bounding of data set in ax.
-    NOTE: doesn't work for scatter plots.
+    Lines, line collections (PlotLines) and scatter plots are bounded
+    (NaN points ignored).
     ax  --> plot axes to bound
     tol --> whitespace tolerance
+    Returns:
+    xlim, ylim (None, None if ax has no data)
     """
-    xmin = xmax = ymin = ymax = None
-    for line in ax.get_lines():
-        data = line.get_data()
-        curxmin = min(data[0])
-        curxmax = max(data[0])
-        curymin = min(data[1])
-        curymax = max(data[1])
-        if curxmin < xmin or xmin == None:
-            xmin = curxmin
-        if curxmax > xmax or xmax == None:
-            xmax = curxmax
-        if curymin < ymin or ymin == None:
-            ymin = curymin
-        if curymax > ymax or ymax == None:
-            ymax = curymax
+    artists = list(ax.get_lines()) + list(ax.collections)
+    if not artists:
+        return None, None
+    data = np.concatenate([_ArtistData(a) for a in artists])
+    if not np.isfinite(data).all(axis=1).any():
+        return None, None
+    xmin, ymin = np.nanmin(data, axis=0)
+    xmax, ymax = np.nanmax(data, axis=0)
 
     xlim = [xmin-tol, xmax+tol]
     ylim = [ymin-tol, ymax+tol]
@@ -489,15 +647,15 @@ def PolyFit(x, y, order, n, showplot=0):
     x_poly = np.linspace(xmin, xmax, n)
     fit = np.polyfit(x, y, order)
     polyfit = np.poly1d(fit)
-    y_poly = polyfit(x_poly)
-    #Plot Poly Fit
-    plt.figure()
-    plt.title(str(order) + '-Order Polynomial Fit', fontsize=14)
-    plt.xlabel('x', fontsize=14)
-    plt.ylabel('y', fontsize=14)
-    plt.plot(x, y, 'rx', label='Data')
-    plt.plot(x_poly, y_poly, 'b', label='Fit')
-    plt.legend(loc='best')
     if showplot == 1:
+        #Plot Poly Fit (no figure is made otherwise)
+        y_poly = polyfit(x_poly)
+        plt.figure()
+        plt.title(str(order) + '-Order Polynomial Fit', fontsize=14)
+        plt.xlabel('x', fontsize=14)
+        plt.ylabel('y', fontsize=14)
+        plt.plot(x, y, 'rx', label='Data')
+        plt.plot(x_poly, y_poly, 'b', label='Fit')
+        plt.legend(loc='best')
         plt.show()
     return polyfit
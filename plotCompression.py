@@ -20,57 +20,94 @@ dry only or dry and wet option
 
 import numpy as np
 import pandas as pd
+from compParse import ParseCompTest
+from compCache import LoadCached
+from compInstrument import Stage
+from compAnalysis import (TestArray, CalcMaxima, MaximaTable, NormColumns,
+                            FillLast, CalcDelta, DeltaName)
 
 #CUSTOM PLOTTING PACKAGE
-import matplotlib.pyplot as plt
-import sys
-sys.path.append('/Users/Logan/lib/python')
-from lplot import *
-from seaborn import color_palette
-import seaborn as sns
-UseSeaborn('xkcd') #use seaborn plotting features with custom colors
-colors = sns.color_palette() #color cycle
-markers = bigmarkers         #marker cycle
+    #matplotlib, seaborn and lplot are imported and plot styles are set on
+    #first plot (InitPlotting), so analysis-only runs never import them
+PALETTE = 'xkcd' #seaborn color palette
+plt = None       #matplotlib.pyplot
+lplot = None     #custom plotting package
+colors = None    #color cycle
+markers = None   #marker cycle
+EXPORT = None    #(formats, dpis) to save plots in (None for PNG only)
+
+def InitPlotting():
+    """Import plotting packages and set plot styles.  Called by each plotting
+    function, only does anything the first time.
+    """
+    global plt, lplot, colors, markers
+    if plt is not None:
+        return
+    import sys
+    sys.path.append('/Users/Logan/lib/python')
+    import matplotlib.pyplot as pyplot
+    import lplot as lp
+    import seaborn as sns
+    lp.UseSeaborn(PALETTE) #use seaborn plotting features with custom colors
+    colors = sns.color_palette() #color cycle
+    markers = lp.bigmarkers      #marker cycle
+    lplot = lp
+    plt = pyplot
 
 
 
 
-def ReadCompTestData(filename):
+def ReadCompTestData(filename, cache=None, ncyl=None,
+                        tests=['dry', 'wet']):
     """Reads compression test data from csv file into pandas dataframe.
     filename --> path to data file to read
+    cache --> directory of parsed data cache (None to always parse file)
+    ncyl  --> number of cylinders in engine (None to count data columns)
+    tests --> test types in column order of data file
     """
 
-    columnnames = ['Stroke', '1dry', '2dry', '3dry', '4dry',
-                             '1wet', '2wet', '3wet', '4wet']
-    #Read data, assign columnnames
-    df = pd.read_csv(filename, sep=',', names=columnnames)
-    #Replace whitespace (blanks) with NaNs
-    df = df.replace(r'\s+', np.nan, regex=True)
-    #Make all value float
-    df = df.apply(pd.to_numeric)
+    #Read data as floats, blanks (whitespace) are parsed as NaNs
+    ncol = None if ncyl is None else 1 + len(tests) * ncyl
+    if cache is None:
+        data = ParseCompTest(filename, ncol)
+    else:
+        #Memory-map previously parsed data if file is unchanged
+        data = LoadCached(filename, ncol, cache)
+    if ncyl is None:
+        ncyl = (data.shape[1] - 1) // len(tests)
+        data = data[:, :1 + len(tests) * ncyl]
+    #Assign columnnames
+    columnnames = ['Stroke'] + ['{}{}'.format(cyl, test) for test in tests
+                                    for cyl in range(1, ncyl+1)]
+    df = pd.DataFrame(data, columns=columnnames)
     return df
 
 
 def PlotPressHist(df, ylim=None, norm=False,
-                    tests=['dry', 'wet'], cyls=[1, 2, 3, 4] ):
+                    tests=['dry', 'wet'], cyls=[1, 2, 3, 4], agg=False):
     """For a single compression test, plot cylinder pressure history.
     Plot dry vs wet tests if data is available for both
     df --> pandas dataframe containing test data
     ylim --> boundaries of y-axis ([ymin, ymax])
     norm --> plot normalized values instead (must calculate beforehand)
+    agg --> plot on new Agg figure without pyplot global state (thread-safe)
     """
 
     ylbl = 'Cylinder Pressure [psi]'
     if norm:
         ylbl = 'Norm. Cyl. Pressure [N.D.]'
-    _,ax = PlotStart(None, 'Engine Stroke', ylbl, figsize=[6, 6])
+    InitPlotting()
+    start = lplot.FigureStart if agg else lplot.PlotStart
+    _,ax = start(None, 'Engine Stroke', ylbl, figsize=[6, 6])
 
     mhandles = [] #dry/wet
     mlabels = []
     nhandles = [] #cyl number
     nlabels = []
 
-    for i, (test, marker) in enumerate(zip(tests, ['o', '.'])):
+    testmarkers = ['o', '.', 's', '^', 'v', 'D'] #marker of each test type
+    for i, test in enumerate(tests):
+        marker = testmarkers[i % len(testmarkers)]
         for j, cyl in enumerate(cyls):
 
             name = '{}{}'.format(cyl, test) #data key name
@@ -79,7 +116,7 @@ def PlotPressHist(df, ylim=None, norm=False,
                 name = '{}norm'.format(name)
 
             h, = ax.plot(df['Stroke'].values, df[name].values,
-                        label=name, color=colors[j],
+                        label=name, color=colors[j % len(colors)],
                         linestyle='-', marker=marker, markersize=8
                         )
             if j == 0:
@@ -89,31 +126,95 @@ def PlotPressHist(df, ylim=None, norm=False,
                 nhandles.append(h)
                 nlabels.append(str(cyl))
     ax.set_xlim([0, max(df['Stroke'])])
-    plt.xticks(np.arange(1, max(df['Stroke'])+1, 2.0))
+    ax.set_xticks(np.arange(1, max(df['Stroke'])+1, 2.0))
     if ylim != None:
         ax.set_ylim(ylim)
 
     #Cylinder Legend
-    leg1 = PlotLegendLabels(ax, nhandles, nlabels,
+    leg1 = lplot.PlotLegendLabels(ax, nhandles, nlabels,
+                            loc='lower right', title='Cyl')
+    if len(tests) > 1:
+        #Test Type Legend
+        leg2 = lplot.PlotLegendLabels(ax, mhandles, mlabels,
+                                loc='lower center', title='Test')
+        ax.add_artist(leg1)
+
+    return ax
+
+def PlotPressOverlay(data, stroke=None, ylim=None, norm=False,
+                        tests=['dry', 'wet'], agg=False, alpha=0.3):
+    """Overlay cylinder pressure history of many tests (e.g. whole fleet) on
+    one plot.  All histories of each test type are drawn as a single line
+    collection colored by cylinder, so thousands of tests plot quickly.
+    data  --> pressure array [..., test type, cylinder, stroke]
+                (e.g. compAnalysis.StackTests, or 'norm' of CalcMaxima)
+    stroke --> engine stroke number of each stroke (default 1, 2, ...)
+    ylim  --> boundaries of y-axis ([ymin, ymax])
+    norm  --> data is normalized (only changes axis label)
+    agg   --> plot on new Agg figure without pyplot global state
+    alpha --> line transparency (overlapping lines show density)
+    """
+    data = np.asarray(data, dtype=float)
+    ntest, ncyl, nstroke = data.shape[-3:]
+    data = data.reshape(-1, ntest, ncyl, nstroke)
+    if stroke is None:
+        stroke = np.arange(1, nstroke+1, 1)
+
+    ylbl = 'Cylinder Pressure [psi]'
+    if norm:
+        ylbl = 'Norm. Cyl. Pressure [N.D.]'
+    InitPlotting()
+    start = lplot.FigureStart if agg else lplot.PlotStart
+    _,ax = start(None, 'Engine Stroke', ylbl, figsize=[6, 6])
+
+    from matplotlib.lines import Line2D
+    cylcolors = [colors[j % len(colors)] for j in range(ncyl)]
+    mhandles = [] #dry/wet
+    teststyles = ['-', '--', ':', '-.'] #line style of each test type
+    for i, test in enumerate(tests):
+        linestyle = teststyles[i % len(teststyles)]
+        #Every test, cylinder by cylinder: color of each line
+        lines = data[:, i].reshape(-1, nstroke)
+        lplot.PlotLines(ax, stroke, lines,
+                        colors=cylcolors * (len(lines) // ncyl),
+                        linestyle=linestyle, alpha=alpha)
+        mhandles.append(Line2D([], [], color='k', linestyle=linestyle))
+    nhandles = [Line2D([], [], color=c) for c in cylcolors] #cyl number
+
+    ax.set_xlim([0, np.nanmax(stroke)])
+    ax.set_xticks(np.arange(1, np.nanmax(stroke)+1, 2.0))
+    if ylim is None:
+        _, ylim = lplot.TightLims(ax)
+    if ylim is not None:
+        ax.set_ylim(ylim)
+
+    #Cylinder Legend
+    leg1 = lplot.PlotLegendLabels(ax, nhandles,
+                            [str(j+1) for j in range(ncyl)],
                             loc='lower right', title='Cyl')
     if len(tests) > 1:
         #Test Type Legend
-        leg2 = PlotLegendLabels(ax, mhandles, mlabels,
+        leg2 = lplot.PlotLegendLabels(ax, mhandles, [str(t) for t in tests],
                                 loc='lower center', title='Test')
-        plt.gca().add_artist(leg1)
+        ax.add_artist(leg1)
 
     return ax
 
-def PlotDryVsWetDelta(df, ylim=None, norm=1):
+def PlotDryVsWetDelta(df, ylim=None, norm=1, agg=False, cyls=None):
     """For a single compression test, plot wet - dry delta.
     df --> pandas dataframe containing test data
     ylim --> boundaries of y-axis ([ymin, ymax])
     norm --> normalization factor (1 for none, max dry values otherwise)
+    agg --> plot on new Agg figure without pyplot global state (thread-safe)
+    cyls --> cylinder numbers (None for every cylinder with a delta column)
     """
 
-    if max(norm) == 1:
+    if cyls is None:
+        cyls = [c for c in range(1, len(df.columns)+1)
+                    if DeltaName(c, 'wet') in df]
+    if np.max(norm) == 1:
         #Non-normalized plot
-        norm = np.ones(4)
+        norm = np.ones(len(cyls))
         ylbl = 'Wet - Dry [psi]'
         legtitle = '$\\Delta P$'
     else:
@@ -121,29 +222,165 @@ def PlotDryVsWetDelta(df, ylim=None, norm=1):
         ylbl = 'Norm. Wet - Dry'
         legtitle = '$\\Delta P / P_{dry,max}$'
 
-    _,ax = PlotStart(None, 'Engine Stroke', ylbl, figsize=[6, 6])
+    InitPlotting()
+    start = lplot.FigureStart if agg else lplot.PlotStart
+    _,ax = start(None, 'Engine Stroke', ylbl, figsize=[6, 6])
 
 
-    for j, cyl in enumerate([1, 2, 3, 4]):
+    for j, cyl in enumerate(cyls):
 
-        name = '{}del'.format(cyl) #data key name
+        name = DeltaName(cyl, 'wet') #data key name
         h, = ax.plot(df['Stroke'].values, df[name].values / norm[j],
-                    label=cyl, color=colors[j],
+                    label=cyl, color=colors[j % len(colors)],
                     linestyle='-', marker='o', markersize=8
                     )
 
     ax.set_xlim([0, max(df['Stroke'])])
-    plt.xticks(np.arange(1, max(df['Stroke'])+1, 2.0))
+    ax.set_xticks(np.arange(1, max(df['Stroke'])+1, 2.0))
     if ylim != None:
         ax.set_ylim(ylim)
 
-    leg1 = PlotLegend(ax, loc='lower right', title=legtitle)
+    leg1 = lplot.PlotLegend(ax, loc='lower right', title=legtitle)
 
     return ax
 
 
+def AnalyzeMaxima(df, thresh=15, tests=['dry', 'wet'], ncyl=4):
+    """Maxima analysis stage of main.  Calculate maximum pressure of each
+    cylinder in each test, normalize pressure histories by their maxima and
+    find percent difference of each cylinder from the max cylinder.
+    df --> pandas dataframe containing test data
+    thresh --> percentage threshold for poor cylinder performance
+    tests --> types of tests performed ('dry' only or both 'dry' and 'wet')
+    ncyl  --> number of cylinders in engine
+    Returns:
+    dataframe with added '{cyl}{test}norm' columns, maxima dataframe
+    """
+
+    #CALCULATE MAXIMA AND NORMALIZE PRESSURE
+        #Load all cylinders of all test types into one array
+        #[test type, cylinder, stroke] and find maxima in a single pass
+    data = TestArray(df, tests, ncyl)
+    result = CalcMaxima(data, thresh, ref=tests.index('dry'))
+    maxima = MaximaTable(result, tests) #storage for maxima
+    #Normalize each cylinder by its maximum
+    df = pd.concat([df, NormColumns(result, tests)], axis=1)
+
+    #CALC FRACTIONAL DIFFERENCE FROM MAX CYLINDER (DRY TEST ONLY)
+        #lower pressure is worse.  Percent difference of lower max
+        #pressures from greatest max pressure is found by CalcMaxima
+        #as 'diff' (fractional) and 'percdiff' (percent)
+
+    return df, maxima
+
+
+def CalcWetDryDelta(df, tests=['dry', 'wet'], cyls=[1, 2, 3, 4]):
+    """Wet-dry delta stage of main.  Fill missing stroke data of each test
+    with its last recorded value, then subtract dry test pressure from wet.
+    Several wet runs of the same test (e.g. tests=['dry', 'wet', 'wet2'])
+    are all done in the same pass.
+    df --> pandas dataframe containing test data
+    tests --> types of tests performed
+    cyls  --> cylinder numbers
+    Returns:
+    dataframe with filled pressures and added '{cyl}del' columns
+    ('{cyl}{test}del' for additional wet runs)
+    """
+
+    #FILL MISSING STROKE DATA WITH LAST RECORDED VALUE
+        #all cylinders of all tests at once
+    keys = ['{}{}'.format(cyl, test) for test in tests for cyl in cyls]
+    data = FillLast(TestArray(df, tests, len(cyls)))
+    df[keys] = data.reshape(len(keys), -1).T
+
+    #SUBTRACT DRY TEST PRESSURE FROM WET TEST PRESSURE
+    dry = tests.index('dry')
+    delta = CalcDelta(data, dry)
+    cols = {}
+    if 'wet' not in tests:
+        #No wet test, delta is NaN
+        for j, cyl in enumerate(cyls):
+            cols[DeltaName(cyl, 'wet')] = np.full_like(data[dry, j], np.nan)
+    for j, cyl in enumerate(cyls):
+        for i, test in enumerate(tests):
+            if i != dry:
+                cols[DeltaName(cyl, test)] = delta[i, j]
+    df = pd.concat([df, pd.DataFrame(cols, index=df.index)], axis=1)
+
+    return df
+
+
+def PrintVerdict(name, maxima, thresh=15):
+    """Print percent difference of each cylinder of a test and whether any
+    cylinders are outside of success threshold.
+    name   --> name for current test
+    maxima --> maxima dataframe of test (from main)
+    thresh --> percentage threshold for poor cylinder performance
+    """
+    #Print Differences
+    print('\n**********************************')
+    print('Compression Test {}, % difference:'.format(name) )
+    print( maxima[['cyl', 'percdiff']])
+    #Determine if any cylinders are outside of success threshold
+    failures = maxima[maxima['percdiff'] < -thresh]
+    if not failures.empty:
+        print('WARNING: FOLLOWING CYLINDERS ARE ' \
+                'BELOW {}% OF MAXIMUM (FAIL)!!!'.format(thresh))
+        print( failures[['cyl', 'percdiff']])
+    else:
+        print('ALL MAXIMUM CYLINDER PRESSURES ARE ' \
+                'WITHIN THRESHOLD (PASS)!!!')
+
+
+def SetExport(formats=None, dpis=None):
+    """Save every plot in several formats and resolutions from one render
+    (see lplot.ExportPlot) instead of a single PNG.
+    formats --> file formats (e.g. ['png', 'pdf']), None for PNG only
+    dpis    --> PNG resolutions (None for savefig.dpi)
+    """
+    global EXPORT
+    if formats is None and dpis is None:
+        EXPORT = None
+    else:
+        EXPORT = (list(formats or ['png']), list(dpis or [None]))
+
+
+def SavePlot(savename, fig=None, close=False, bbox='tight'):
+    """Save plot (see lplot.SavePlot, lplot.ExportPlot if export formats are
+    set by SetExport), timed as 'saveplot' stage if instrumentation is on
+    (see compInstrument)
+    """
+    with Stage('saveplot', path=savename):
+        if EXPORT is None:
+            lplot.SavePlot(savename, fig=fig, close=close, bbox=bbox)
+        else:
+            lplot.ExportPlot(savename, *EXPORT, fig=fig, close=close,
+                                bbox=bbox)
+
+
+def SaveNames(name):
+    """Paths of plots saved by main for a single test (pressure history,
+    normalized pressure history, normalized wet - dry delta)
+    name --> name for current test
+    """
+    return ['Results/CompTest{}{}.png'.format(name, suffix)
+                for suffix in ['', '_norm', '_delta_norm']]
+
+
+def OutputNames(name):
+    """Paths of every file written by main for a single test, in each export
+    format (see SaveNames, SetExport)
+    """
+    if EXPORT is None:
+        return SaveNames(name)
+    InitPlotting()
+    return [path for savename in SaveNames(name)
+                for path in lplot.ExportNames(savename, *EXPORT)]
+
+
 def main(path, name, ylim=None, thresh=15,
-            tests=['dry', 'wet'], ncyl=4):
+            tests=['dry', 'wet'], ncyl=4, cache=None, plot=True,
+            templates=None, concurrent=False, exclude=False, verbose=True):
     """
     Calculate maximum pressure of each cylinder in each test
     Determine pressure variation between cylinders, evaluate with threshold
@@ -158,6 +395,16 @@ def main(path, name, ylim=None, thresh=15,
                 (assessed as negative in code)
     tests --> types of tests performed ('dry' only or both 'dry' and 'wet')
     ncyl  --> number of cylinders in engine
+    cache --> directory of parsed data cache (None to always parse file)
+    plot  --> make plots (False for analysis only, matplotlib never imported)
+    templates --> compRender.PlotTemplates to reuse figures between tests
+                    (None to build and close new figures for each test)
+    concurrent --> render the three plots at the same time on Agg figures
+                    (see compRender.RenderTest)
+    exclude --> remove strokes flagged by data quality checks before
+                    maxima analysis (see compQuality.ExcludeFlagged)
+    verbose --> print percent difference table and verdict of test (False
+                    for batch runs and workers, which report merged results)
     """
 
 
@@ -166,84 +413,95 @@ def main(path, name, ylim=None, thresh=15,
     ####################################################################
 
     cyls = np.arange(1, ncyl+1, 1) #List of cylinder numbers
-    df = ReadCompTestData(path)    #Load compression test pressure data
+    savenames = SaveNames(name)    #Paths of plots for current test
+    #Load compression test pressure data
+    with Stage('load', test=name):
+        df = ReadCompTestData(path, cache, ncyl, tests)
+
+    if exclude:
+        #REMOVE BAD READINGS (E.G. OUTLIER FIRST STROKE)
+        from compQuality import ExcludeFlagged
+        data, mask = ExcludeFlagged(TestArray(df, tests, ncyl), tests)
+        if mask.any():
+            if verbose:
+                print('\nEXCLUDED FLAGGED READINGS OF {}:'.format(name))
+                for i, j, k in zip(*np.nonzero(mask)):
+                    key = '{}{}'.format(cyls[j], tests[i])
+                    print('    {} stroke {:.0f} ({:.0f} psi)'.format(
+                            key, df['Stroke'].iloc[k], df[key].iloc[k]))
+            df = df.copy()
+            for i, test in enumerate(tests):
+                for j, cyl in enumerate(cyls):
+                    df['{}{}'.format(cyl, test)] = data[i, j]
 
     ####################################################################
     ### MAXIMA ANALYSIS ################################################
     ####################################################################
 
 
-    #CALCULATE MAXIMA AND NORMALIZE PRESSURE
-    maxima = pd.DataFrame( {'cyl' : cyls}) #storage for maxima
+    #CALCULATE MAXIMA, NORMALIZE PRESSURE AND FIND DIFFERENCE FROM MAX CYL
+    with Stage('maxima', test=name):
+        df, maxima = AnalyzeMaxima(df, thresh, tests, ncyl)
 
-    for test in tests:
-        maxs = []
-        for cyl in cyls:
-            curkey = '{}{}'.format(cyl, test)
-            #Get Local Maximum for Each Cylinder
-            maxs.append(max( df[curkey] ))
-            #Normalize Current Cylinder by Maximum
-            df['{}norm'.format(curkey)] = df[curkey] / maxs[-1]
-
-        maxima['{}max'.format(test)] = maxs #save maxima for current test type
-
-    #CALC FRACTIONAL DIFFERENCE FROM MAX CYLINDER (DRY TEST ONLY)
-        #lower pressure is worse.  Calc percent difference of lower
-        #max pressures from greatest max pressure.
-    maxcyl = max(maxima['drymax'])
-    maxima['diff'] = (maxima['drymax'] - maxcyl) / maxcyl #fractional diff
-    maxima['percdiff'] = maxima['diff'] * 100 #percent difference
-
-    #Print Differences
-    print('\n**********************************')
-    print('Compression Test {}, % difference:'.format(name) )
-    print( maxima[['cyl', 'percdiff']])
-    #Determine if any cylinders are outside of success threshold
-    failures = maxima[maxima['percdiff'] < -thresh]
-    if not failures.empty:
-        print('WARNING: FOLLOWING CYLINDERS ARE ' \
-                'BELOW {}% OF MAXIMUM (FAIL)!!!'.format(thresh))
-        print( failures[['cyl', 'percdiff']])
-    else:
-        print('ALL MAXIMUM CYLINDER PRESSURES ARE ' \
-                'WITHIN THRESHOLD (PASS)!!!')
+    if verbose:
+        PrintVerdict(name, maxima, thresh)
 
     ####################################################################
     ### PLOT PRESSURE HISTORIES ########################################
     ####################################################################
 
-    #PLOT COMPRESSION TEST PRESSURE HISTORIES (DRY VS WET IF AVAILABLE)
-    PlotPressHist(df, ylim, tests=tests, cyls=cyls)
-    savename = 'Results/CompTest{}.png'.format(name)
-    SavePlot(savename)
-
-    #PLOT NORMALIZED PRESSURE HISTORIES (DRY VS WET IF AVAILABLE)
-    PlotPressHist(df, None, norm=True, tests=tests, cyls=cyls)
-    savename = 'Results/CompTest{}_norm.png'.format(name)
-    SavePlot(savename)
+    if plot and concurrent:
+        #Keep unfilled data for pressure histories, all plots are
+        #rendered together once wet-dry deltas are calculated
+        histdf = df.copy()
+
+    elif plot and templates is None:
+        #PLOT COMPRESSION TEST PRESSURE HISTORIES (DRY VS WET IF AVAILABLE)
+        with Stage('plot_presshist', test=name):
+            PlotPressHist(df, ylim, tests=tests, cyls=cyls)
+        SavePlot(savenames[0], close=True)
+
+        #PLOT NORMALIZED PRESSURE HISTORIES (DRY VS WET IF AVAILABLE)
+        with Stage('plot_presshist_norm', test=name):
+            PlotPressHist(df, None, norm=True, tests=tests, cyls=cyls)
+        SavePlot(savenames[1], close=True)
+
+    elif plot:
+        #SAME PLOTS, ONLY UPDATE DATA OF REUSED FIGURES
+        with Stage('plot_presshist', test=name):
+            ax = templates.PressHist(df, ylim, tests=tests, cyls=cyls)
+        templates.Save(ax, savenames[0])
+        with Stage('plot_presshist_norm', test=name):
+            ax = templates.PressHist(df, None, norm=True,
+                                        tests=tests, cyls=cyls)
+        templates.Save(ax, savenames[1])
 
     ####################################################################
     ### WET-DRY DELTAS #################################################
     ####################################################################
 
     #CALCULATE DIFFERENCE BETWEEN WET AND DRY TESTS
-    for cyl in cyls:
-        for test in tests:
-            #FILL MISSING STROKE DATA WITH LAST RECORDED VALUE
-            curkey = '{}{}'.format(cyl, test)
-            #Get last value (non-NaN)
-            lastval = df[curkey].dropna().iloc[-1]
-            #Replace NaN values with last value
-            df[curkey] = df[curkey].fillna(lastval)
+    with Stage('delta', test=name):
+        df = CalcWetDryDelta(df, tests, cyls)
+
+    if plot and concurrent:
+        #RENDER ALL PLOTS AT ONCE ON SEPARATE AGG FIGURES
+        from compRender import RenderTest
+        with Stage('render', test=name):
+            RenderTest(histdf, df, maxima['drymax'], name, ylim, tests, cyls)
 
-        #SUBTRACT DRY TEST PRESSURE FROM WET TEST PRESSURE
-        df['{}del'.format(cyl)] = (df['{}wet'.format(cyl)]
-                                     - df['{}dry'.format(cyl)])
+    elif plot and templates is None:
+        #PLOT DELTAS AS FRACTION OF MAX DRY PRESSURE FOR EACH CYLINDER
+        with Stage('plot_delta', test=name):
+            ax = PlotDryVsWetDelta(df, None, norm=maxima['drymax'],
+                                    cyls=cyls)
+        SavePlot(savenames[2], close=True)
 
-    #PLOT DELTAS AS FRACTION OF MAX DRY PRESSURE FOR EACH CYLINDER
-    ax = PlotDryVsWetDelta(df, None, norm=maxima['drymax'])
-    savename = 'Results/CompTest{}_delta_norm.png'.format(name)
-    SavePlot(savename)
+    elif plot:
+        #SAME PLOT, ONLY UPDATE DATA OF REUSED FIGURE
+        with Stage('plot_delta', test=name):
+            ax = templates.DryVsWetDelta(df, None, norm=maxima['drymax'])
+        templates.Save(ax, savenames[2])
 
 
 
@@ -257,59 +515,35 @@ if __name__ == "__main__":
     ####################################################################
     ### RUN MAIN FOR SEPARATE COMPRESSION TESTS ########################
     ####################################################################
+        #(use compBatch.py directly to run a whole directory of tests)
 
-    keys = []   #Key for each test
-    dfs = {}    #Store processed data for each test
-    maxima = {} #Store maxima of each test
+    from compBatch import RunBatch
 
     ylimit = [50, 275] #Limits for plots
 
-    ####################################################################
-    #FIRST TEST
-        #Cammy mk3, 1/7/2017
-    #dry and wet test data
-    # filename = 'Data/CompTest_2017-01-07_1st_1999Camry.dat'
-    filename = 'Data/CompTest_2017-01-07_1st_Retest2_1999Camry.dat'
-    key = 1
-    #CALCULATIONS AND PLOTS FOR CURENT TEST
-    tmpdf = main(filename, key, ylimit)
-    #Save Data
-    dfs[key], maxima[key] = tmpdf
-    keys.append(key)
-
-    ####################################################################
-    #SECOND TEST
-        #Cammy mk3, 1/7/2017
-    # filename = 'Data/CompTest_2017-01-07_2nd_1999Camry.dat'
-    filename = 'Data/CompTest_2017-01-07_2nd_Low3_1999Camry.dat'
-        #includes low value for first stroke pressure
-    key = 2
-    tmpdf = main(filename, key, ylimit, )
-    #Save Data
-    dfs[key], maxima[key] = tmpdf
-    keys.append(key)
-
-    ####################################################################
-    #THIRD TEST
-        #Cammy mk3, 2/11/2017, after Seafoam treatment
-    filename = 'Data/CompTest_2017-02-11_1st_1999Camry.dat'
-    key = 3
-    tmpdf = main(filename, key, ylimit, )
-    #Save Data
-    dfs[key], maxima[key] = tmpdf
-    keys.append(key)
-
-    ####################################################################
-    #COROLLA TEST
-        #Grant's corrolla, 2/12/2017
-    filename = 'Data/CompTest_2017-02-12_1st_1996Corolla.dat'
-    key = 'rolla'
-    tmpdf = main(filename, key, ylimit, )
-    #Save Data
-    dfs[key], maxima[key] = tmpdf
-    keys.append(key)
-
-
-
-
-
+    files = {   #Data file for each test, keyed by test
+        #FIRST TEST
+            #Cammy mk3, 1/7/2017
+        #dry and wet test data
+        # 1 : 'Data/CompTest_2017-01-07_1st_1999Camry.dat',
+        1 : 'Data/CompTest_2017-01-07_1st_Retest2_1999Camry.dat',
+        #SECOND TEST
+            #Cammy mk3, 1/7/2017
+        # 2 : 'Data/CompTest_2017-01-07_2nd_1999Camry.dat',
+        2 : 'Data/CompTest_2017-01-07_2nd_Low3_1999Camry.dat',
+            #includes low value for first stroke pressure
+        #THIRD TEST
+            #Cammy mk3, 2/11/2017, after Seafoam treatment
+        3 : 'Data/CompTest_2017-02-11_1st_1999Camry.dat',
+        #COROLLA TEST
+            #Grant's corrolla, 2/12/2017
+        'rolla' : 'Data/CompTest_2017-02-12_1st_1996Corolla.dat',
+    }
+
+    #CALCULATIONS AND PLOTS FOR ALL TESTS
+    maxima, dfs = RunBatch(files, ylimit, keepdata=True)
+    keys = list(files.keys()) #Key for each test
+    for key in keys:
+        #Workers do not print, show results in order of tests
+        if key in dfs:
+            PrintVerdict(key, maxima.loc[key].reset_index())
@@ -0,0 +1,71 @@
+"""Shared fixtures of tests: repo modules importable, bundled data files,
+plots on non-interactive backend, reference analysis of original main"""
+
+import os
+import sys
+
+import matplotlib
+import numpy as np
+import pandas as pd
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+matplotlib.use('Agg')
+
+DATA = os.path.join(ROOT, 'Data')
+
+
+def DataFile(name):
+    """Path of bundled data file (e.g. '2017-02-11_1st_1999Camry')"""
+    return os.path.join(DATA, 'CompTest_{}.dat'.format(name))
+
+
+@pytest.fixture
+def tmpcwd(tmp_path, monkeypatch):
+    """Run in temporary directory, so plots saved to Results/ go there"""
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def DataFiles():
+    """Paths of all bundled data files"""
+    return sorted(os.path.join(DATA, f) for f in os.listdir(DATA)
+                    if f.startswith('CompTest_') and f.endswith('.dat'))
+
+
+def BaselineRead(filename):
+    """Original ReadCompTestData (read_csv, regex replace, to_numeric)"""
+    columnnames = ['Stroke', '1dry', '2dry', '3dry', '4dry',
+                             '1wet', '2wet', '3wet', '4wet']
+    df = pd.read_csv(filename, sep=',', names=columnnames)
+    df = df.replace(r'\s+', np.nan, regex=True)
+    return df.apply(pd.to_numeric)
+
+
+def BaselineMain(filename, tests=['dry', 'wet'], ncyl=4):
+    """Analysis of original main (per-column loops, no plots): test dataframe
+    with norm, filled and delta columns, and maxima dataframe
+    """
+    cyls = range(1, ncyl+1)
+    df = BaselineRead(filename)
+    maxima = pd.DataFrame({'cyl' : list(cyls)})
+    for test in tests:
+        maxs = []
+        for cyl in cyls:
+            curkey = '{}{}'.format(cyl, test)
+            maxs.append(max(df[curkey]))
+            df['{}norm'.format(curkey)] = df[curkey] / maxs[-1]
+        maxima['{}max'.format(test)] = maxs
+    maxcyl = max(maxima['drymax'])
+    maxima['diff'] = (maxima['drymax'] - maxcyl) / maxcyl
+    maxima['percdiff'] = maxima['diff'] * 100
+    for cyl in cyls:
+        for test in tests:
+            curkey = '{}{}'.format(cyl, test)
+            lastval = df[curkey].dropna().iloc[-1]
+            df[curkey] = df[curkey].fillna(lastval)
+        df['{}del'.format(cyl)] = (df['{}wet'.format(cyl)]
+                                    - df['{}dry'.format(cyl)])
+    return df, maxima
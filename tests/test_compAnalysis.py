@@ -0,0 +1,40 @@
+"""Vectorized maxima engine of compAnalysis against original main"""
+
+import numpy as np
+import pytest
+
+from compAnalysis import (TestArray, StackTests, CalcMaxima, MaximaTable,
+                            NormColumns)
+from conftest import DataFiles, BaselineRead, BaselineMain
+
+
+@pytest.mark.parametrize('filename', DataFiles())
+def test_maxima_match_main(filename):
+    df, expect = BaselineMain(filename)
+    result = CalcMaxima(TestArray(BaselineRead(filename)))
+    maxima = MaximaTable(result)
+    assert list(maxima.columns) == list(expect.columns)
+    for col in expect.columns:
+        assert np.array_equal(maxima[col], expect[col]), col
+    for key, norm in NormColumns(result).items():
+        assert np.array_equal(norm, df[key], equal_nan=True), key
+    assert not result['fail'].any()
+
+
+def test_fail_threshold():
+    filename = DataFiles()[0]
+    _, expect = BaselineMain(filename)
+    thresh = 5
+    result = CalcMaxima(TestArray(BaselineRead(filename)), thresh)
+    assert np.array_equal(result['fail'], expect['percdiff'] < -thresh)
+
+
+def test_fleet_matches_each_test():
+    """Fleet scored in one call, tests of different lengths NaN-padded"""
+    arrays = [TestArray(BaselineRead(f)) for f in DataFiles()]
+    assert len(set(a.shape[-1] for a in arrays)) > 1
+    fleet = CalcMaxima(StackTests(arrays))
+    for i, data in enumerate(arrays):
+        single = CalcMaxima(data)
+        for key in ['max', 'diff', 'percdiff', 'fail']:
+            assert np.array_equal(fleet[key][i], single[key]), key
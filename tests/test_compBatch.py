@@ -0,0 +1,39 @@
+"""Batch runner of compBatch"""
+
+import json
+import shutil
+
+import plotCompression as pc
+from compBatch import RunBatch
+from conftest import DataFile
+
+
+def test_errors_apart_from_maxima(tmp_path):
+    """Test that cannot be run is reported, not added to pass/fail table"""
+    shutil.copy(DataFile('2017-02-12_1st_1996Corolla'), str(tmp_path))
+    (tmp_path / 'CompTest_bad.dat').write_text('a,b\nzz\n')
+    table, _ = RunBatch(str(tmp_path), plot=False, workers=1)
+    assert list(table.attrs['errors']) == ['bad']
+    assert table.index.get_level_values('test').unique().tolist() == [
+                                                '2017-02-12_1st_1996Corolla']
+    assert table.index.get_level_values('cyl').tolist() == [1, 2, 3, 4]
+    assert not table['fail'].any()
+
+
+def test_export_formats(tmpcwd):
+    """Plots saved in every format and resolution, listed in manifest"""
+    shutil.copy(DataFile('2017-02-12_1st_1996Corolla'), str(tmpcwd))
+    manifest = str(tmpcwd / 'Results' / 'manifest.json')
+    RunBatch(str(tmpcwd), workers=1, manifest=manifest,
+                export=(['png', 'pdf'], [50, 100]))
+    with open(manifest) as f:
+        outputs = json.load(f)['2017-02-12_1st_1996Corolla']['outputs']
+    assert len(outputs) == 3 * 3
+    assert 'Results/CompTest2017-02-12_1st_1996Corolla_norm_50dpi.png' in (
+                                                                    outputs)
+    assert all((tmpcwd / path).is_file() for path in outputs)
+    #Later batches save single PNGs again
+    RunBatch(str(tmpcwd), workers=1)
+    assert pc.EXPORT is None
+    assert all((tmpcwd / path).is_file() for path in pc.SaveNames(
+                                                '2017-02-12_1st_1996Corolla'))
@@ -0,0 +1,44 @@
+"""Parsed data cache of compCache"""
+
+import os
+
+import numpy as np
+
+from compCache import LoadCached, ClearCache
+from compParse import ParseCompTest
+from conftest import DataFile
+
+
+FILE = DataFile('2017-02-12_1st_1996Corolla')
+
+
+def test_hit_matches_parse(tmp_path):
+    LoadCached(FILE, 9, str(tmp_path))
+    data = LoadCached(FILE, 9, str(tmp_path))
+    assert np.array_equal(data, ParseCompTest(FILE, 9), equal_nan=True)
+
+
+def test_ncol_in_key(tmp_path):
+    """Entry of truncated load is never returned for a full load"""
+    cache = str(tmp_path)
+    assert LoadCached(FILE, 5, cache).shape[1] == 5
+    for _ in range(2):
+        data = LoadCached(FILE, None, cache)
+        assert np.array_equal(data, ParseCompTest(FILE), equal_nan=True)
+    assert LoadCached(FILE, 5, cache).shape[1] == 5
+
+
+def test_changed_file(tmp_path):
+    path = str(tmp_path / 'CompTest_test.dat')
+    with open(FILE) as f:
+        text = f.read()
+    with open(path, 'w') as f:
+        f.write(text)
+    cache = str(tmp_path / 'cache')
+    LoadCached(path, 9, cache)
+    #Same size, different contents
+    with open(path, 'w') as f:
+        f.write(text.replace('1,', '2,', 1))
+    os.utime(path, ns=(0, 0))
+    assert LoadCached(path, 9, cache)[0, 0] == 2
+    assert ClearCache(cache) == 1
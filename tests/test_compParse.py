@@ -0,0 +1,36 @@
+"""Single-pass data file parser of compParse against original read_csv"""
+
+import numpy as np
+import pytest
+
+from compParse import ParseCompText, ParseCompTest, ParseCompTests
+from conftest import DataFiles, BaselineRead
+
+
+@pytest.mark.parametrize('filename', DataFiles())
+def test_matches_read_csv(filename):
+    expect = BaselineRead(filename).to_numpy(dtype=float)
+    assert np.array_equal(ParseCompTest(filename), expect, equal_nan=True)
+
+
+def test_blank_and_ragged_rows():
+    text = b'1,100, 95,  \n\n2,146\n3,166,160,164,170\n'
+    data = ParseCompText(text, 4)
+    expect = np.array([[1, 100, 95, np.nan],
+                        [2, 146, np.nan, np.nan],
+                        [3, 166, 160, 164]])
+    assert np.array_equal(data, expect, equal_nan=True)
+    #Number of columns from first row
+    assert ParseCompText(text, None).shape == (3, 4)
+
+
+def test_bulk_matches_each_file():
+    files = DataFiles()
+    #Buffer smaller than longest file is grown
+    buf, counts = ParseCompTests(files, nstroke=4)
+    assert buf.shape == (len(files), counts.max(), 9)
+    for i, filename in enumerate(files):
+        data = ParseCompTest(filename)
+        assert counts[i] == len(data)
+        assert np.array_equal(buf[i, :counts[i]], data, equal_nan=True)
+        assert np.isnan(buf[i, counts[i]:]).all()
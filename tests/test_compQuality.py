@@ -0,0 +1,79 @@
+"""Data quality checks of compQuality"""
+
+import numpy as np
+
+from compAnalysis import CalcMaxima
+from compQuality import CheckHistories, ExcludeFlagged, QualityReport
+from compTest import LoadTests
+from conftest import DataFile
+
+
+PLATEAU = np.array([220.0, 200, 205, 210]) #settled pressure of cylinders
+
+
+def BuildUp(nstroke=10):
+    """Fleet of one test of pressures building up to plateau"""
+    stroke = np.arange(1, nstroke+1)
+    dry = PLATEAU[:, None] * (1 - 0.5**stroke)
+    return np.stack([dry, 1.1 * dry])[None]
+
+
+def SpikeData():
+    """Build-up with cylinder 1 overshooting to 235 at stroke 5"""
+    data = BuildUp()
+    data[0, :, 0, 4] = [235, 1.1 * 235]
+    return data
+
+
+def test_spike_flagged():
+    flags = CheckHistories(SpikeData())
+    #Only the spike itself is flagged, not the reading after it
+    assert np.nonzero(flags['nonmono'][0, 0, 0])[0].tolist() == [4]
+    assert flags['nonmono'][0, :, 1:].sum() == 0
+
+
+def test_spike_excluded():
+    data, mask = ExcludeFlagged(SpikeData())
+    assert mask.sum() == 2 #spike of dry and wet test
+    assert np.isnan(data[0, :, 0, 4]).all()
+    #Maxima of good readings, not of spike
+    good = BuildUp()
+    result = CalcMaxima(data)
+    expect = CalcMaxima(good)
+    assert np.allclose(result['max'], expect['max'])
+    assert np.allclose(result['percdiff'], expect['percdiff'])
+    assert result['max'][0, 0, 0] < 235
+
+
+def test_dip_flagged():
+    data = SpikeData()
+    data[0, :, 0, 4] = 150
+    flags = CheckHistories(data)
+    assert flags['nonmono'][0, :, 0, 4].all()
+    assert flags['nonmono'].sum() == 2
+
+
+
+def test_plateau_not_duprow():
+    """Every reading repeating once pressures level off is genuine"""
+    data = BuildUp(30)
+    data = np.round(data)
+    assert (data[..., -1] == data[..., -2]).all()
+    assert not CheckHistories(data)['duprow'].any()
+
+
+def test_bundled_plateau_not_duprow():
+    """Corolla readings repeat on their plateau (strokes 12 and 13)"""
+    fleet = LoadTests({'rolla' : DataFile('2017-02-12_1st_1996Corolla')}, 4)
+    report = QualityReport(fleet)
+    assert 'duprow' not in report['check'].tolist()
+
+
+def test_pasted_row_duprow():
+    """Row pasted twice while pressures are still building up is flagged"""
+    data = BuildUp(12)
+    data[..., 3:] = data[..., 2:-1].copy()
+    flags = CheckHistories(data)['duprow']
+    assert np.nonzero(flags[0])[0].tolist() == [3]
+    _, mask = ExcludeFlagged(data)
+    assert mask[0, :, :, 3].all() and mask.sum() == 8
@@ -0,0 +1,29 @@
+"""Streaming ingest of compStream"""
+
+import numpy as np
+import pytest
+
+from compStream import SimulatorSource, StreamState, Stream
+
+
+@pytest.mark.parametrize('tests', [['dry', 'wet'], ['dry', 'wet', 'wet2'],
+                                    ['dry', 'wet2']])
+def test_simulator_runs_by_test(tests):
+    """Every test type streams its own run"""
+    state = Stream(SimulatorSource(4, tests, rate=None, seed=1),
+                    StreamState(tests))
+    assert (state.count > 0).all()
+    dry = state.tests.index('dry')
+    #Oil seals rings, every wet run is above dry
+    for i in range(len(tests)):
+        if i != dry:
+            assert (state.max[i] > state.max[dry]).all()
+    if len(tests) == 3:
+        assert not np.array_equal(state.buf[1], state.buf[2], equal_nan=True)
+
+
+def test_simulator_repeatable():
+    """Extra wet run does not change the dry and wet runs"""
+    samples = list(SimulatorSource(4, ['dry', 'wet'], rate=None, seed=1))
+    more = list(SimulatorSource(4, ['dry', 'wet', 'wet2'], rate=None, seed=1))
+    assert [s for s in more if s[0] != 'wet2'] == samples
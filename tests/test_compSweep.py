@@ -0,0 +1,47 @@
+"""Threshold sensitivity sweep of compSweep"""
+
+import numpy as np
+import pytest
+
+from compSweep import FleetPercDiff, FailMatrix, FailCurves
+from conftest import DataFiles, BaselineMain
+
+THRESHS = np.arange(0, 10.5, 0.5)
+
+
+@pytest.fixture(scope='module')
+def percdiff():
+    return np.array([BaselineMain(f)[1]['percdiff'].values
+                        for f in DataFiles()])
+
+
+@pytest.mark.parametrize('chunk', [1, 4, 10000])
+def test_chunked_percdiff(percdiff, chunk):
+    """Files parsed a chunk at a time give percdiff of original main"""
+    assert np.array_equal(FleetPercDiff(DataFiles(), chunk=chunk), percdiff)
+
+
+def test_fail_matrix(percdiff):
+    fail = FailMatrix(percdiff, THRESHS)
+    assert fail.shape == (len(THRESHS),) + percdiff.shape
+    for k, thresh in enumerate(THRESHS):
+        assert np.array_equal(fail[k], percdiff < -thresh)
+
+
+@pytest.mark.parametrize('level', ['test', 'cyl'])
+def test_fail_curves(percdiff, level):
+    """Fail rates from sorted values same as counting fail matrix"""
+    models = np.array(['Corolla' if 'Corolla' in f else 'Camry'
+                        for f in DataFiles()])
+    curves = FailCurves(percdiff, THRESHS, models, level)
+    fail = FailMatrix(percdiff, THRESHS)
+    if level == 'test':
+        fail = fail.any(axis=-1)
+    assert np.allclose(curves['fleet'], fail.reshape(len(THRESHS), -1).mean(
+                                                                    axis=1))
+    for model in ['Camry', 'Corolla']:
+        expect = fail[:, models == model].reshape(len(THRESHS), -1).mean(
+                                                                    axis=1)
+        assert np.allclose(curves[model], expect)
+    #Some thresholds fail and some pass, so comparison is not trivial
+    assert curves['fleet'].iloc[0] > 0 and curves['fleet'].iloc[-1] == 0
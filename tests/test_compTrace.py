@@ -0,0 +1,51 @@
+"""Stroke segmentation of raw pressure traces of compTrace"""
+
+import numpy as np
+import pytest
+
+from compAnalysis import TestArray, CalcMaxima
+from compSynth import SynthTrace
+from compTrace import StrokePeaks, SegmentTest
+from conftest import DataFile, BaselineRead, BaselineMain
+
+CAMRY = DataFile('2017-02-11_1st_1999Camry')
+
+
+def WriteTraces(tracedir, df, ext, rng):
+    """Write raw trace of each data column of test, as binary or CSV"""
+    for key in df.columns[1:]:
+        trace = SynthTrace(rng, df[key].values)
+        path = tracedir / '{}{}'.format(key, ext)
+        if ext == '.f32':
+            trace.tofile(str(path))
+        else:
+            np.savetxt(str(path), trace, fmt='%.3f')
+
+
+@pytest.mark.parametrize('chunksize', [10**6, 1000, 7])
+def test_peaks_across_chunks(chunksize):
+    """Strokes spanning chunk boundaries give same peaks as one chunk"""
+    peaks = np.array([100.0, 146, 166, 180, 185, 187])
+    trace = SynthTrace(np.random.default_rng(0), peaks, noise=0)
+    chunks = [trace[i:i+chunksize] for i in range(0, len(trace), chunksize)]
+    found = StrokePeaks(chunks)
+    assert np.allclose(found, peaks, atol=1e-3)
+    #Trace ending during a stroke
+    found = StrokePeaks([trace[:-50]])
+    assert len(found) == len(peaks)
+
+
+@pytest.mark.parametrize('ext', ['.f32', '.csv'])
+def test_segment_matches_data(tmp_path, ext):
+    """Test data made from traces of recorded strokes gives maxima of
+    original main
+    """
+    df = BaselineRead(CAMRY)
+    WriteTraces(tmp_path, df, ext, np.random.default_rng(1))
+    seg = SegmentTest(str(tmp_path), chunksize=5000)
+    assert list(seg.columns) == list(df.columns)
+    #Readings within transducer noise, NaN tails kept
+    assert np.allclose(seg.values, df.values, atol=3, equal_nan=True)
+    _, expect = BaselineMain(CAMRY)
+    result = CalcMaxima(TestArray(seg))
+    assert np.allclose(result['percdiff'], expect['percdiff'], atol=2)
@@ -0,0 +1,59 @@
+"""Monte Carlo percent difference uncertainty of compUncertainty"""
+
+import numpy as np
+
+from compAnalysis import TestArray, StackTests
+from compTest import LoadTests
+from compUncertainty import PercDiffUncertainty, UncertaintyTable
+from conftest import DataFiles, BaselineRead, BaselineMain
+
+
+def Fleet():
+    """Stacked pressure arrays and original main maxima of bundled data"""
+    files = DataFiles()
+    data = StackTests([TestArray(BaselineRead(f)) for f in files])
+    return data, [BaselineMain(f)[1] for f in files]
+
+
+def test_exact_readings_give_percdiff():
+    """No reading error and no dropped strokes is the analysis of main"""
+    data, maxima = Fleet()
+    result = PercDiffUncertainty(data, thresh=3, ndraw=50, noise=0, drop=0,
+                                    seed=0)
+    for i, expect in enumerate(maxima):
+        percdiff = expect['percdiff'].values
+        assert np.allclose(result['lo'][i], percdiff, atol=1e-4)
+        assert np.allclose(result['hi'][i], percdiff, atol=1e-4)
+        assert np.array_equal(result['pfail'][i], percdiff < -3)
+        assert result['ptest'][i] == (percdiff < -3).any()
+
+
+def test_interval_and_seed():
+    data, maxima = Fleet()
+    kwargs = dict(thresh=3, ndraw=2000, seed=42)
+    result = PercDiffUncertainty(data, **kwargs)
+    again = PercDiffUncertainty(data, **kwargs)
+    #Same seed, same draws
+    for key in result:
+        assert np.array_equal(result[key], again[key]), key
+    for i, expect in enumerate(maxima):
+        percdiff = expect['percdiff'].values
+        #Interval around exact percent difference, within reading error
+        #(+/- 5 psi of ~200 psi is +/- 2.5%)
+        assert (result['lo'][i] <= result['hi'][i]).all()
+        assert (result['lo'][i] <= percdiff + 5).all()
+        assert (result['hi'][i] >= percdiff - 5).all()
+    #Probabilities valid
+    assert ((result['pfail'] >= 0) & (result['pfail'] <= 1)).all()
+    assert (result['ptest'] >= result['pfail'].max(axis=-1)).all()
+
+
+def test_table_of_fleet():
+    files = {str(i) : f for i, f in enumerate(DataFiles())}
+    fleet = LoadTests(files, 4)
+    table = UncertaintyTable(fleet, ndraw=100, noise=0, drop=0, seed=0)
+    assert table.index.names == ['test', 'cyl']
+    assert len(table) == 4 * len(files)
+    for name, f in files.items():
+        expect = BaselineMain(f)[1]['percdiff'].values
+        assert np.allclose(table.loc[name, 'percdiff_lo'], expect, atol=1e-4)
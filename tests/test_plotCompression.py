@@ -0,0 +1,52 @@
+"""Analysis and plotting of a single test (plotCompression.main)"""
+
+import os
+
+import numpy as np
+import pytest
+
+from conftest import DataFile, DataFiles, BaselineRead, BaselineMain
+import plotCompression as pc
+
+CAMRY = DataFile('2017-02-11_1st_1999Camry')
+
+
+@pytest.mark.parametrize('filename', DataFiles())
+def test_main_matches_baseline(tmpcwd, filename):
+    """Filled pressures, normalized pressures, deltas and maxima same as
+    original main
+    """
+    df, maxima = pc.main(filename, 'x', plot=False, verbose=False)
+    expect, expectmaxima = BaselineMain(filename)
+    assert list(df.columns) == list(expect.columns)
+    for col in expect.columns:
+        assert np.array_equal(df[col], expect[col], equal_nan=True), col
+    for col in expectmaxima.columns:
+        assert np.array_equal(maxima[col], expectmaxima[col]), col
+
+
+def test_repeated_wet_runs():
+    """Delta of each wet run in one pass, first wet run same as original"""
+    df = BaselineRead(CAMRY)
+    for cyl in range(1, 5):
+        df['{}wet2'.format(cyl)] = df['{}wet'.format(cyl)] + 5
+    df = pc.CalcWetDryDelta(df, ['dry', 'wet', 'wet2'])
+    expect, _ = BaselineMain(CAMRY)
+    for cyl in range(1, 5):
+        assert np.array_equal(df['{}del'.format(cyl)],
+                                expect['{}del'.format(cyl)])
+        assert np.array_equal(df[pc.DeltaName(cyl, 'wet2')],
+                                expect['{}del'.format(cyl)] + 5)
+
+
+@pytest.mark.parametrize('tests', [['dry'], ['dry', 'wet2']])
+@pytest.mark.parametrize('plot', [False, True])
+def test_dry_only(tmpcwd, tests, plot):
+    #No 'wet' test, so delta of first wet run is NaN
+    df, maxima = pc.main(CAMRY, 'dry', tests=tests, plot=plot, verbose=False)
+    full, fullmaxima = pc.main(CAMRY, 'full', plot=False, verbose=False)
+    assert np.allclose(maxima['percdiff'], fullmaxima['percdiff'])
+    assert np.isnan(df[[pc.DeltaName(cyl, 'wet')
+                        for cyl in range(1, 5)]].values).all()
+    if plot:
+        assert all(os.path.isfile(path) for path in pc.SaveNames('dry'))